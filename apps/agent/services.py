@@ -93,6 +93,9 @@ class AgentService:
             # Arrêter l'observation continue
             await self.perception_manager.stop_continuous_observation()
             
+            # Libérer les threads du planificateur
+            self.planner_manager.close()
+            
             # Annuler les sessions actives
             for session in self._active_sessions.values():
                 if session.status == StepStatus.RUNNING:
@@ -40,6 +40,14 @@ class PerceptionConfig(BaseModel):
     max_ui_elements: int = Field(default=1000, description="Max éléments UI par observation")
     cache_screenshots: bool = Field(default=True, description="Cache des captures")
     screenshot_compression: str = Field(default="png", description="Format compression")
+    screenshot_hash: str = Field(
+        default="exact",
+        description="Hash de déduplication: exact (MD5) ou perceptual (aHash 8x8)"
+    )
+    screenshot_hash_distance: int = Field(
+        default=0,
+        description="Distance de Hamming tolérée pour le cache en mode perceptual"
+    )
 
 
 class VoiceConfig(BaseModel):
@@ -77,6 +85,21 @@ class SecurityConfig(BaseModel):
     max_execution_time: float = Field(default=300.0, description="Temps max exécution (secondes)")
 
 
+class PlannerConfig(BaseModel):
+    """Configuration du planificateur."""
+    plan_cache_enabled: bool = Field(default=True, description="Cache des plans générés")
+    plan_cache_size: int = Field(default=256, ge=1, description="Taille max du cache de plans")
+    parallel_checks: bool = Field(default=True, description="Validation et guardrails en parallèle")
+
+
+class SkillsConfig(BaseModel):
+    """Configuration des compétences."""
+    event_driven_app_launch: bool = Field(
+        default=True,
+        description="Détecter le lancement des apps via les événements OS (sinon polling)"
+    )
+
+
 class RLConfig(BaseModel):
     """Configuration Reinforcement Learning."""
     environment_name: str = Field(default="DesktopAgent-v0", description="Nom environnement")
@@ -123,6 +146,8 @@ class AgentSettings(BaseSettings):
     voice: VoiceConfig = Field(default_factory=VoiceConfig)
     ui: UIConfig = Field(default_factory=UIConfig)
     security: SecurityConfig = Field(default_factory=SecurityConfig)
+    planner: PlannerConfig = Field(default_factory=PlannerConfig)
+    skills: SkillsConfig = Field(default_factory=SkillsConfig)
     rl: RLConfig = Field(default_factory=RLConfig)
     
     def __init__(self, **kwargs):
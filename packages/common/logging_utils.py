@@ -139,9 +139,26 @@ class AgentLogger:
             name: Nom du logger
             **default_context: Contexte par défaut à ajouter
         """
+        self._name = name
         self._logger = structlog.get_logger(name)
         self._default_context = default_context
     
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        Indique si un niveau de log sera émis, pour éviter de formater
+        des messages ignorés sur les chemins chauds.
+        
+        Args:
+            level: Niveau logging standard (ex: logging.INFO)
+            
+        Returns:
+            True si le niveau est actif
+        """
+        if not structlog.is_configured():
+            # Configuration structlog par défaut: aucun filtrage par niveau
+            return True
+        return logging.getLogger(self._name).isEnabledFor(level)
+    
     def _log(self, level: str, message: str, **context: Any) -> None:
         """Log un message avec contexte."""
         full_context = {**self._default_context, **context}
@@ -100,6 +100,11 @@ class Observation(BaseModel):
     active_window: Optional[UiObject] = Field(None, description="Fenêtre active")
     mouse_position: tuple[int, int] = Field((0, 0), description="Position de la souris")
     platform: Platform = Field(..., description="Plateforme OS")
+    screenshot_ndarray: Optional[Any] = Field(
+        None,
+        exclude=True,
+        description="Frame uint8 déjà en mémoire, RGB (H, W, 3) ou BGRA (H, W, 4) brute de mss; évite l'aller-retour PNG"
+    )
 
 
 class IntentType(str, Enum):
@@ -4,6 +4,7 @@ Interface de base pour les adaptateurs OS.
 Définit l'interface commune que tous les adaptateurs doivent implémenter.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -476,4 +477,29 @@ class OSAdapter(ABC):
         Returns:
             Fenêtre trouvée ou None si timeout
         """
-        pass
\ No newline at end of file
+        pass
+    
+    async def await_app_launch(self, name: str, timeout: float = 10.0) -> bool:
+        """
+        Attend qu'une application apparaisse parmi les applications lancées.
+        
+        Implémentation par défaut par polling de get_running_apps(); les
+        adaptateurs disposant d'événements OS la surchargent.
+        
+        Args:
+            name: Nom (ou partie du nom) de l'application
+            timeout: Timeout en secondes
+            
+        Returns:
+            True si l'application est détectée avant le timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        needle = name.lower()
+        
+        while loop.time() < deadline:
+            if any(needle in app["name"].lower() for app in self.get_running_apps()):
+                return True
+            await asyncio.sleep(0.5)
+        
+        return False
\ No newline at end of file
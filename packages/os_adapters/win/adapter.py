@@ -4,8 +4,11 @@ Adaptateur Windows pour Desktop Agent.
 Implémentation complète utilisant pywinauto, pygetwindow et les APIs Windows.
 """
 
+import asyncio
+import ctypes
 import os
 import subprocess
+import threading
 import time
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -37,6 +40,15 @@ from ..base import OSAdapter
 
 logger = get_logger("os_adapter.windows")
 
+# Événements WinEvent (winuser.h) signalant l'apparition d'une fenêtre
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_NAMECHANGE = 0x800C
+OBJID_WINDOW = 0
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+PM_REMOVE = 0x0001
+QS_ALLINPUT = 0x04FF
+
 
 class WindowsAdapter(OSAdapter):
     """Adaptateur pour Windows utilisant pywinauto et UIAutomation."""
@@ -585,8 +597,127 @@ class WindowsAdapter(OSAdapter):
         
         return None
     
+    async def await_app_launch(self, name: str, timeout: float = 10.0) -> bool:
+        """
+        Attend l'apparition d'une fenêtre d'application via SetWinEventHook.
+        
+        Args:
+            name: Nom (ou partie du titre) de l'application
+            timeout: Timeout en secondes
+            
+        Returns:
+            True si la fenêtre est détectée avant le timeout
+        """
+        loop = asyncio.get_running_loop()
+        needle = name.lower()
+        launched = asyncio.Event()
+        ready = threading.Event()
+        hooked = threading.Event()
+        stop = threading.Event()
+        
+        def on_window(title: str) -> None:
+            if needle in title.lower():
+                loop.call_soon_threadsafe(launched.set)
+        
+        watcher = threading.Thread(
+            target=self._watch_window_events,
+            args=(on_window, ready, hooked, stop),
+            name="win-event-hook",
+            daemon=True
+        )
+        watcher.start()
+        
+        try:
+            await loop.run_in_executor(None, ready.wait, 1.0)
+            if not hooked.is_set():
+                logger.warning("SetWinEventHook indisponible, repli sur le polling")
+                return await super().await_app_launch(name, timeout)
+            
+            # Contrôle après la pose des hooks: une fenêtre apparue entre
+            # l'ouverture et l'abonnement n'est pas manquée
+            if any(needle in app["name"].lower() for app in self.get_running_apps()):
+                return True
+            
+            await asyncio.wait_for(launched.wait(), timeout)
+            return True
+            
+        except asyncio.TimeoutError:
+            return False
+        
+        finally:
+            stop.set()
+    
     # Méthodes privées
     
+    def _watch_window_events(
+        self,
+        on_window,
+        ready: threading.Event,
+        hooked: threading.Event,
+        stop: threading.Event
+    ) -> None:
+        """
+        Boucle de messages d'un thread dédié recevant les WinEvents de fenêtres.
+        
+        Args:
+            on_window: Appelé avec le titre de chaque fenêtre affichée/renommée
+            ready: Signalé une fois les hooks posés (ou leur échec constaté)
+            hooked: Signalé si les hooks sont actifs
+            stop: Demande d'arrêt de la boucle
+        """
+        from ctypes import wintypes
+        
+        user32 = ctypes.windll.user32
+        win_event_proc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, win_event_proc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+        ]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        
+        def callback(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            if hwnd and id_object == OBJID_WINDOW:
+                title = win32gui.GetWindowText(hwnd)
+                if title:
+                    on_window(title)
+        
+        # Référence conservée pendant toute la boucle (sinon libérée par ctypes)
+        proc = win_event_proc(callback)
+        hooks = [
+            user32.SetWinEventHook(
+                event, event, None, proc, 0, 0,
+                WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+            )
+            for event in (EVENT_OBJECT_SHOW, EVENT_OBJECT_NAMECHANGE)
+        ]
+        
+        try:
+            if all(hooks):
+                hooked.set()
+            ready.set()
+            
+            # Les callbacks hors contexte sont délivrés via la file de messages
+            # de ce thread; attente bornée pour relire stop régulièrement
+            msg = wintypes.MSG()
+            while hooked.is_set() and not stop.is_set():
+                while user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_REMOVE):
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+                user32.MsgWaitForMultipleObjects(0, None, False, 50, QS_ALLINPUT)
+                
+        except Exception as e:
+            logger.error(f"Erreur boucle WinEvent: {e}")
+            
+        finally:
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+            ready.set()
+    
     def _normalize_app_name(self, name: str) -> str:
         """Normalise le nom d'une application."""
         # Mapping des noms communs
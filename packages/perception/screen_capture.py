@@ -5,9 +5,10 @@ Utilise mss pour des captures rapides et efficaces.
 """
 
 import hashlib
+import os
 import time
+from collections import OrderedDict
 from datetime import datetime
-from pathlib import Path
 from typing import List, Optional, Tuple
 
 try:
@@ -18,6 +19,12 @@ try:
 except ImportError:
     MSS_AVAILABLE = False
 
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 from ..common.config import get_settings
 from ..common.errors import PerceptionError, ScreenCaptureError
 from ..common.logging_utils import get_perception_logger
@@ -26,6 +33,47 @@ from ..common.retry import retry
 
 logger = get_perception_logger()
 
+# Durée d'attente active avant chaque échéance de capture continue
+SPIN_WAIT_NS = 500_000
+
+
+def _bgra_to_gray(arr: "np.ndarray") -> "np.ndarray":
+    """
+    Convertit un buffer BGRA en niveaux de gris (BT.601).
+    
+    Utilise OpenCV (SIMD) si disponible, sinon une version NumPy en virgule
+    fixe que NumPy vectorise sans boucle Python.
+    """
+    if CV2_AVAILABLE:
+        return cv2.cvtColor(arr, cv2.COLOR_BGRA2GRAY)
+    
+    b = arr[..., 0].astype(np.uint16)
+    g = arr[..., 1].astype(np.uint16)
+    r = arr[..., 2].astype(np.uint16)
+    return ((b * 29 + g * 150 + r * 77) >> 8).astype(np.uint8)
+
+
+def _average_hash(arr: "np.ndarray") -> int:
+    """
+    Calcule le hash moyen (aHash 8x8) d'un buffer BGRA.
+    
+    Args:
+        arr: Image BGRA de forme (hauteur, largeur, 4)
+        
+    Returns:
+        Hash 64 bits sous forme d'entier
+    """
+    if CV2_AVAILABLE:
+        small = cv2.resize(_bgra_to_gray(arr), (8, 8), interpolation=cv2.INTER_AREA)
+    else:
+        # Sous-échantillonner avant la conversion pour ne traiter que 64 pixels
+        height, width = arr.shape[:2]
+        sub = arr[::max(height // 8, 1), ::max(width // 8, 1)][:8, :8]
+        small = _bgra_to_gray(sub)
+    
+    bits = np.packbits(small > small.mean())
+    return int.from_bytes(bits.tobytes(), "big")
+
 
 class ScreenCaptureService:
     """Service de capture d'écran avec support multi-moniteur."""
@@ -36,7 +84,9 @@ class ScreenCaptureService:
         
         self.settings = get_settings()
         self._sct = mss.mss()
-        self._capture_cache = {}
+        self._capture_cache: OrderedDict[int, ScreenCapture] = OrderedDict()
+        self._cache_popcounts: dict[int, int] = {}
+        self._ensured_dirs: set[str] = set()
         
         # Informations des moniteurs
         self.monitors = self._sct.monitors[1:]  # Exclure le moniteur "All"
@@ -109,23 +159,26 @@ class ScreenCaptureService:
             # Effectuer la capture
             screenshot = self._sct.grab(capture_region)
             
-            # Convertir en PIL Image
-            img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-            
-            # Calculer le hash pour déduplication
-            img_hash = self._calculate_image_hash(img)
+            # Hasher directement le buffer BGRA brut, sans passer par PIL;
+            # .raw est le bytearray de mss (.bgra en ferait une copie)
+            raw = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(
+                screenshot.height, screenshot.width, 4
+            )
+            img_hash = self._calculate_image_hash(raw)
             
             # Vérifier le cache si activé
             if self.settings.perception.cache_screenshots:
-                if img_hash in self._capture_cache:
-                    cached_capture = self._capture_cache[img_hash]
-                    logger.debug(f"Capture trouvée en cache: {img_hash[:8]}")
-                    return cached_capture
+                cached_key = self._find_cached_key(img_hash)
+                if cached_key is not None:
+                    self._capture_cache.move_to_end(cached_key)
+                    short_hash = f"{cached_key:016x}"[:8]
+                    logger.debug(f"Capture trouvée en cache: {short_hash}")
+                    return self._capture_cache[cached_key]
             
-            # Sauvegarder si demandé
+            # Sauvegarder si demandé (seul cas nécessitant une image PIL)
             if save_path:
-                save_path_obj = Path(save_path)
-                save_path_obj.parent.mkdir(parents=True, exist_ok=True)
+                img = Image.frombytes("RGB", screenshot.size, screenshot.raw, "raw", "BGRX")
+                self._ensure_dir(os.path.dirname(save_path))
                 img.save(save_path, format=self.settings.perception.screenshot_compression.upper())
             
             # Créer l'objet ScreenCapture
@@ -135,17 +188,18 @@ class ScreenCaptureService:
                 height=capture_region["height"],
                 monitor_id=monitor_id,
                 file_path=save_path,
-                hash=img_hash
+                hash=self._format_hash(img_hash)
             )
             
             # Mettre en cache si activé
             if self.settings.perception.cache_screenshots:
                 self._capture_cache[img_hash] = capture
+                self._cache_popcounts[img_hash] = img_hash.bit_count()
                 
-                # Limiter la taille du cache
+                # Limiter la taille du cache (éviction LRU)
                 if len(self._capture_cache) > 100:
-                    oldest_key = next(iter(self._capture_cache))
-                    del self._capture_cache[oldest_key]
+                    evicted_key, _ = self._capture_cache.popitem(last=False)
+                    self._cache_popcounts.pop(evicted_key, None)
             
             duration = time.time() - start_time
             logger.debug(
@@ -179,10 +233,15 @@ class ScreenCaptureService:
         """
         captures = []
         
+        prefix = None
+        if save_dir:
+            self._ensure_dir(save_dir)
+            prefix = os.path.join(save_dir, "monitor_")
+        
         for i in range(len(self.monitors)):
             save_path = None
-            if save_dir:
-                save_path = f"{save_dir}/monitor_{i}_{int(time.time())}.png"
+            if prefix:
+                save_path = f"{prefix}{i}_{int(time.time())}.png"
             
             try:
                 capture = self.capture_screen(monitor_id=i, save_path=save_path)
@@ -247,25 +306,47 @@ class ScreenCaptureService:
         captures = []
         count = 0
         
+        # Préparer le répertoire et le préfixe une seule fois
+        prefix = None
+        if save_dir:
+            self._ensure_dir(save_dir)
+            prefix = os.path.join(save_dir, "capture_")
+        
         logger.info(f"Démarrage capture continue (intervalle: {interval}s)")
         
+        # Références locales pour alléger la boucle par frame
+        capture_screen = self.capture_screen
+        append_capture = captures.append
+        monotonic_ns = time.monotonic_ns
+        interval_ns = int(interval * 1_000_000_000)
+        next_tick = monotonic_ns()
+        
         try:
             while True:
                 if max_captures and count >= max_captures:
                     break
                 
                 save_path = None
-                if save_dir:
-                    save_path = f"{save_dir}/capture_{count:04d}_{int(time.time())}.png"
+                if prefix:
+                    save_path = f"{prefix}{count:04d}_{int(time.time())}.png"
                 
-                capture = self.capture_screen(save_path=save_path)
-                captures.append(capture)
+                append_capture(capture_screen(save_path=save_path))
                 count += 1
                 
                 if count % 10 == 0:
                     logger.info(f"Captures effectuées: {count}")
                 
-                time.sleep(interval)
+                # Cadence fixe: dormir jusqu'à ~0.5ms de l'échéance puis attente active
+                next_tick += interval_ns
+                remaining = next_tick - monotonic_ns()
+                if remaining <= 0:
+                    # En retard: repartir de maintenant plutôt que rattraper en rafale
+                    next_tick = monotonic_ns()
+                    continue
+                if remaining > SPIN_WAIT_NS:
+                    time.sleep((remaining - SPIN_WAIT_NS) / 1_000_000_000)
+                while monotonic_ns() < next_tick:
+                    pass
                 
         except KeyboardInterrupt:
             logger.info(f"Capture continue arrêtée après {count} captures")
@@ -312,6 +393,7 @@ class ScreenCaptureService:
     def clear_cache(self) -> None:
         """Vide le cache des captures."""
         self._capture_cache.clear()
+        self._cache_popcounts.clear()
         logger.info("Cache des captures vidé")
     
     def get_cache_stats(self) -> dict:
@@ -324,10 +406,56 @@ class ScreenCaptureService:
     
     # Méthodes privées
     
-    def _calculate_image_hash(self, img: Image.Image) -> str:
-        """Calcule un hash MD5 de l'image."""
-        img_bytes = img.tobytes()
-        return hashlib.md5(img_bytes).hexdigest()
+    def _ensure_dir(self, directory: str) -> None:
+        """Crée un répertoire une seule fois par instance."""
+        if directory and directory not in self._ensured_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._ensured_dirs.add(directory)
+    
+    def _calculate_image_hash(self, raw: "np.ndarray | Image.Image") -> int:
+        """
+        Calcule le hash de déduplication d'un buffer BGRA.
+        
+        Le hash exact (MD5) lit le buffer via memoryview, sans la copie
+        qu'impliquerait tobytes(). Le résultat est un entier pour que les
+        recherches dans le cache restent de simples hash d'entiers.
+        """
+        if not isinstance(raw, np.ndarray):
+            raw = np.asarray(raw)
+        if self.settings.perception.screenshot_hash == "perceptual":
+            return _average_hash(raw)
+        digest = hashlib.md5(memoryview(np.ascontiguousarray(raw))).digest()
+        return int.from_bytes(digest, "big")
+    
+    def _format_hash(self, img_hash: int) -> str:
+        """Formate un hash en hexadécimal pour ScreenCapture.hash."""
+        if self.settings.perception.screenshot_hash == "perceptual":
+            return f"{img_hash:016x}"
+        return f"{img_hash:032x}"
+    
+    def _find_cached_key(self, img_hash: int) -> Optional[int]:
+        """
+        Cherche une capture en cache correspondant au hash.
+        
+        En mode perceptuel avec une distance de Hamming tolérée, les entrées
+        dont le nombre de bits à 1 diffère de plus que la distance sont
+        écartées sans calculer le XOR.
+        """
+        if img_hash in self._capture_cache:
+            return img_hash
+        
+        max_distance = self.settings.perception.screenshot_hash_distance
+        if max_distance <= 0 or self.settings.perception.screenshot_hash != "perceptual":
+            return None
+        
+        popcount = img_hash.bit_count()
+        for key, key_popcount in self._cache_popcounts.items():
+            if abs(popcount - key_popcount) > max_distance:
+                continue
+            if (key ^ img_hash).bit_count() <= max_distance:
+                return key
+        
+        return None
     
     def _find_monitor_for_point(self, x: int, y: int) -> int:
         """Trouve le moniteur contenant un point."""
@@ -4,12 +4,13 @@ Package de planification pour Desktop Agent.
 Transforme les intentions en plans d'exécution avec guardrails de sécurité.
 """
 
-from .plan_generator import PlanGenerator
+from .plan_generator import LazyPlan, PlanGenerator
 from .guardrails import GuardrailsEngine
 from .planner_manager import PlannerManager
 
 __all__ = [
     "PlanGenerator",
+    "LazyPlan",
     "GuardrailsEngine",
     "PlannerManager"
 ]
\ No newline at end of file
@@ -4,7 +4,9 @@ Système de guardrails pour Desktop Agent.
 Fournit des vérifications de sécurité et des validations avant exécution.
 """
 
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
 
@@ -15,10 +17,16 @@ from ..common.models import Intent, IntentType, Plan
 
 logger = get_planner_logger()
 
+# Nombre de règles sans état au-delà duquel l'évaluation est parallélisée
+PARALLEL_RULES_THRESHOLD = 4
+
 
 class GuardrailRule:
     """Règle de guardrail."""
     
+    # Règle à état (historique...): toujours évaluée en série, dans l'ordre
+    stateful = False
+    
     def __init__(
         self,
         name: str,
@@ -245,6 +253,8 @@ class ContentSecurityRule(GuardrailRule):
 class RateLimitRule(GuardrailRule):
     """Règle de limitation de taux."""
     
+    stateful = True
+    
     def __init__(self):
         super().__init__(
             name="rate_limit",
@@ -291,8 +301,20 @@ class GuardrailsEngine:
         self._rules: List[GuardrailRule] = []
         self._initialize_rules()
         
+        # Pool partagé pour évaluer les règles en parallèle
+        self._pool = ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 1),
+            thread_name_prefix="guardrails"
+        )
+        
         logger.info(f"Moteur guardrails initialisé avec {len(self._rules)} règles")
     
+    def close(self) -> None:
+        """Arrête le pool d'évaluation des règles."""
+        self._pool.shutdown(wait=False)
+    
+    shutdown = close
+    
     def _initialize_rules(self) -> None:
         """Initialise les règles de guardrails."""
         self._rules = [
@@ -327,47 +349,39 @@ class GuardrailsEngine:
             }
             
             # Vérifier chaque règle applicable
-            for rule in self._rules:
-                if self._is_rule_applicable(rule, plan):
-                    try:
-                        rule_result = rule.check(plan, context)
-                        
-                        rule_info = {
-                            "rule_name": rule.name,
-                            "description": rule.description,
-                            "severity": rule.severity,
-                            "passed": rule_result["passed"],
-                            "message": rule_result["message"],
-                            "details": rule_result.get("details", {})
-                        }
-                        
-                        results["rule_results"].append(rule_info)
-                        
-                        # Catégoriser le résultat
-                        if not rule_result["passed"]:
-                            if rule.severity in ["error", "critical"]:
-                                results["errors"].append(rule_info)
-                                results["overall_passed"] = False
-                                if rule.severity == "critical":
-                                    results["can_execute"] = False
-                            elif rule.severity == "warning":
-                                results["warnings"].append(rule_info)
-                                results["requires_confirmation"] = True
-                            else:
-                                results["info"].append(rule_info)
-                        
-                    except Exception as e:
-                        logger.error(f"Erreur vérification règle {rule.name}: {e}")
-                        error_info = {
-                            "rule_name": rule.name,
-                            "severity": "error",
-                            "passed": False,
-                            "message": f"Erreur vérification: {e}",
-                            "details": {"exception": str(e)}
-                        }
-                        results["rule_results"].append(error_info)
-                        results["errors"].append(error_info)
+            applicable = [rule for rule in self._rules if self._is_rule_applicable(rule, plan)]
+            
+            # Seules les règles sans état, assez nombreuses, passent par le pool;
+            # les règles à état sont évaluées en série dans ce thread
+            stateless = [rule for rule in applicable if not rule.stateful]
+            if len(stateless) > PARALLEL_RULES_THRESHOLD:
+                parallel_infos = dict(zip(map(id, stateless), self._pool.map(
+                    lambda rule: self._evaluate_rule(rule, plan, context), stateless
+                )))
+            else:
+                parallel_infos = {}
+            
+            rule_infos = (
+                parallel_infos.get(id(rule)) or self._evaluate_rule(rule, plan, context)
+                for rule in applicable
+            )
+            
+            for rule_info in rule_infos:
+                results["rule_results"].append(rule_info)
+                
+                # Catégoriser le résultat
+                if not rule_info["passed"]:
+                    severity = rule_info["severity"]
+                    if severity in ["error", "critical"]:
+                        results["errors"].append(rule_info)
                         results["overall_passed"] = False
+                        if severity == "critical":
+                            results["can_execute"] = False
+                    elif severity == "warning":
+                        results["warnings"].append(rule_info)
+                        results["requires_confirmation"] = True
+                    else:
+                        results["info"].append(rule_info)
             
             # Résumé final
             logger.info(
@@ -391,6 +405,35 @@ class GuardrailsEngine:
                 "info": []
             }
     
+    def _evaluate_rule(
+        self,
+        rule: GuardrailRule,
+        plan: Plan,
+        context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Évalue une règle et retourne ses informations de résultat."""
+        try:
+            rule_result = rule.check(plan, context)
+            
+            return {
+                "rule_name": rule.name,
+                "description": rule.description,
+                "severity": rule.severity,
+                "passed": rule_result["passed"],
+                "message": rule_result["message"],
+                "details": rule_result.get("details", {})
+            }
+            
+        except Exception as e:
+            logger.error(f"Erreur vérification règle {rule.name}: {e}")
+            return {
+                "rule_name": rule.name,
+                "severity": "error",
+                "passed": False,
+                "message": f"Erreur vérification: {e}",
+                "details": {"exception": str(e)}
+            }
+    
     def _is_rule_applicable(self, rule: GuardrailRule, plan: Plan) -> bool:
         """Vérifie si une règle s'applique à un plan."""
         if not rule.applies_to:
@@ -4,9 +4,24 @@ Générateur de plans pour Desktop Agent.
 Convertit les intentions en séquences d'actions exécutables.
 """
 
-from typing import Any, Dict, List, Optional
+import re
+import sys
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Mapping, Optional, Tuple, Union
 from uuid import uuid4
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 from ..common.config import get_settings
 from ..common.errors import PlanGenerationError, PlannerError
 from ..common.logging_utils import get_planner_logger
@@ -15,10 +30,216 @@ from ..skills import SkillManager
 
 logger = get_planner_logger()
 
+# Nombre d'actions à partir duquel la durée est recalculée de façon vectorisée
+VECTORIZED_DURATION_THRESHOLD = 64
+
+# Placeholders de slots dans les templates, ex: "{app_name}"
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+# Seuil sous lequel une attente précédant une action idempotente est superflue
+SHORT_WAIT_THRESHOLD = 0.5
+
+# Actions primitives idempotentes: insensibles au timing de l'action précédente.
+# SCREENSHOT n'en fait pas partie: l'attente qui la précède laisse l'UI se stabiliser
+_IDEMPOTENT_ACTIONS = frozenset({
+    ActionType.MOVE_MOUSE,
+})
+
+# Actions qui conservent l'application au premier plan
+_FOCUS_PRESERVING_ACTIONS = frozenset({
+    ActionType.SCREENSHOT,
+    ActionType.MOVE_MOUSE,
+    ActionType.WAIT,
+    ActionType.TYPE_TEXT,
+    ActionType.SCROLL,
+})
+
+
+# Constructeurs de résumés par type d'intention: seul celui du plan est évalué
+_SUMMARY_BUILDERS: Dict[IntentType, Callable[[Intent], str]] = {
+    IntentType.OPEN_APP: lambda i: f"Ouvrir l'application {i.slots.get('app_name', 'inconnue')}",
+    IntentType.FOCUS_APP: lambda i: f"Mettre le focus sur {i.slots.get('app_name', 'inconnue')}",
+    IntentType.CLICK_TEXT: lambda i: f"Cliquer sur '{i.slots.get('text', 'texte')}'",
+    IntentType.TYPE_TEXT: lambda i: f"Saisir le texte: {i.slots.get('text', '')[:50]}...",
+    IntentType.SAVE_FILE: lambda i: "Sauvegarder le fichier actuel",
+    IntentType.WEB_SEARCH: lambda i: f"Rechercher '{i.slots.get('query', 'requête')}' sur Google",
+    IntentType.WRITE_TEXT_FILE: lambda i: "Créer un fichier texte avec le contenu spécifié"
+}
+
+
+def _substitute_placeholders(text: str, slots: Dict[str, Any]) -> str:
+    """Remplace les placeholders connus par la valeur des slots en une passe."""
+    if "{" not in text:
+        return text
+    return _PLACEHOLDER_RE.sub(
+        lambda match: str(slots[match.group(1)]) if match.group(1) in slots else match.group(0),
+        text
+    )
+
+
+# Marqueur de fin de chemin autorisé dans le trie des chemins
+_END = object()
+
+
+def _build_path_trie(paths: Tuple[Path, ...]) -> Dict[Any, Any]:
+    """Construit un trie des composants des chemins autorisés."""
+    trie: Dict[Any, Any] = {}
+    for path in paths:
+        node = trie
+        for part in path.parts:
+            node = node.setdefault(part, {})
+        node[_END] = True
+    return trie
+
+
+def _path_has_allowed_prefix(trie: Dict[Any, Any], path: Path) -> bool:
+    """Indique si un préfixe du chemin figure dans le trie, en O(profondeur)."""
+    node = trie
+    if _END in node:
+        return True
+    for part in path.parts:
+        node = node.get(part)
+        if node is None:
+            return False
+        if _END in node:
+            return True
+    return False
+
+
+def _compile_template_builder(template: "PlanTemplate") -> Callable[..., List[Action]]:
+    """
+    Génère une fonction spécialisée construisant les actions d'un template.
+    
+    Les types et descriptions constantes sont figés dans le code généré;
+    seuls les placeholders et la résolution des compétences restent dynamiques.
+    
+    Args:
+        template: Template à spécialiser
+        
+    Returns:
+        Fonction build(slots, get_skill_info) -> List[Action]
+    """
+    namespace: Dict[str, Any] = {
+        "Action": Action,
+        "ActionType": ActionType,
+        "_sub": _substitute_placeholders,
+    }
+    lines = ["def build(slots, get_skill_info):", "    actions = []"]
+    
+    columns = zip(
+        template.skills,
+        template.types,
+        template.params,
+        template.descriptions,
+        template.placeholder_keys
+    )
+    
+    for i, (skill, action_type, parameters, description, placeholder_keys) in enumerate(columns):
+        namespace[f"_P{i}"] = parameters
+        
+        if "{" in description:
+            desc_expr = f"_sub({description!r}, slots)"
+        else:
+            desc_expr = repr(description)
+        
+        if skill or placeholder_keys:
+            lines.append(f"    params = dict(_P{i})")
+            for key in placeholder_keys:
+                lines.append(f"    params[{key!r}] = _sub(params[{key!r}], slots)")
+            params_expr = "params"
+        else:
+            params_expr = f"_P{i}"
+        
+        if skill:
+            lines.append(f"    if get_skill_info({skill!r}):")
+            lines.append("        params.update(slots)")
+            lines.append(
+                f"    actions.append(Action(type=ActionType.SCREENSHOT, "
+                f"parameters={{'skill_name': {skill!r}, 'skill_parameters': params}}, "
+                f"description={desc_expr}))"
+            )
+        else:
+            lines.append(
+                f"    actions.append(Action(type=ActionType.{action_type.name}, "
+                f"parameters={params_expr}, description={desc_expr}))"
+            )
+    
+    lines.append("    return actions")
+    
+    code = compile("\n".join(lines), f"<builder-{template.intent_type.name}>", "exec")
+    exec(code, namespace)
+    return namespace["build"]
+
+
+@dataclass(frozen=True, slots=True)
+class ActionDef:
+    """Définition figée d'une action de template, pré-analysée à l'initialisation."""
+    kind: str  # "skill" ou "primitive"
+    skill: Optional[str]
+    action_type: Optional[ActionType]
+    parameters: Mapping[str, Any]
+    description: str
+    desc_has_placeholder: bool
+    param_placeholder_keys: Tuple[str, ...]
+    valid: bool = True
+    
+    @classmethod
+    def from_dict(cls, action_def: Dict[str, Any]) -> "ActionDef":
+        """
+        Construit une définition figée à partir d'un dictionnaire de template.
+        
+        Les définitions incohérentes (type inconnu, description absente) ne
+        lèvent pas d'exception: elles sont marquées invalides et écartées une
+        fois pour toutes à la construction du template.
+        """
+        parameters = dict(action_def.get("parameters", {}))
+        description = action_def.get("description")
+        skill = action_def.get("skill")
+        
+        action_type = None
+        valid = isinstance(description, str)
+        if not skill:
+            try:
+                action_type = ActionType(action_def.get("type"))
+            except ValueError:
+                valid = False
+        
+        # Chaînes internées: comparaisons par identité et partage mémoire
+        description = sys.intern(description) if isinstance(description, str) else ""
+        if isinstance(skill, str):
+            skill = sys.intern(skill)
+        
+        return cls(
+            kind="skill" if skill else "primitive",
+            skill=skill,
+            action_type=action_type,
+            parameters=MappingProxyType(parameters),
+            description=description,
+            desc_has_placeholder=_PLACEHOLDER_RE.search(description) is not None,
+            param_placeholder_keys=tuple(
+                key for key, value in parameters.items()
+                if isinstance(value, str) and _PLACEHOLDER_RE.search(value)
+            ),
+            valid=valid
+        )
+
 
 class PlanTemplate:
     """Template pour générer un plan à partir d'une intention."""
     
+    __slots__ = (
+        "intent_type",
+        "actions",
+        "skills",
+        "types",
+        "params",
+        "descriptions",
+        "placeholder_keys",
+        "requires_confirmation",
+        "estimated_duration",
+        "risk_level"
+    )
+    
     def __init__(
         self,
         intent_type: IntentType,
@@ -28,10 +249,95 @@ class PlanTemplate:
         risk_level: str = "low"
     ):
         self.intent_type = intent_type
-        self.actions = actions
+        self.actions: Tuple[ActionDef, ...] = tuple(
+            ActionDef.from_dict(action_def) for action_def in actions
+        )
+        
+        for i, action_def in enumerate(self.actions):
+            if not action_def.valid:
+                logger.warning(f"Action {i} invalide ignorée dans le template {intent_type.value}")
+        
+        # Colonnes parallèles (SoA) des actions valides, parcourues à l'expansion
+        valid_actions = [a for a in self.actions if a.valid]
+        self.skills: Tuple[Optional[str], ...] = tuple(a.skill for a in valid_actions)
+        self.types: Tuple[Optional[ActionType], ...] = tuple(a.action_type for a in valid_actions)
+        self.params: Tuple[Mapping[str, Any], ...] = tuple(a.parameters for a in valid_actions)
+        self.descriptions: Tuple[str, ...] = tuple(a.description for a in valid_actions)
+        self.placeholder_keys: Tuple[Tuple[str, ...], ...] = tuple(
+            a.param_placeholder_keys for a in valid_actions
+        )
+        
+        self.requires_confirmation = requires_confirmation
+        self.estimated_duration = estimated_duration
+        self.risk_level = risk_level
+
+
+class LazyPlan:
+    """
+    Plan dont les actions ne sont construites qu'au premier accès.
+    
+    Les métadonnées (résumé, durée, confirmation) proviennent du template;
+    un plan refusé ou abandonné n'instancie donc jamais ses actions.
+    """
+    
+    __slots__ = (
+        "id",
+        "intent",
+        "summary",
+        "requires_confirmation",
+        "estimated_duration",
+        "risk_level",
+        "_build_actions",
+        "_actions"
+    )
+    
+    def __init__(
+        self,
+        intent: Intent,
+        build_actions: Callable[[], List[Action]],
+        summary: str,
+        requires_confirmation: bool,
+        estimated_duration: float,
+        risk_level: str
+    ):
+        self.id = str(uuid4())
+        self.intent = intent
+        self.summary = summary
         self.requires_confirmation = requires_confirmation
         self.estimated_duration = estimated_duration
         self.risk_level = risk_level
+        self._build_actions = build_actions
+        self._actions: Optional[List[Action]] = None
+    
+    @property
+    def is_materialized(self) -> bool:
+        """Indique si les actions ont déjà été construites."""
+        return self._actions is not None
+    
+    @property
+    def actions(self) -> List[Action]:
+        """Actions du plan, construites au premier accès."""
+        if self._actions is None:
+            self._actions = self._build_actions()
+            self._build_actions = None
+        return self._actions
+    
+    def materialize(self) -> Plan:
+        """
+        Construit le plan complet.
+        
+        Returns:
+            Plan d'exécution avec ses actions
+        """
+        return Plan(
+            id=self.id,
+            intent=self.intent,
+            actions=self.actions,
+            summary=self.summary,
+            requires_confirmation=self.requires_confirmation,
+            estimated_duration=self.estimated_duration,
+            risk_level=self.risk_level
+        )
 
 
 class PlanGenerator:
@@ -42,6 +348,30 @@ class PlanGenerator:
         self.skill_manager = skill_manager
         self._templates = self._initialize_templates()
         
+        # Constructeurs d'actions spécialisés par type d'intention
+        self._compiled_builders: Dict[IntentType, Callable[..., List[Action]]] = {
+            intent_type: _compile_template_builder(template)
+            for intent_type, template in self._templates.items()
+        }
+        
+        # Chemins d'écriture autorisés, résolus une seule fois et indexés en trie
+        self._allowed_write_paths: Tuple[Path, ...] = tuple(
+            Path(p).expanduser().resolve()
+            for p in self.settings.security.allowed_write_paths
+        )
+        self._allowed_paths_trie = _build_path_trie(self._allowed_write_paths)
+        
+        # Informations de compétences, statiques sur une session
+        self._skill_info_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Cache LRU de plans prototypes par (type d'intention, slots); appelé
+        # depuis les threads du PlannerManager, d'où le verrou
+        self._plan_cache: OrderedDict[Tuple[IntentType, Hashable], Plan] = OrderedDict()
+        self._plan_cache_lock = threading.Lock()
+        
+        # Version du registre de compétences ayant servi à remplir les caches
+        self._skill_registry_version = getattr(skill_manager, "registry_version", None)
+        
         logger.info("Générateur de plans initialisé")
     
     def _initialize_templates(self) -> Dict[IntentType, PlanTemplate]:
@@ -194,38 +524,46 @@ class PlanGenerator:
         try:
             logger.info(f"Génération plan pour intention: {intent.type.value}")
             
+            registry_version = self._sync_skill_registry()
+            
+            # Réutiliser un plan prototype si la même intention a déjà été planifiée
+            cache_key = self._plan_cache_key(intent)
+            if cache_key is not None:
+                with self._plan_cache_lock:
+                    cached_plan = self._plan_cache.get(cache_key)
+                    if cached_plan is not None:
+                        self._plan_cache.move_to_end(cache_key)
+                if cached_plan is not None:
+                    logger.info(f"Plan trouvé en cache pour {intent.type.value}")
+                    return cached_plan.model_copy(
+                        update={"id": str(uuid4()), "intent": intent},
+                        deep=True
+                    )
+            
             # Récupérer le template approprié
             template = self._templates.get(intent.type)
             if not template:
                 raise PlanGenerationError(f"Pas de template pour {intent.type.value}")
             
-            # Générer les actions à partir du template
-            actions = self._generate_actions_from_template(template, intent.slots, context)
-            
-            # Créer le résumé du plan
-            summary = self._generate_plan_summary(intent, actions)
+            # Construire le plan à partir du template
+            plan = self._build_plan(intent, template, context)
             
-            # Déterminer si confirmation nécessaire
-            requires_confirmation = self._should_require_confirmation(template, intent.slots)
-            
-            # Ajuster la durée estimée
-            estimated_duration = self._estimate_duration(template, intent.slots)
-            
-            # Créer le plan
-            plan = Plan(
-                intent=intent,
-                actions=actions,
-                summary=summary,
-                requires_confirmation=requires_confirmation,
-                estimated_duration=estimated_duration,
-                risk_level=template.risk_level
-            )
+            if cache_key is not None:
+                prototype = plan.model_copy(deep=True)
+                with self._plan_cache_lock:
+                    # Plan construit pendant un changement de registre: non caché
+                    if getattr(self.skill_manager, "registry_version", None) == registry_version:
+                        self._plan_cache[cache_key] = prototype
+                        self._plan_cache.move_to_end(cache_key)
+                        while len(self._plan_cache) > self.settings.planner.plan_cache_size:
+                            self._plan_cache.popitem(last=False)
             
             logger.info(
-                f"Plan généré: {len(actions)} actions, durée estimée: {estimated_duration:.1f}s",
-                actions_count=len(actions),
-                estimated_duration=estimated_duration,
-                requires_confirmation=requires_confirmation
+                f"Plan généré: {len(plan.actions)} actions, "
+                f"durée estimée: {plan.estimated_duration:.1f}s",
+                actions_count=len(plan.actions),
+                estimated_duration=plan.estimated_duration,
+                requires_confirmation=plan.requires_confirmation
             )
             
             return plan
@@ -234,110 +572,310 @@ class PlanGenerator:
             logger.error(f"Erreur génération plan pour {intent.type.value}: {e}")
             raise PlanGenerationError(f"Erreur génération plan: {e}")
     
+    def generate_plans_bulk(
+        self,
+        intents: List[Intent],
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[Plan]:
+        """
+        Génère les plans d'un lot d'intentions.
+        
+        Les intentions sont regroupées par type pour ne résoudre chaque
+        template qu'une fois. Les plans sont retournés dans l'ordre d'entrée.
+        
+        Args:
+            intents: Intentions à planifier
+            context: Contexte d'exécution optionnel
+            
+        Returns:
+            Plans d'exécution, dans l'ordre des intentions
+            
+        Raises:
+            PlanGenerationError: Si un plan ne peut pas être généré
+        """
+        groups: Dict[IntentType, List[Tuple[int, Intent]]] = defaultdict(list)
+        for index, intent in enumerate(intents):
+            groups[intent.type].append((index, intent))
+        
+        self._sync_skill_registry()
+        
+        plans: List[Optional[Plan]] = [None] * len(intents)
+        build_plan = self._build_plan
+        
+        for intent_type, members in groups.items():
+            template = self._templates.get(intent_type)
+            if not template:
+                raise PlanGenerationError(f"Pas de template pour {intent_type.value}")
+            
+            try:
+                for index, intent in members:
+                    plans[index] = build_plan(intent, template, context)
+            except Exception as e:
+                logger.error(f"Erreur génération plans pour {intent_type.value}: {e}")
+                raise PlanGenerationError(f"Erreur génération plan: {e}")
+        
+        logger.info(
+            f"Plans générés en lot: {len(intents)} intentions, {len(groups)} types",
+            intents_count=len(intents),
+            groups_count=len(groups)
+        )
+        
+        return plans
+    
+    def generate_lazy_plan(
+        self,
+        intent: Intent,
+        context: Optional[Dict[str, Any]] = None
+    ) -> LazyPlan:
+        """
+        Génère un plan dont les actions sont construites à la demande.
+        
+        Args:
+            intent: Intention à planifier
+            context: Contexte d'exécution optionnel
+            
+        Returns:
+            Plan paresseux, à matérialiser avant exécution
+            
+        Raises:
+            PlanGenerationError: Si aucun template ne correspond à l'intention
+        """
+        template = self._templates.get(intent.type)
+        if not template:
+            raise PlanGenerationError(f"Pas de template pour {intent.type.value}")
+        
+        self._sync_skill_registry()
+        slots = intent.slots
+        
+        return LazyPlan(
+            intent=intent,
+            build_actions=lambda: self._generate_actions_from_template(template, slots, context),
+            summary=self._generate_plan_summary(intent, len(template.skills)),
+            requires_confirmation=self._should_require_confirmation(template, slots),
+            estimated_duration=self._estimate_duration(template, slots),
+            risk_level=template.risk_level
+        )
+    
+    def _build_plan(
+        self,
+        intent: Intent,
+        template: PlanTemplate,
+        context: Optional[Dict[str, Any]]
+    ) -> Plan:
+        """Construit un plan pour une intention à partir de son template."""
+        # Générer les actions à partir du template
+        actions = self._generate_actions_from_template(template, intent.slots, context)
+        
+        # Créer le résumé du plan
+        summary = self._generate_plan_summary(intent, len(actions))
+        
+        # Déterminer si confirmation nécessaire
+        requires_confirmation = self._should_require_confirmation(template, intent.slots)
+        
+        # Ajuster la durée estimée
+        estimated_duration = self._estimate_duration(template, intent.slots)
+        
+        return Plan(
+            intent=intent,
+            actions=actions,
+            summary=summary,
+            requires_confirmation=requires_confirmation,
+            estimated_duration=estimated_duration,
+            risk_level=template.risk_level
+        )
+    
+    def register_template(self, template: PlanTemplate) -> None:
+        """
+        Enregistre ou remplace le template d'un type d'intention.
+        
+        Args:
+            template: Template à enregistrer
+        """
+        self._templates[template.intent_type] = template
+        
+        # Les templates dynamiques passent par l'interpréteur générique
+        self._compiled_builders.pop(template.intent_type, None)
+        self.clear_plan_cache()
+        logger.info(f"Template enregistré pour {template.intent_type.value}")
+    
+    def clear_plan_cache(self) -> None:
+        """Vide le cache des plans prototypes."""
+        with self._plan_cache_lock:
+            self._plan_cache.clear()
+    
+    def invalidate_skill_cache(self) -> None:
+        """Invalide le cache des informations de compétences (rechargement des skills)."""
+        with self._plan_cache_lock:
+            self._skill_info_cache.clear()
+            self._plan_cache.clear()
+    
+    def _sync_skill_registry(self) -> Optional[int]:
+        """
+        Invalide les caches si une compétence a été (dés)enregistrée.
+        
+        Les plans cachés dépendent des compétences disponibles (paramètres
+        transmis aux compétences), comme les informations mémorisées.
+        
+        Returns:
+            Version du registre à laquelle les caches correspondent
+        """
+        version = getattr(self.skill_manager, "registry_version", None)
+        if version == self._skill_registry_version:
+            return version
+        
+        with self._plan_cache_lock:
+            if version != self._skill_registry_version:
+                self._skill_info_cache.clear()
+                self._plan_cache.clear()
+                self._skill_registry_version = version
+                logger.info("Registre de compétences modifié: caches de plans invalidés")
+        
+        return version
+    
+    def _get_skill_info(self, skill_name: str) -> Optional[Dict[str, Any]]:
+        """Retourne les informations d'une compétence, mémorisées par nom."""
+        try:
+            return self._skill_info_cache[skill_name]
+        except KeyError:
+            skill_info = self.skill_manager.get_skill_info(skill_name)
+            # Compétence inconnue non mémorisée: elle peut être enregistrée plus tard
+            if skill_info is not None:
+                self._skill_info_cache[skill_name] = skill_info
+            return skill_info
+    
+    def _plan_cache_key(self, intent: Intent) -> Optional[Tuple[IntentType, Hashable]]:
+        """Construit la clé de cache d'une intention, ou None si non cachable."""
+        if not self.settings.planner.plan_cache_enabled:
+            return None
+        
+        try:
+            slots_key = tuple(sorted(intent.slots.items()))
+            hash(slots_key)
+        except TypeError:
+            # Slots non hashables ou non comparables: pas de cache
+            return None
+        
+        return (intent.type, slots_key)
+    
     def _generate_actions_from_template(
         self,
         template: PlanTemplate,
         slots: Dict[str, Any],
         context: Optional[Dict[str, Any]]
     ) -> List[Action]:
-        """Génère les actions à partir d'un template."""
+        """
+        Génère les actions à partir d'un template.
+        
+        Utilise le constructeur spécialisé du type d'intention s'il existe,
+        sinon l'interpréteur générique.
+        """
+        builder = self._compiled_builders.get(template.intent_type)
+        if builder is None or self._templates.get(template.intent_type) is not template:
+            return self._interpret_template(template, slots, context)
+        
+        try:
+            return builder(slots, self._get_skill_info)
+        except Exception as e:
+            raise PlanGenerationError(f"Erreur traitement actions: {e}")
+    
+    def _interpret_template(
+        self,
+        template: PlanTemplate,
+        slots: Dict[str, Any],
+        context: Optional[Dict[str, Any]]
+    ) -> List[Action]:
+        """
+        Interprète les colonnes d'un template pour générer ses actions.
+        
+        Les définitions invalides ont été écartées à la construction du
+        template; une erreur ici est donc dynamique (slots) et fait échouer
+        la génération plutôt que de produire un plan incomplet.
+        """
         actions = []
+        columns = zip(
+            template.skills,
+            template.types,
+            template.params,
+            template.descriptions,
+            template.placeholder_keys
+        )
         
-        for i, action_def in enumerate(template.actions):
-            try:
+        try:
+            for skill, action_type, parameters, description, placeholder_keys in columns:
                 # Substituer les paramètres avec les slots
-                processed_action = self._process_action_definition(action_def, slots, context)
+                description, parameters = self._process_action_definition(
+                    skill, parameters, description, placeholder_keys, slots, context
+                )
                 
                 # Créer l'objet Action
-                if "skill" in processed_action:
+                if skill:
                     # Action basée sur une compétence
-                    action = Action(
+                    actions.append(Action(
                         type=ActionType.SCREENSHOT,  # Placeholder, sera déterminé par le skill
                         parameters={
-                            "skill_name": processed_action["skill"],
-                            "skill_parameters": processed_action.get("parameters", {})
+                            "skill_name": skill,
+                            "skill_parameters": parameters
                         },
-                        description=processed_action["description"]
-                    )
+                        description=description
+                    ))
                 else:
                     # Action primitive
-                    action = Action(
-                        type=ActionType(processed_action["type"]),
-                        parameters=processed_action.get("parameters", {}),
-                        description=processed_action["description"]
-                    )
-                
-                actions.append(action)
+                    actions.append(Action(
+                        type=action_type,
+                        parameters=parameters,
+                        description=description
+                    ))
                 
-            except Exception as e:
-                logger.warning(f"Erreur traitement action {i}: {e}")
-                continue
+        except Exception as e:
+            raise PlanGenerationError(f"Erreur traitement action {len(actions)}: {e}")
         
         return actions
     
     def _process_action_definition(
         self,
-        action_def: Dict[str, Any],
+        skill: Optional[str],
+        parameters: Mapping[str, Any],
+        description: str,
+        placeholder_keys: Tuple[str, ...],
         slots: Dict[str, Any],
         context: Optional[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        """Traite une définition d'action en substituant les paramètres."""
-        processed = action_def.copy()
+    ) -> Tuple[str, Mapping[str, Any]]:
+        """
+        Traite une définition d'action en substituant les paramètres.
         
+        Returns:
+            Tuple (description, paramètres) prêts pour construire l'Action
+        """
         # Substituer dans la description
-        if "description" in processed:
-            description = processed["description"]
-            for key, value in slots.items():
-                placeholder = f"{{{key}}}"
-                if placeholder in description:
-                    description = description.replace(placeholder, str(value))
-            processed["description"] = description
-        
-        # Substituer dans les paramètres
-        if "parameters" in processed:
-            parameters = processed["parameters"].copy()
-            for param_key, param_value in parameters.items():
-                if isinstance(param_value, str):
-                    for slot_key, slot_value in slots.items():
-                        placeholder = f"{{{slot_key}}}"
-                        if placeholder in param_value:
-                            param_value = param_value.replace(placeholder, str(slot_value))
-                    parameters[param_key] = param_value
-            processed["parameters"] = parameters
+        description = _substitute_placeholders(description, slots)
+        
+        # Copie sur écriture: une seule copie, uniquement si les paramètres
+        # sont modifiés (placeholders) ou transmis à une compétence
+        if placeholder_keys or skill:
+            parameters = dict(parameters)
+        
+        for param_key in placeholder_keys:
+            parameters[param_key] = _substitute_placeholders(parameters[param_key], slots)
         
         # Ajouter les slots comme paramètres si c'est une compétence
-        if "skill" in processed:
-            if "parameters" not in processed:
-                processed["parameters"] = {}
-            
+        if skill:
             # Mapper les slots aux paramètres de compétence
-            skill_name = processed["skill"]
-            skill_info = self.skill_manager.get_skill_info(skill_name)
+            skill_info = self._get_skill_info(skill)
             
             if skill_info:
                 # Ajouter les slots pertinents
-                for slot_key, slot_value in slots.items():
-                    processed["parameters"][slot_key] = slot_value
+                parameters.update(slots)
         
-        return processed
+        return description, parameters
     
-    def _generate_plan_summary(self, intent: Intent, actions: List[Action]) -> str:
+    def _generate_plan_summary(self, intent: Intent, actions_count: int) -> str:
         """Génère un résumé lisible du plan."""
-        summaries = {
-            IntentType.OPEN_APP: f"Ouvrir l'application {intent.slots.get('app_name', 'inconnue')}",
-            IntentType.FOCUS_APP: f"Mettre le focus sur {intent.slots.get('app_name', 'inconnue')}",
-            IntentType.CLICK_TEXT: f"Cliquer sur '{intent.slots.get('text', 'texte')}'",
-            IntentType.TYPE_TEXT: f"Saisir le texte: {intent.slots.get('text', '')[:50]}...",
-            IntentType.SAVE_FILE: "Sauvegarder le fichier actuel",
-            IntentType.WEB_SEARCH: f"Rechercher '{intent.slots.get('query', 'requête')}' sur Google",
-            IntentType.WRITE_TEXT_FILE: f"Créer un fichier texte avec le contenu spécifié"
-        }
-        
-        base_summary = summaries.get(intent.type, f"Exécuter {intent.type.value}")
+        builder = _SUMMARY_BUILDERS.get(intent.type)
+        base_summary = builder(intent) if builder else f"Exécuter {intent.type.value}"
         
         # Ajouter le nombre d'étapes
-        if len(actions) > 1:
-            base_summary += f" (en {len(actions)} étapes)"
+        if actions_count > 1:
+            base_summary += f" (en {actions_count} étapes)"
         
         return base_summary
     
@@ -359,17 +897,10 @@ class PlanGenerator:
             path = slots.get("path", "")
             if path:
                 # Confirmation si écriture hors des chemins autorisés
-                from pathlib import Path
                 try:
                     path_obj = Path(path).resolve()
-                    allowed_paths = [Path(p).expanduser().resolve() for p in security_config.allowed_write_paths]
                     
-                    is_allowed = any(
-                        str(path_obj).startswith(str(allowed_path))
-                        for allowed_path in allowed_paths
-                    )
-                    
-                    if not is_allowed:
+                    if not _path_has_allowed_prefix(self._allowed_paths_trie, path_obj):
                         return True
                         
                 except Exception:
@@ -383,12 +914,12 @@ class PlanGenerator:
         base_duration = template.estimated_duration
         
         # Ajustements selon les slots
-        if template.intent_type == IntentType.TYPE_TEXT:
+        if template.intent_type is IntentType.TYPE_TEXT:
             text = slots.get("text", "")
             # Ajouter du temps proportionnel à la longueur du texte
             base_duration += len(text) * 0.01  # 10ms par caractère
         
-        elif template.intent_type == IntentType.WRITE_TEXT_FILE:
+        elif template.intent_type is IntentType.WRITE_TEXT_FILE:
             content = slots.get("content", "")
             base_duration += len(content) * 0.01
             
@@ -398,7 +929,7 @@ class PlanGenerator:
         
         return base_duration
     
-    def optimize_plan(self, plan: Plan, context: Optional[Dict[str, Any]] = None) -> Plan:
+    def optimize_plan(self, plan: Union[Plan, LazyPlan], context: Optional[Dict[str, Any]] = None) -> Plan:
         """
         Optimise un plan existant.
         
@@ -409,18 +940,11 @@ class PlanGenerator:
         Returns:
             Plan optimisé
         """
+        if isinstance(plan, LazyPlan):
+            plan = plan.materialize()
+        
         try:
-            optimized_actions = []
-            
-            # Supprimer les actions redondantes
-            for action in plan.actions:
-                # Éviter les captures d'écran consécutives
-                if (action.type == ActionType.SCREENSHOT and 
-                    optimized_actions and 
-                    optimized_actions[-1].type == ActionType.SCREENSHOT):
-                    continue
-                
-                optimized_actions.append(action)
+            optimized_actions = self._prune_actions(plan.actions)
             
             # Fusionner les actions de même type si possible
             merged_actions = self._merge_similar_actions(optimized_actions)
@@ -448,50 +972,96 @@ class PlanGenerator:
             logger.warning(f"Erreur optimisation plan: {e}")
             return plan
     
-    def _merge_similar_actions(self, actions: List[Action]) -> List[Action]:
-        """Fusionne les actions similaires."""
-        if len(actions) <= 1:
-            return actions
+    def _prune_actions(self, actions: List[Action]) -> List[Action]:
+        """
+        Élague les actions redondantes en une seule passe.
         
-        merged = []
-        i = 0
+        Seules les suppressions sans effet sur la sémantique du plan sont
+        appliquées: captures d'écran consécutives, attentes courtes suivies
+        d'une action idempotente et focus répété sur l'application déjà active.
+        """
+        pruned: List[Action] = []
+        last_app: Optional[str] = None
         
-        while i < len(actions):
-            current_action = actions[i]
+        for action in actions:
+            skill_name = action.parameters.get("skill_name")
             
-            # Chercher des actions similaires consécutives
-            if (i + 1 < len(actions) and 
-                current_action.type == ActionType.TYPE_TEXT and
-                actions[i + 1].type == ActionType.TYPE_TEXT):
+            if skill_name is None:
+                # Une attente courte n'a pas d'effet sur une action idempotente
+                if (action.type in _IDEMPOTENT_ACTIONS and
+                        pruned and
+                        pruned[-1].type is ActionType.WAIT and
+                        pruned[-1].parameters.get("duration", 1.0) < SHORT_WAIT_THRESHOLD):
+                    pruned.pop()
                 
-                # Fusionner les actions de saisie de texte
-                combined_text = (
-                    current_action.parameters.get("text", "") + 
-                    actions[i + 1].parameters.get("text", "")
-                )
+                # Éviter les captures d'écran consécutives (vérifié après toute
+                # suppression, qui peut rendre deux actions adjacentes)
+                if (action.type is ActionType.SCREENSHOT and
+                        pruned and
+                        pruned[-1].type is ActionType.SCREENSHOT and
+                        "skill_name" not in pruned[-1].parameters):
+                    continue
                 
-                merged_action = Action(
-                    type=ActionType.TYPE_TEXT,
-                    parameters={"text": combined_text},
-                    description=f"Saisie combinée de texte ({len(combined_text)} caractères)"
-                )
+                if action.type not in _FOCUS_PRESERVING_ACTIONS:
+                    last_app = None
+            
+            elif skill_name in ("open_app", "focus_app"):
+                app_name = action.parameters.get("skill_parameters", {}).get("app_name")
                 
-                merged.append(merged_action)
-                i += 2  # Ignorer l'action suivante
+                # Focus redondant sur l'application déjà au premier plan
+                if skill_name == "focus_app" and app_name is not None and app_name == last_app:
+                    continue
+                
+                last_app = app_name
+            
             else:
-                merged.append(current_action)
-                i += 1
+                last_app = None
+            
+            pruned.append(action)
+        
+        return pruned
+    
+    def _merge_similar_actions(self, actions: List[Action]) -> List[Action]:
+        """Fusionne les séquences consécutives d'actions similaires."""
+        if len(actions) <= 1:
+            return actions
+        
+        merged = []
+        
+        for action_type, group in groupby(actions, key=attrgetter("type")):
+            if action_type is not ActionType.TYPE_TEXT:
+                merged.extend(group)
+                continue
+            
+            text_actions = list(group)
+            if len(text_actions) == 1:
+                merged.append(text_actions[0])
+                continue
+            
+            # Fusionner toute la séquence de saisies de texte
+            combined_text = "".join(
+                action.parameters.get("text", "") for action in text_actions
+            )
+            
+            merged.append(Action(
+                type=ActionType.TYPE_TEXT,
+                parameters={"text": combined_text},
+                description=f"Saisie combinée de texte ({len(combined_text)} caractères)"
+            ))
         
         return merged
     
     def _recalculate_duration(self, actions: List[Action]) -> float:
         """Recalcule la durée estimée d'une liste d'actions."""
+        if NUMPY_AVAILABLE and len(actions) >= VECTORIZED_DURATION_THRESHOLD:
+            return self._recalculate_duration_vectorized(actions)
+        
         total_duration = 0.0
         
         for action in actions:
-            if action.type == ActionType.WAIT:
+            if action.type is ActionType.WAIT:
                 total_duration += action.parameters.get("duration", 1.0)
-            elif action.type == ActionType.TYPE_TEXT:
+            elif action.type is ActionType.TYPE_TEXT:
                 text = action.parameters.get("text", "")
                 total_duration += max(1.0, len(text) * 0.01)
             else:
@@ -499,16 +1069,42 @@ class PlanGenerator:
         
         return total_duration
     
-    def validate_plan(self, plan: Plan) -> Dict[str, Any]:
+    def _recalculate_duration_vectorized(self, actions: List[Action]) -> float:
+        """Recalcule la durée des longs plans en agrégeant avec NumPy."""
+        # Une passe d'extraction: (genre, valeur) avec 0=autre, 1=attente, 2=saisie
+        columns = np.fromiter(
+            (
+                (1, action.parameters.get("duration", 1.0)) if action.type is ActionType.WAIT
+                else (2, len(action.parameters.get("text", ""))) if action.type is ActionType.TYPE_TEXT
+                else (0, 0.0)
+                for action in actions
+            ),
+            dtype=[("kind", np.int8), ("value", np.float64)],
+            count=len(actions)
+        )
+        kinds = columns["kind"]
+        values = columns["value"]
+        
+        wait_total = values[kinds == 1].sum()
+        text_total = np.maximum(1.0, values[kinds == 2] * 0.01).sum()
+        other_total = np.count_nonzero(kinds == 0)
+        
+        return float(wait_total + text_total + other_total)
+    
+    def validate_plan(self, plan: Union[Plan, LazyPlan], fast: bool = False) -> Dict[str, Any]:
         """
         Valide un plan avant exécution.
         
         Args:
             plan: Plan à valider
+            fast: Arrêter à la première erreur, sans collecter les avertissements
             
         Returns:
             Résultat de validation
         """
+        if isinstance(plan, LazyPlan):
+            plan = plan.materialize()
+        
         validation = {
             "valid": True,
             "errors": [],
@@ -520,20 +1116,22 @@ class PlanGenerator:
             if not plan.actions:
                 validation["errors"].append("Plan vide - aucune action définie")
                 validation["valid"] = False
+                if fast:
+                    return validation
             
             # Vérifier chaque action
             for i, action in enumerate(plan.actions):
-                action_validation = self._validate_action(action)
-                
-                if not action_validation["valid"]:
-                    validation["errors"].extend([
-                        f"Action {i}: {error}" for error in action_validation["errors"]
-                    ])
-                    validation["valid"] = False
-                
-                validation["warnings"].extend([
-                    f"Action {i}: {warning}" for warning in action_validation["warnings"]
-                ])
+                for severity, message in self._iter_action_issues(action):
+                    if severity == "error":
+                        validation["errors"].append(f"Action {i}: {message}")
+                        validation["valid"] = False
+                        if fast:
+                            return validation
+                    elif not fast:
+                        validation["warnings"].append(f"Action {i}: {message}")
+            
+            if fast:
+                return validation
             
             # Vérifier la cohérence du plan
             coherence_check = self._check_plan_coherence(plan)
@@ -559,16 +1157,26 @@ class PlanGenerator:
             "warnings": []
         }
         
+        for severity, message in self._iter_action_issues(action):
+            if severity == "error":
+                validation["errors"].append(message)
+                validation["valid"] = False
+            else:
+                validation["warnings"].append(message)
+        
+        return validation
+    
+    def _iter_action_issues(self, action: Action) -> Iterator[Tuple[str, str]]:
+        """Produit les problèmes d'une action sous forme (sévérité, message)."""
         # Vérifier que l'action a une description
         if not action.description:
-            validation["warnings"].append("Description d'action manquante")
+            yield "warning", "Description d'action manquante"
         
         # Validation selon le type d'action
-        if action.type == ActionType.TYPE_TEXT:
+        if action.type is ActionType.TYPE_TEXT:
             text = action.parameters.get("text", "")
             if not text:
-                validation["errors"].append("Texte à saisir manquant")
-                validation["valid"] = False
+                yield "error", "Texte à saisir manquant"
         
         # Vérifier les compétences si applicable
         if "skill_name" in action.parameters:
@@ -576,27 +1184,22 @@ class PlanGenerator:
             skill = self.skill_manager.get_skill(skill_name)
             
             if not skill:
-                validation["errors"].append(f"Compétence '{skill_name}' non trouvée")
-                validation["valid"] = False
+                yield "error", f"Compétence '{skill_name}' non trouvée"
             else:
                 # Valider les paramètres de la compétence
                 skill_params = action.parameters.get("skill_parameters", {})
                 if not skill.validate_parameters(skill_params):
-                    validation["errors"].append(f"Paramètres invalides pour '{skill_name}'")
-                    validation["valid"] = False
-        
-        return validation
+                    yield "error", f"Paramètres invalides pour '{skill_name}'"
     
     def _check_plan_coherence(self, plan: Plan) -> List[str]:
         """Vérifie la cohérence globale du plan."""
         warnings = []
         
-        # Vérifier l'ordre logique des actions
-        action_types = [action.type for action in plan.actions]
+        # Compter les types d'actions en une seule passe
+        type_counts = Counter(action.type for action in plan.actions)
         
         # Avertir si sauvegarde sans saisie préalable
-        if (ActionType.SCREENSHOT in action_types and 
-            action_types.count(ActionType.SCREENSHOT) > 3):
+        if type_counts[ActionType.SCREENSHOT] > 3:
             warnings.append("Nombreuses captures d'écran - plan potentiellement inefficace")
         
         return warnings
\ No newline at end of file
@@ -4,23 +4,111 @@ Gestionnaire de planification principal pour Desktop Agent.
 Coordonne la génération de plans et l'application des guardrails.
 """
 
+import copy
+import logging
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter, itemgetter
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, FrozenSet, Hashable, List, Mapping, Optional, Tuple
+from uuid import uuid4
 
 from ..common.config import get_settings
 from ..common.errors import PlannerError, PlanValidationError
 from ..common.logging_utils import get_planner_logger
-from ..common.models import Intent, Plan
+from ..common.models import Intent, IntentType, Plan
 from ..skills import SkillManager
 from .guardrails import GuardrailsEngine
 from .plan_generator import PlanGenerator
 
 logger = get_planner_logger()
 
+# Plans récents conservés par type d'intention pour les suggestions
+SIMILAR_PLANS_PER_TYPE = 16
+
+# Index des compteurs dans PlannerManager._stats
+_GENERATED, _APPROVED, _REJECTED = range(3)
+
+# Champs sérialisés de chaque action (le type est toujours un ActionType validé)
+_ACTION_FIELDS = attrgetter("type.value", "description", "parameters")
+
+_MESSAGE = itemgetter("message")
+
+# Slots requis par type d'intention
+_REQUIRED_SLOTS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "open_app": ("app_name",),
+    "focus_app": ("app_name",),
+    "click_text": ("text",),
+    "type_text": ("text",),
+    "web_search": ("query",),
+    "write_text_file": ("content",)
+})
+
+# Suggestions affichées pour un slot manquant
+_SLOT_SUGGESTIONS: Mapping[str, str] = MappingProxyType({
+    "app_name": "Spécifiez le nom de l'application (ex: Chrome, Notepad)",
+    "text": "Précisez le texte à utiliser",
+    "query": "Indiquez votre requête de recherche",
+    "content": "Spécifiez le contenu du fichier"
+})
+
+# Valeurs proposées pour compléter un slot
+_PARAMETER_SUGGESTIONS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "app_name": ("Google Chrome", "Notepad", "Calculator", "File Explorer"),
+    "text": ("OK", "Cancel", "Save", "Open"),
+    "query": ("weather", "news", "tutorials")
+})
+
+# Intentions dont le plan canonique ne peut pas être raccourci par l'optimisation
+_SIMPLE_INTENTS = frozenset({"open_app", "focus_app", "click_text", "type_text"})
+
+# Complexité de base par type d'intention
+_COMPLEXITY_MAP: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "open_app": {"level": "simple", "actions": 2, "duration": 3.0},
+    "focus_app": {"level": "simple", "actions": 1, "duration": 1.0},
+    "click_text": {"level": "simple", "actions": 2, "duration": 2.0},
+    "type_text": {"level": "simple", "actions": 1, "duration": 2.0},
+    "save_file": {"level": "medium", "actions": 2, "duration": 3.0},
+    "web_search": {"level": "medium", "actions": 5, "duration": 8.0},
+    "write_text_file": {"level": "complex", "actions": 4, "duration": 6.0}
+})
+
+_DEFAULT_COMPLEXITY: Mapping[str, Any] = MappingProxyType(
+    {"level": "unknown", "actions": 3, "duration": 5.0}
+)
+
+# Ajustements selon les slots: type d'intention -> (multiplicateur de durée, hausse de risque)
+_COMPLEXITY_ADJUSTERS: Mapping[str, Callable[[Dict[str, Any]], Tuple[float, int]]] = MappingProxyType({
+    "type_text": lambda slots: (1.0 + len(slots.get("text", "")) * 0.01, 0),
+    "write_text_file": lambda slots: (
+        1.0 + len(slots.get("content", "")) * 0.005,
+        1 if slots.get("path") else 0
+    )
+})
+
+_NO_ADJUSTMENT = (1.0, 0)
+
 
 class PlannerManager:
     """Gestionnaire principal de planification."""
     
+    __slots__ = (
+        "settings",
+        "skill_manager",
+        "plan_generator",
+        "guardrails",
+        "_executor",
+        "_stats",
+        "_stats_lock",
+        "_plan_cache",
+        "_result_cache",
+        "_plans_by_intent_type"
+    )
+    
     def __init__(self, skill_manager: SkillManager):
         self.settings = get_settings()
         self.skill_manager = skill_manager
@@ -29,11 +117,23 @@ class PlannerManager:
         self.plan_generator = PlanGenerator(skill_manager)
         self.guardrails = GuardrailsEngine()
         
+        # Exécuteur partagé pour la validation et les guardrails concurrents
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="planner")
+        
         # Statistiques
-        self._plans_generated = 0
-        self._plans_approved = 0
-        self._plans_rejected = 0
-        self._plan_cache = {}
+        # Statistiques: plans générés, approuvés, rejetés. Le verrou protège
+        # les compteurs et le cache lorsque create_plan est appelé en parallèle
+        self._stats: List[int] = [0, 0, 0]
+        self._stats_lock = threading.Lock()
+        
+        # Cache LRU des plans approuvés (id -> (plan, clé d'intention))
+        self._plan_cache: OrderedDict[str, Tuple[Plan, Optional[Hashable]]] = OrderedDict()
+        
+        # Plans validés par intention normalisée (clé -> (plan, validation))
+        self._result_cache: Dict[Hashable, Tuple[Plan, Dict[str, Any]]] = {}
+        
+        # Index secondaire borné des plans récents par type d'intention
+        self._plans_by_intent_type: Dict[IntentType, Deque[Plan]] = {}
         
         logger.info("Gestionnaire de planification initialisé")
     
@@ -55,23 +155,54 @@ class PlannerManager:
             Résultat complet de planification
         """
         try:
-            start_time = time.time()
-            self._plans_generated += 1
-            
-            logger.info(f"Création plan pour intention: {intent.type.value}")
-            
-            # Étape 1: Génération du plan initial
-            plan = self.plan_generator.generate_plan(intent, context)
-            
-            # Étape 2: Optimisation si demandée
-            if optimize:
-                plan = self.plan_generator.optimize_plan(plan, context)
-            
-            # Étape 3: Validation du plan
-            plan_validation = self.plan_generator.validate_plan(plan)
+            start_time = time.perf_counter()
+            
+            if logger.is_enabled_for(logging.INFO):
+                logger.info(f"Création plan pour intention: {intent.type.value}")
+            
+            # Réutiliser le plan déjà généré, optimisé et validé pour une intention
+            # identique; les guardrails (dont la limite de taux) sont toujours réévalués
+            cache_key = self._result_cache_key(intent, context, optimize)
+            cached = None
+            if cache_key is not None:
+                # Lecture et mise à jour LRU atomiques vis-à-vis des évictions
+                with self._stats_lock:
+                    cached = self._result_cache.get(cache_key)
+                    if cached is not None:
+                        self._plan_cache.move_to_end(cached[0].id)
+            
+            if cached is not None:
+                cached_plan, cached_validation = cached
+                # Chaque appelant reçoit son propre plan (id et intention propres)
+                plan = cached_plan.model_copy(
+                    update={"id": str(uuid4()), "intent": intent},
+                    deep=True
+                )
+                plan_validation = copy.deepcopy(cached_validation)
+                security_check = self.guardrails.check_plan(plan, context)
+                
+                if logger.is_enabled_for(logging.INFO):
+                    logger.info(f"Plan trouvé en cache: {plan.id}", plan_id=plan.id)
             
-            # Étape 4: Vérifications de sécurité (guardrails)
-            security_check = self.guardrails.check_plan(plan, context)
+            else:
+                # Étape 1: Génération du plan initial
+                plan = self.plan_generator.generate_plan(intent, context)
+                
+                # Étape 2: Optimisation si demandée et utile
+                if optimize and intent.type.value not in _SIMPLE_INTENTS:
+                    plan = self.plan_generator.optimize_plan(plan, context)
+                
+                # Étapes 3 et 4: validation du plan et vérifications de sécurité,
+                # indépendantes l'une de l'autre
+                if self.settings.planner.parallel_checks:
+                    validation_future = self._executor.submit(
+                        self.plan_generator.validate_plan, plan
+                    )
+                    security_check = self.guardrails.check_plan(plan, context)
+                    plan_validation = validation_future.result()
+                else:
+                    plan_validation = self.plan_generator.validate_plan(plan)
+                    security_check = self.guardrails.check_plan(plan, context)
             
             # Étape 5: Décision finale
             final_decision = self._make_execution_decision(plan_validation, security_check)
@@ -86,45 +217,55 @@ class PlannerManager:
                     "estimated_duration": plan.estimated_duration,
                     "risk_level": plan.risk_level,
                     "actions": [
-                        {
-                            "type": action.type.value if hasattr(action.type, 'value') else str(action.type),
-                            "description": action.description,
-                            "parameters": action.parameters
-                        }
-                        for action in plan.actions
+                        {"type": action_type, "description": description, "parameters": parameters}
+                        for action_type, description, parameters in map(_ACTION_FIELDS, plan.actions)
                     ]
                 },
                 "validation": plan_validation,
                 "security_check": security_check,
                 "execution_decision": final_decision,
-                "generation_time": time.time() - start_time
+                "generation_time": time.perf_counter() - start_time
             }
             
-            # Mettre à jour les statistiques
-            if final_decision["approved"]:
-                self._plans_approved += 1
-            else:
-                self._plans_rejected += 1
-            
-            # Cache le plan si approuvé
-            if final_decision["approved"]:
-                self._plan_cache[plan.id] = plan
-            
-            logger.info(
-                f"Plan créé: {'APPROUVÉ' if final_decision['approved'] else 'REJETÉ'}",
-                plan_id=plan.id,
-                actions_count=len(plan.actions),
-                duration=result["generation_time"],
-                requires_confirmation=final_decision["requires_confirmation"]
-            )
+            # Mettre à jour les statistiques et cacher le plan si approuvé
+            with self._stats_lock:
+                stats = self._stats
+                stats[_GENERATED] += 1
+                if final_decision["approved"]:
+                    stats[_APPROVED] += 1
+                    self._cache_plan(plan, cache_key, plan_validation)
+                else:
+                    stats[_REJECTED] += 1
+            
+            if logger.is_enabled_for(logging.INFO):
+                logger.info(
+                    f"Plan créé: {'APPROUVÉ' if final_decision['approved'] else 'REJETÉ'}",
+                    plan_id=plan.id,
+                    actions_count=len(plan.actions),
+                    duration=result["generation_time"],
+                    requires_confirmation=final_decision["requires_confirmation"]
+                )
             
             return result
             
         except Exception as e:
             logger.error(f"Erreur création plan: {e}")
-            self._plans_rejected += 1
+            with self._stats_lock:
+                self._stats[_GENERATED] += 1
+                self._stats[_REJECTED] += 1
             raise PlannerError(f"Erreur planification: {e}")
     
+    def close(self) -> None:
+        """Libère les threads de l'exécuteur et du moteur de guardrails."""
+        self._executor.shutdown(wait=False)
+        self.guardrails.close()
+    
+    def __enter__(self) -> "PlannerManager":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
     def get_plan_by_id(self, plan_id: str) -> Optional[Plan]:
         """
         Récupère un plan par son ID.
@@ -135,7 +276,9 @@ class PlannerManager:
         Returns:
             Plan trouvé ou None
         """
-        return self._plan_cache.get(plan_id)
+        with self._stats_lock:
+            entry = self._plan_cache.get(plan_id)
+        return entry[0] if entry is not None else None
     
     def validate_intent_for_planning(self, intent: Intent) -> Dict[str, Any]:
         """
@@ -178,7 +321,7 @@ class PlannerManager:
                     f"Paramètres manquants: {', '.join(missing_slots)}"
                 )
                 validation["suggestions"].extend(
-                    self._get_slot_suggestions(intent.type, missing_slots)
+                    self._get_slot_suggestions(intent.type, tuple(missing_slots))
                 )
             
             # Simulation des guardrails
@@ -260,41 +403,17 @@ class PlannerManager:
         """
         try:
             # Estimation basée sur le type d'intention
-            complexity_map = {
-                "open_app": {"level": "simple", "actions": 2, "duration": 3.0},
-                "focus_app": {"level": "simple", "actions": 1, "duration": 1.0},
-                "click_text": {"level": "simple", "actions": 2, "duration": 2.0},
-                "type_text": {"level": "simple", "actions": 1, "duration": 2.0},
-                "save_file": {"level": "medium", "actions": 2, "duration": 3.0},
-                "web_search": {"level": "medium", "actions": 5, "duration": 8.0},
-                "write_text_file": {"level": "complex", "actions": 4, "duration": 6.0}
-            }
-            
-            base_complexity = complexity_map.get(
-                intent.type.value,
-                {"level": "unknown", "actions": 3, "duration": 5.0}
-            )
+            base_complexity = _COMPLEXITY_MAP.get(intent.type.value, _DEFAULT_COMPLEXITY)
             
             # Ajustements basés sur les paramètres
-            adjustments = {"duration_multiplier": 1.0, "risk_increase": 0}
-            
-            if intent.type.value == "type_text":
-                text_length = len(intent.slots.get("text", ""))
-                adjustments["duration_multiplier"] = 1.0 + (text_length / 100)
-            
-            elif intent.type.value == "write_text_file":
-                content_length = len(intent.slots.get("content", ""))
-                adjustments["duration_multiplier"] = 1.0 + (content_length / 200)
-                
-                if intent.slots.get("path"):
-                    adjustments["risk_increase"] = 1
+            adjuster = _COMPLEXITY_ADJUSTERS.get(intent.type.value)
+            duration_multiplier, risk_increase = (
+                adjuster(intent.slots) if adjuster else _NO_ADJUSTMENT
+            )
             
             # Calcul final
-            estimated_duration = base_complexity["duration"] * adjustments["duration_multiplier"]
-            risk_level = "low"
-            
-            if adjustments["risk_increase"] > 0:
-                risk_level = "medium"
+            estimated_duration = base_complexity["duration"] * duration_multiplier
+            risk_level = "medium" if risk_increase > 0 else "low"
             
             return {
                 "complexity_level": base_complexity["level"],
@@ -316,14 +435,14 @@ class PlannerManager:
         Returns:
             Statistiques détaillées
         """
+        with self._stats_lock:
+            generated, approved, rejected = self._stats
+        
         return {
-            "plans_generated": self._plans_generated,
-            "plans_approved": self._plans_approved,
-            "plans_rejected": self._plans_rejected,
-            "approval_rate": (
-                self._plans_approved / self._plans_generated 
-                if self._plans_generated > 0 else 0.0
-            ),
+            "plans_generated": generated,
+            "plans_approved": approved,
+            "plans_rejected": rejected,
+            "approval_rate": approved / generated if generated > 0 else 0.0,
             "cached_plans": len(self._plan_cache),
             "active_rules": len(self.guardrails._rules),
             "skill_manager_stats": self.skill_manager.get_manager_stats()
@@ -331,15 +450,18 @@ class PlannerManager:
     
     def clear_plan_cache(self) -> None:
         """Vide le cache des plans."""
-        cleared_count = len(self._plan_cache)
-        self._plan_cache.clear()
-        logger.info(f"Cache des plans vidé: {cleared_count} plans supprimés")
+        with self._stats_lock:
+            cleared_count = len(self._plan_cache)
+            self._plan_cache.clear()
+            self._result_cache.clear()
+            self._plans_by_intent_type.clear()
+        if logger.is_enabled_for(logging.INFO):
+            logger.info(f"Cache des plans vidé: {cleared_count} plans supprimés")
     
     def reset_stats(self) -> None:
         """Remet à zéro les statistiques."""
-        self._plans_generated = 0
-        self._plans_approved = 0
-        self._plans_rejected = 0
+        with self._stats_lock:
+            self._stats = [0, 0, 0]
         logger.info("Statistiques du planificateur remises à zéro")
     
     # Méthodes privées
@@ -350,93 +472,111 @@ class PlannerManager:
         security_check: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Prend la décision finale d'exécution."""
-        decision = {
-            "approved": False,
-            "requires_confirmation": False,
-            "blocking_reasons": [],
-            "warnings": [],
-            "recommendations": []
-        }
+        blocking_reasons = []
+        recommendations = []
         
         # Vérifier la validation du plan
         if not plan_validation["valid"]:
-            decision["blocking_reasons"].extend(plan_validation["errors"])
-            decision["recommendations"].append("Corrigez les erreurs de plan")
+            blocking_reasons.extend(plan_validation["errors"])
+            recommendations.append("Corrigez les erreurs de plan")
         
         # Vérifier la sécurité
         if not security_check["can_execute"]:
-            decision["blocking_reasons"].extend([
-                error["message"] for error in security_check["errors"]
-            ])
-            decision["recommendations"].append("Vérifiez les paramètres de sécurité")
+            blocking_reasons.extend(map(_MESSAGE, security_check["errors"]))
+            recommendations.append("Vérifiez les paramètres de sécurité")
         
         # Ajouter les avertissements
-        decision["warnings"].extend(plan_validation.get("warnings", []))
-        decision["warnings"].extend([
-            warning["message"] for warning in security_check.get("warnings", [])
-        ])
+        warnings = list(plan_validation.get("warnings", ()))
+        warnings.extend(map(_MESSAGE, security_check.get("warnings", ())))
         
-        # Décision finale
-        if not decision["blocking_reasons"]:
-            decision["approved"] = True
-            
-            # Confirmation nécessaire si avertissements ou configuration
-            decision["requires_confirmation"] = (
-                security_check.get("requires_confirmation", False) or
-                len(decision["warnings"]) > 0
-            )
+        # Décision finale: approuvé sauf raison bloquante; confirmation
+        # nécessaire si avertissements ou configuration
+        approved = not blocking_reasons
         
-        return decision
+        return {
+            "approved": approved,
+            "requires_confirmation": approved and (
+                security_check.get("requires_confirmation", False) or bool(warnings)
+            ),
+            "blocking_reasons": blocking_reasons,
+            "warnings": warnings,
+            "recommendations": recommendations
+        }
     
-    def _get_required_slots(self, intent_type) -> List[str]:
+    @staticmethod
+    def _get_required_slots(intent_type) -> Tuple[str, ...]:
         """Retourne les slots requis pour un type d'intention."""
-        required_map = {
-            "open_app": ["app_name"],
-            "focus_app": ["app_name"],
-            "click_text": ["text"],
-            "type_text": ["text"],
-            "web_search": ["query"],
-            "write_text_file": ["content"]
-        }
-        
-        return required_map.get(intent_type.value, [])
+        return _REQUIRED_SLOTS.get(intent_type.value, ())
     
-    def _get_slot_suggestions(self, intent_type, missing_slots: List[str]) -> List[str]:
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _get_slot_suggestions(intent_type, missing_slots: Tuple[str, ...]) -> Tuple[str, ...]:
         """Génère des suggestions pour les slots manquants."""
-        suggestions = []
-        
-        for slot in missing_slots:
-            if slot == "app_name":
-                suggestions.append("Spécifiez le nom de l'application (ex: Chrome, Notepad)")
-            elif slot == "text":
-                suggestions.append("Précisez le texte à utiliser")
-            elif slot == "query":
-                suggestions.append("Indiquez votre requête de recherche")
-            elif slot == "content":
-                suggestions.append("Spécifiez le contenu du fichier")
-        
-        return suggestions
+        return tuple(
+            _SLOT_SUGGESTIONS[slot] for slot in missing_slots if slot in _SLOT_SUGGESTIONS
+        )
     
-    def _get_parameter_suggestions(self, intent_type, slot: str) -> List[str]:
+    @staticmethod
+    def _get_parameter_suggestions(intent_type, slot: str) -> List[str]:
         """Génère des suggestions de paramètres."""
-        if slot == "app_name":
-            return ["Google Chrome", "Notepad", "Calculator", "File Explorer"]
-        elif slot == "text":
-            return ["OK", "Cancel", "Save", "Open"]
-        elif slot == "query":
-            return ["weather", "news", "tutorials"]
-        
-        return []
+        return list(_PARAMETER_SUGGESTIONS.get(slot, ()))
     
     def _find_similar_plans(self, intent: Intent) -> List[Plan]:
         """Trouve des plans similaires dans le cache."""
-        similar = []
+        # Copie sous verrou: _cache_plan modifie la deque depuis d'autres threads
+        with self._stats_lock:
+            recent = self._plans_by_intent_type.get(intent.type, ())
+            return list(islice(recent, 5))  # Limiter à 5 résultats
+    
+    def _result_cache_key(
+        self,
+        intent: Intent,
+        context: Optional[Dict[str, Any]],
+        optimize: bool
+    ) -> Optional[Tuple[IntentType, FrozenSet, bool]]:
+        """Construit la clé normalisée d'une intention, ou None si non cachable."""
+        # Le contexte peut modifier les guardrails: seules les requêtes sans contexte sont cachées
+        if context or not self.settings.planner.plan_cache_enabled:
+            return None
+        
+        try:
+            return (intent.type, frozenset(intent.slots.items()), optimize)
+        except TypeError:
+            # Slots non hashables: pas de cache
+            return None
+    
+    def _cache_plan(
+        self,
+        plan: Plan,
+        cache_key: Optional[Hashable],
+        plan_validation: Dict[str, Any]
+    ) -> None:
+        """Ajoute un plan approuvé au cache LRU et à ses index."""
+        if plan.id in self._plan_cache:
+            self._plan_cache.move_to_end(plan.id)
+            return
+        
+        self._plan_cache[plan.id] = (plan, cache_key)
+        self._plans_by_intent_type.setdefault(
+            plan.intent.type, deque(maxlen=SIMILAR_PLANS_PER_TYPE)
+        ).append(plan)
         
-        for plan in self._plan_cache.values():
-            if plan.intent.type == intent.type:
-                similar.append(plan)
+        if cache_key is not None:
+            self._result_cache[cache_key] = (plan, copy.deepcopy(plan_validation))
         
-        return similar[:5]  # Limiter à 5 résultats
+        # Éviction LRU, répercutée sur tous les index
+        while len(self._plan_cache) > self.settings.planner.plan_cache_size:
+            _, (evicted, evicted_key) = self._plan_cache.popitem(last=False)
+            try:
+                self._plans_by_intent_type[evicted.intent.type].remove(evicted)
+            except ValueError:
+                # Déjà sorti de l'index borné
+                pass
+            # La clé peut désigner depuis un plan plus récent de la même intention
+            if evicted_key is not None:
+                cached = self._result_cache.get(evicted_key)
+                if cached is not None and cached[0] is evicted:
+                    del self._result_cache[evicted_key]
     
     def _estimate_success_probability(self, intent: Intent) -> float:
         """Estime la probabilité de succès d'une intention."""
@@ -1,7 +1,7 @@
 """Package policy pour les politiques RL et BC."""
 
-from .baseline_policy import BaselinePolicy
+from .baseline_policy import BaselinePolicy, PolicyAction
 from .bc_trainer import BehaviorCloningTrainer
 from .ppo_trainer import PPOTrainer
 
-__all__ = ['BaselinePolicy', 'BehaviorCloningTrainer', 'PPOTrainer']
\ No newline at end of file
+__all__ = ['BaselinePolicy', 'PolicyAction', 'BehaviorCloningTrainer', 'PPOTrainer']
\ No newline at end of file
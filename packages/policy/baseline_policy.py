@@ -2,274 +2,312 @@
 
 import logging
 import numpy as np
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 from pathlib import Path
 
 from packages.common.config import Config
 from packages.rl_env.action_space import ActionSpace
 
 
+# Index des modificateurs dans le vecteur 'modifiers'
+MODIFIER_INDEX = {
+    'ctrl': 0, 'alt': 1, 'shift': 2, 'win': 3,
+    'fn': 4, 'meta': 5, 'cmd': 6, 'option': 7
+}
+
+# Codes des touches nommées
+KEY_CODES = {
+    'enter': 13,
+    'space': 32,
+    'tab': 9
+}
+
+MAX_TEXT_LENGTH = 200
+
+
+# Scripts des tâches MVP: une étape (type d'action, argument) par appel à predict
+TASK_SCRIPTS = {
+    'open_chrome': (
+        ('key_press', ['win', 'r']),     # Ouvrir la boîte de dialogue Exécuter
+        ('wait', 0.5),
+        ('type_text', "chrome"),
+        ('key_press', ['enter']),
+        ('wait', 3.0),                   # Attendre que Chrome s'ouvre
+    ),
+    'write_file': (
+        ('key_press', ['win', 'r']),     # Ouvrir le bloc-notes (Win+R, notepad)
+        ('wait', 0.5),
+        ('type_text', "notepad"),
+        ('key_press', ['enter']),
+        ('wait', 2.0),                   # Attendre que le bloc-notes s'ouvre
+        ('type_text', "Bonjour"),
+        ('key_press', ['ctrl', 's']),    # Sauvegarder
+        ('wait', 1.0),                   # Attendre la boîte de dialogue
+        ('type_text', "test_bonjour.txt"),
+        ('key_press', ['enter']),
+        ('wait', 1.0),                   # Attendre la sauvegarde
+    ),
+    'web_search': (
+        ('key_press', ['win', 'r']),     # Ouvrir Chrome d'abord
+        ('wait', 0.5),
+        ('type_text', "chrome"),
+        ('key_press', ['enter']),
+        ('wait', 3.0),
+        ('click', (0.5, 0.1)),           # Barre d'adresse (approximativement au centre-haut)
+        ('wait', 0.5),
+        ('type_text', "google.com"),
+        ('key_press', ['enter']),
+        ('wait', 2.0),
+        ('click', (0.5, 0.4)),           # Barre de recherche
+        ('wait', 0.5),
+        ('type_text', "desktop automation"),
+        ('key_press', ['enter']),
+        ('wait', 2.0),
+    ),
+}
+
+
+def _readonly_zeros(size: int, dtype) -> np.ndarray:
+    """Crée un tableau nul en lecture seule, partageable entre actions."""
+    array = np.zeros(size, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+# Champs par défaut partagés: chaque action ne copie que ceux qu'elle modifie
+_EMPTY_COORDINATES = _readonly_zeros(2, np.float32)
+_EMPTY_TEXT = _readonly_zeros(MAX_TEXT_LENGTH, np.uint8)
+_EMPTY_MODIFIERS = _readonly_zeros(8, np.int8)
+_EMPTY_KEY = _readonly_zeros(1, np.uint8)
+_EMPTY_WAIT_TIME = _readonly_zeros(1, np.float32)
+
+
+# Action RL au format dictionnaire de l'espace d'action. Les tableaux sont
+# en lecture seule et partagés: une trajectoire peut les conserver sans copie
+PolicyAction = Dict[str, Any]
+
+# Champs d'une action, dans l'ordre de l'espace d'action
+ACTION_FIELDS = (
+    'action_type', 'coordinates', 'text', 'modifiers', 'key', 'scroll_direction', 'wait_time'
+)
+
+_DEFAULT_FIELDS: Mapping[str, Any] = MappingProxyType({
+    'coordinates': _EMPTY_COORDINATES,
+    'text': _EMPTY_TEXT,
+    'modifiers': _EMPTY_MODIFIERS,
+    'key': _EMPTY_KEY,
+    'scroll_direction': 1,  # none
+    'wait_time': _EMPTY_WAIT_TIME
+})
+
+
+def _frozen_action(action_type: int, **fields: Any) -> Mapping[str, Any]:
+    """Crée le gabarit immuable d'une action; les champs omis partagent les valeurs par défaut."""
+    return MappingProxyType({'action_type': action_type, **_DEFAULT_FIELDS, **fields})
+
+
+_NO_OP_ACTION = _frozen_action(8)  # no_op
+
+
 class BaselinePolicy:
     """Politique baseline scriptée pour démontrer les tâches MVP."""
     
+    __slots__ = (
+        'config', 'logger', 'action_space_manager', 'task_scripts',
+        'current_task', 'script_step', 'task_completed',
+        '_task_ids', '_unknown_task_id', '_batch_offsets', '_batch_lengths', '_batch_table',
+        '_batch_tasks', '_batch_task_ids', '_batch_steps', '_batch_completed'
+    )
+    
     def __init__(self, config: Config):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.action_space_manager = ActionSpace()
         
-        # Scripts pour les tâches MVP
+        # Scripts précompilés: gabarits d'action de chaque étape construits une
+        # seule fois; predict en renvoie une copie (dict) partageant les tableaux
         self.task_scripts = {
-            'open_chrome': self._open_chrome_script,
-            'write_file': self._write_file_script,
-            'web_search': self._web_search_script
+            task: tuple(self._compile_step(kind, arg) for kind, arg in steps)
+            for task, steps in TASK_SCRIPTS.items()
         }
         
+        # Tables empilées des scripts pour la prédiction par lot
+        self._build_batch_tables()
+        
         # État interne
         self.current_task = None
         self.script_step = 0
         self.task_completed = False
         
-    def predict(self, observation: Dict[str, np.ndarray], task: str = None) -> Dict[str, np.ndarray]:
+        # État des rollouts parallèles (structure de tableaux)
+        self._batch_tasks: List[Optional[str]] = []
+        self._batch_task_ids = np.zeros(0, dtype=np.int32)
+        self._batch_steps = np.zeros(0, dtype=np.int32)
+        self._batch_completed = np.zeros(0, dtype=bool)
+        
+    def predict(self, observation: Dict[str, np.ndarray], task: str = None) -> PolicyAction:
         """Prédit l'action suivante selon la politique baseline."""
         
         if task and task != self.current_task:
             self._reset_for_task(task)
         
         # Exécuter le script de la tâche actuelle
-        if self.current_task in self.task_scripts:
-            action = self.task_scripts[self.current_task](observation)
-        else:
+        script = self.task_scripts.get(self.current_task)
+        if script is None:
             # Action par défaut : ne rien faire
             action = self._no_op_action()
+        elif self.script_step < len(script):
+            action = dict(script[self.script_step])
+        else:
+            # Tâche terminée
+            self.task_completed = True
+            action = self._no_op_action()
         
         self.script_step += 1
         return action
     
+    def predict_batch(
+        self,
+        observations: List[Dict[str, np.ndarray]],
+        tasks: List[Optional[str]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Prédit l'action suivante de K rollouts parallèles en un seul appel.
+        
+        Chaque rollout suit la même logique que predict, avec son propre état
+        (tâche, étape), conservé entre les appels.
+        
+        Args:
+            observations: Observations des K environnements
+            tasks: Tâche de chaque environnement (None pour conserver la tâche)
+            
+        Returns:
+            Actions empilées, chaque champ ayant K lignes
+        """
+        n_envs = len(tasks)
+        if len(self._batch_tasks) != n_envs:
+            self._batch_tasks = [None] * n_envs
+            self._batch_task_ids = np.full(n_envs, self._unknown_task_id, dtype=np.int32)
+            self._batch_steps = np.zeros(n_envs, dtype=np.int32)
+            self._batch_completed = np.zeros(n_envs, dtype=bool)
+        
+        for i, task in enumerate(tasks):
+            if task and task != self._batch_tasks[i]:
+                self._batch_tasks[i] = task.lower()
+                self._batch_task_ids[i] = self._task_ids.get(task.lower(), self._unknown_task_id)
+                self._batch_steps[i] = 0
+                self._batch_completed[i] = False
+        
+        task_ids = self._batch_task_ids
+        steps = self._batch_steps
+        lengths = self._batch_lengths[task_ids]
+        
+        rows = self._batch_offsets[task_ids] + np.minimum(steps, lengths)
+        self._batch_completed |= (steps >= lengths) & (task_ids != self._unknown_task_id)
+        steps += 1
+        
+        return {field: table[rows] for field, table in self._batch_table.items()}
+    
+    def is_batch_completed(self) -> np.ndarray:
+        """Retourne, pour chaque rollout parallèle, si sa tâche est terminée."""
+        return self._batch_completed.copy()
+    
+    def _build_batch_tables(self):
+        """Empile les actions de tous les scripts, suivies d'un no-op par tâche."""
+        rows: List[Mapping[str, Any]] = []
+        offsets, lengths = [], []
+        
+        for script in self.task_scripts.values():
+            offsets.append(len(rows))
+            lengths.append(len(script))
+            rows.extend(script)
+            rows.append(_NO_OP_ACTION)
+        
+        # Tâche inconnue: no-op permanent
+        offsets.append(len(rows))
+        lengths.append(0)
+        rows.append(_NO_OP_ACTION)
+        
+        self._task_ids = {task: i for i, task in enumerate(self.task_scripts)}
+        self._unknown_task_id = len(self.task_scripts)
+        self._batch_offsets = np.array(offsets, dtype=np.int32)
+        self._batch_lengths = np.array(lengths, dtype=np.int32)
+        self._batch_table = {
+            field: np.stack([np.asarray(row[field]) for row in rows])
+            for field in ACTION_FIELDS
+        }
+    
     def _reset_for_task(self, task: str):
         """Remet à zéro pour une nouvelle tâche."""
         self.current_task = task.lower()
         self.script_step = 0
         self.task_completed = False
-        self.logger.info(f"Démarrage de la tâche baseline: {task}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Démarrage de la tâche baseline: %s", task)
     
-    def _open_chrome_script(self, observation: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
-        """Script pour ouvrir Chrome."""
-        
-        if self.script_step == 0:
-            # Étape 1: Appuyer sur Win+R pour ouvrir la boîte de dialogue Exécuter
-            return self._key_press_action(['win', 'r'])
-            
-        elif self.script_step == 1:
-            # Étape 2: Attendre un peu
-            return self._wait_action(0.5)
-            
-        elif self.script_step == 2:
-            # Étape 3: Taper "chrome"
-            return self._type_text_action("chrome")
-            
-        elif self.script_step == 3:
-            # Étape 4: Appuyer sur Entrée
-            return self._key_press_action(['enter'])
-            
-        elif self.script_step == 4:
-            # Étape 5: Attendre que Chrome s'ouvre
-            return self._wait_action(3.0)
-            
+    def _compile_step(self, kind: str, arg: Any) -> Mapping[str, Any]:
+        """Construit l'action figée d'une étape de script."""
+        if kind == 'click':
+            action = self._click_action(*arg)
+        elif kind == 'type_text':
+            action = self._type_text_action(arg)
+        elif kind == 'key_press':
+            action = self._key_press_action(arg)
+        elif kind == 'wait':
+            action = self._wait_action(arg)
         else:
-            # Tâche terminée
-            self.task_completed = True
-            return self._no_op_action()
-    
-    def _write_file_script(self, observation: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
-        """Script pour créer et écrire dans un fichier."""
+            raise ValueError(f"Étape de script inconnue: {kind}")
         
-        if self.script_step == 0:
-            # Étape 1: Ouvrir le bloc-notes (Win+R, notepad)
-            return self._key_press_action(['win', 'r'])
-            
-        elif self.script_step == 1:
-            return self._wait_action(0.5)
-            
-        elif self.script_step == 2:
-            return self._type_text_action("notepad")
-            
-        elif self.script_step == 3:
-            return self._key_press_action(['enter'])
-            
-        elif self.script_step == 4:
-            # Attendre que le bloc-notes s'ouvre
-            return self._wait_action(2.0)
-            
-        elif self.script_step == 5:
-            # Écrire "Bonjour"
-            return self._type_text_action("Bonjour")
-            
-        elif self.script_step == 6:
-            # Sauvegarder (Ctrl+S)
-            return self._key_press_action(['ctrl', 's'])
-            
-        elif self.script_step == 7:
-            # Attendre la boîte de dialogue
-            return self._wait_action(1.0)
-            
-        elif self.script_step == 8:
-            # Taper le nom du fichier
-            return self._type_text_action("test_bonjour.txt")
-            
-        elif self.script_step == 9:
-            # Appuyer sur Entrée pour sauvegarder
-            return self._key_press_action(['enter'])
-            
-        elif self.script_step == 10:
-            # Attendre la sauvegarde
-            return self._wait_action(1.0)
-            
-        else:
-            # Tâche terminée
-            self.task_completed = True
-            return self._no_op_action()
+        return action
     
-    def _web_search_script(self, observation: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
-        """Script pour effectuer une recherche web."""
-        
-        if self.script_step == 0:
-            # Ouvrir Chrome d'abord
-            return self._key_press_action(['win', 'r'])
-            
-        elif self.script_step == 1:
-            return self._wait_action(0.5)
-            
-        elif self.script_step == 2:
-            return self._type_text_action("chrome")
-            
-        elif self.script_step == 3:
-            return self._key_press_action(['enter'])
-            
-        elif self.script_step == 4:
-            return self._wait_action(3.0)
-            
-        elif self.script_step == 5:
-            # Cliquer sur la barre d'adresse (approximativement au centre-haut)
-            return self._click_action(0.5, 0.1)
-            
-        elif self.script_step == 6:
-            return self._wait_action(0.5)
-            
-        elif self.script_step == 7:
-            # Taper l'URL de Google
-            return self._type_text_action("google.com")
-            
-        elif self.script_step == 8:
-            return self._key_press_action(['enter'])
-            
-        elif self.script_step == 9:
-            return self._wait_action(2.0)
-            
-        elif self.script_step == 10:
-            # Cliquer sur la barre de recherche
-            return self._click_action(0.5, 0.4)
-            
-        elif self.script_step == 11:
-            return self._wait_action(0.5)
-            
-        elif self.script_step == 12:
-            # Taper la recherche
-            return self._type_text_action("desktop automation")
-            
-        elif self.script_step == 13:
-            return self._key_press_action(['enter'])
-            
-        elif self.script_step == 14:
-            return self._wait_action(2.0)
-            
-        else:
-            self.task_completed = True
-            return self._no_op_action()
+    def _make_action(self, action_type: int, **fields: np.ndarray) -> Mapping[str, Any]:
+        """Crée une action aux tableaux en lecture seule; les champs omis partagent les valeurs par défaut."""
+        for value in fields.values():
+            value.setflags(write=False)
+        return _frozen_action(action_type, **fields)
     
-    def _click_action(self, x_norm: float, y_norm: float) -> Dict[str, np.ndarray]:
+    def _click_action(self, x_norm: float, y_norm: float) -> Mapping[str, Any]:
         """Crée une action de clic."""
-        return {
-            'action_type': 1,  # click
-            'coordinates': np.array([x_norm, y_norm], dtype=np.float32),
-            'text': np.zeros(200, dtype=np.uint8),
-            'modifiers': np.zeros(8, dtype=np.int8),
-            'key': np.zeros(1, dtype=np.uint8),
-            'scroll_direction': 1,  # none
-            'wait_time': np.zeros(1, dtype=np.float32)
-        }
+        return self._make_action(
+            1,  # click
+            coordinates=np.array([x_norm, y_norm], dtype=np.float32)
+        )
     
-    def _type_text_action(self, text: str) -> Dict[str, np.ndarray]:
+    def _type_text_action(self, text: str) -> Mapping[str, Any]:
         """Crée une action de saisie de texte."""
-        text_encoded = np.zeros(200, dtype=np.uint8)
-        text_bytes = text.encode('ascii', errors='ignore')[:200]
-        text_encoded[:len(text_bytes)] = list(text_bytes)
+        text_encoded = np.zeros(MAX_TEXT_LENGTH, dtype=np.uint8)
+        text_bytes = text.encode('ascii', errors='ignore')[:MAX_TEXT_LENGTH]
+        text_encoded[:len(text_bytes)] = np.frombuffer(text_bytes, dtype=np.uint8)
         
-        return {
-            'action_type': 4,  # type_text
-            'coordinates': np.zeros(2, dtype=np.float32),
-            'text': text_encoded,
-            'modifiers': np.zeros(8, dtype=np.int8),
-            'key': np.zeros(1, dtype=np.uint8),
-            'scroll_direction': 1,
-            'wait_time': np.zeros(1, dtype=np.float32)
-        }
+        return self._make_action(4, text=text_encoded)  # type_text
     
-    def _key_press_action(self, keys: List[str]) -> Dict[str, np.ndarray]:
+    def _key_press_action(self, keys: List[str]) -> Mapping[str, Any]:
         """Crée une action d'appui sur des touches."""
         modifiers = np.zeros(8, dtype=np.int8)
         key = np.zeros(1, dtype=np.uint8)
         
-        modifier_map = {
-            'ctrl': 0, 'alt': 1, 'shift': 2, 'win': 3,
-            'fn': 4, 'meta': 5, 'cmd': 6, 'option': 7
-        }
-        
         for k in keys:
             k_lower = k.lower()
-            if k_lower in modifier_map:
-                modifiers[modifier_map[k_lower]] = 1
-            elif k_lower == 'enter':
-                key[0] = 13
-            elif k_lower == 'space':
-                key[0] = 32
-            elif k_lower == 'tab':
-                key[0] = 9
+            if k_lower in MODIFIER_INDEX:
+                modifiers[MODIFIER_INDEX[k_lower]] = 1
+            elif k_lower in KEY_CODES:
+                key[0] = KEY_CODES[k_lower]
             elif len(k) == 1:
                 key[0] = ord(k.upper())
         
-        return {
-            'action_type': 5,  # key_press
-            'coordinates': np.zeros(2, dtype=np.float32),
-            'text': np.zeros(200, dtype=np.uint8),
-            'modifiers': modifiers,
-            'key': key,
-            'scroll_direction': 1,
-            'wait_time': np.zeros(1, dtype=np.float32)
-        }
+        return self._make_action(5, modifiers=modifiers, key=key)  # key_press
     
-    def _wait_action(self, duration: float) -> Dict[str, np.ndarray]:
+    def _wait_action(self, duration: float) -> Mapping[str, Any]:
         """Crée une action d'attente."""
-        return {
-            'action_type': 7,  # wait
-            'coordinates': np.zeros(2, dtype=np.float32),
-            'text': np.zeros(200, dtype=np.uint8),
-            'modifiers': np.zeros(8, dtype=np.int8),
-            'key': np.zeros(1, dtype=np.uint8),
-            'scroll_direction': 1,
-            'wait_time': np.array([min(1.0, duration / 5.0)], dtype=np.float32)
-        }
+        return self._make_action(
+            7,  # wait
+            wait_time=np.array([min(1.0, duration / 5.0)], dtype=np.float32)
+        )
     
-    def _no_op_action(self) -> Dict[str, np.ndarray]:
+    def _no_op_action(self) -> PolicyAction:
         """Crée une action "ne rien faire"."""
-        return {
-            'action_type': 8,  # no_op
-            'coordinates': np.zeros(2, dtype=np.float32),
-            'text': np.zeros(200, dtype=np.uint8),
-            'modifiers': np.zeros(8, dtype=np.int8),
-            'key': np.zeros(1, dtype=np.uint8),
-            'scroll_direction': 1,
-            'wait_time': np.zeros(1, dtype=np.float32)
-        }
+        return dict(_NO_OP_ACTION)
     
     def is_task_completed(self) -> bool:
         """Retourne si la tâche actuelle est terminée."""
@@ -283,4 +321,5 @@ class BaselinePolicy:
         """Remet à zéro la politique."""
         self.current_task = None
         self.script_step = 0
-        self.task_completed = False
\ No newline at end of file
+        self.task_completed = False
+        self._batch_tasks = []
\ No newline at end of file
@@ -1,7 +1,12 @@
 """Entraîneur Behavior Cloning pour apprendre à partir des démonstrations."""
 
+import json
 import logging
+import math
+import os
 import pickle
+import tempfile
+from contextlib import nullcontext
 from pathlib import Path
 from typing import List, Dict, Any, Tuple
 import numpy as np
@@ -10,8 +15,12 @@ from pydantic import BaseModel
 try:
     import torch
     import torch.nn as nn
+    import torch.nn.functional as F
     import torch.optim as optim
+    import torch.distributed as dist
+    from torch.nn.parallel import DistributedDataParallel
     from torch.utils.data import Dataset, DataLoader
+    from torch.utils.data.distributed import DistributedSampler
     HAS_TORCH = True
 except ImportError:
     HAS_TORCH = False
@@ -22,39 +31,162 @@ from packages.rl_env.observation_space import ObservationSpace
 from packages.rl_env.action_space import ActionSpace
 
 
+# Disposition du vecteur d'action cible: one-hot du type, champs continus
+# (coordonnées, texte, modificateurs, touche), one-hot du défilement, attente
+NUM_ACTION_TYPES = 9
+NUM_SCROLL_DIRECTIONS = 3
+CONTINUOUS_BEFORE_SCROLL = 61
+
+# Champs texte de l'observation: codes de caractères placés en fin de vecteur
+# (texte OCR puis fenêtre active), plongés et moyennés par le réseau
+OCR_TEXT_CHARS = 100
+WINDOW_TEXT_CHARS = 50
+TEXT_CHARS = OCR_TEXT_CHARS + WINDOW_TEXT_CHARS
+CHAR_VOCAB_SIZE = 256
+CHAR_EMBEDDING_DIM = 16
+
+# Cache des démonstrations converties, relu en mémoire mappée
+OBSERVATIONS_CACHE_FILE = "obs.npy"
+ACTIONS_CACHE_FILE = "act.npy"
+CACHE_MANIFEST_FILE = "cache_manifest.json"
+
+# Version de la disposition des features du cache: à incrémenter à chaque
+# changement de _observation_features / _action_continuous
+DEMONSTRATION_CACHE_VERSION = 1
+
+
 class BCConfig(BaseModel):
     """Configuration pour Behavior Cloning."""
-    batch_size: int = 32
+    batch_size: int = 1024
     learning_rate: float = 0.001
     num_epochs: int = 100
     validation_split: float = 0.2
     hidden_size: int = 512
     dropout: float = 0.1
     device: str = "auto"  # auto, cpu, cuda
+    distributed: bool = False  # DDP, un processus par GPU lancé via torchrun
+    accum_steps: int = 1  # Batches accumulés par pas d'optimiseur
 
 
 class DemonstrationDataset(Dataset):
     """Dataset pour les démonstrations."""
     
     def __init__(self, demonstrations: List[Dict[str, Any]]):
-        self.demonstrations = demonstrations
+        # Les démonstrations sont statiques: conversion unique en tenseurs
+        # contigus, indexés directement à chaque époque. Les actions gardent
+        # leurs indices discrets bruts; le one-hot est fait sur le device.
+        self._set_tensors(*self.tensorize(demonstrations))
+    
+    @classmethod
+    def from_tensors(cls, observations, action_types, scroll_directions, action_continuous,
+                     pin: bool = True) -> "DemonstrationDataset":
+        """
+        Construit un dataset à partir de tenseurs déjà convertis.
+        
+        Args:
+            observations: Observations aplaties (N, F)
+            action_types: Indices des types d'action (N,)
+            scroll_directions: Indices des directions de défilement (N,)
+            action_continuous: Champs continus des actions (N, C)
+            pin: Verrouiller la mémoire si CUDA est disponible
+            
+        Returns:
+            Dataset adossé aux tenseurs fournis
+        """
+        dataset = cls.__new__(cls)
+        dataset._set_tensors(observations, action_types, scroll_directions, action_continuous, pin)
+        return dataset
+    
+    @classmethod
+    def tensorize(cls, demonstrations: List[Dict[str, Any]]) -> Tuple["torch.Tensor", ...]:
+        """Convertit des démonstrations brutes en (observations, types, défilements, champs continus)."""
+        if not demonstrations:
+            return (
+                torch.empty(0),
+                torch.empty(0, dtype=torch.int64),
+                torch.empty(0, dtype=torch.int64),
+                torch.empty(0)
+            )
+        
+        # Tableaux préalloués remplis ligne à ligne: pas de petit tenseur par échantillon
+        num_samples = len(demonstrations)
+        observations = np.empty(
+            (num_samples, len(cls._observation_features(demonstrations[0]['observation']))),
+            dtype=np.float32
+        )
+        action_continuous = np.empty(
+            (num_samples, len(cls._action_continuous(demonstrations[0]['action']))),
+            dtype=np.float32
+        )
+        
+        for i, demo in enumerate(demonstrations):
+            cls._observation_features(demo['observation'], out=observations[i])
+            cls._action_continuous(demo['action'], out=action_continuous[i])
+        
+        return (
+            torch.from_numpy(observations),
+            torch.from_numpy(np.fromiter(
+                (demo['action']['action_type'] for demo in demonstrations), dtype=np.int64, count=num_samples
+            )),
+            torch.from_numpy(np.fromiter(
+                (demo['action']['scroll_direction'] for demo in demonstrations), dtype=np.int64, count=num_samples
+            )),
+            torch.from_numpy(action_continuous)
+        )
+    
+    def _set_tensors(self, observations, action_types, scroll_directions, action_continuous,
+                     pin: bool = True):
+        self.observations = observations
+        self.action_types = action_types
+        self.scroll_directions = scroll_directions
+        self.action_continuous = action_continuous
+        
+        # Mémoire verrouillée pour des copies asynchrones vers le GPU
+        if pin and torch.cuda.is_available() and len(self):
+            self.observations = self.observations.pin_memory()
+            self.action_types = self.action_types.pin_memory()
+            self.scroll_directions = self.scroll_directions.pin_memory()
+            self.action_continuous = self.action_continuous.pin_memory()
+    
+    def subset(self, indices) -> "DemonstrationDataset":
+        """Retourne un nouveau dataset restreint aux indices donnés."""
+        indices = torch.as_tensor(indices, dtype=torch.int64)
+        return DemonstrationDataset.from_tensors(
+            self.observations[indices],
+            self.action_types[indices],
+            self.scroll_directions[indices],
+            self.action_continuous[indices]
+        )
         
     def __len__(self):
-        return len(self.demonstrations)
+        return self.action_types.shape[0]
     
     def __getitem__(self, idx):
-        demo = self.demonstrations[idx]
-        
-        # Convertir l'observation en tensor
-        obs_tensor = self._observation_to_tensor(demo['observation'])
-        
-        # Convertir l'action en tensor
-        action_tensor = self._action_to_tensor(demo['action'])
-        
-        return obs_tensor, action_tensor
+        actions = (self.action_types[idx], self.scroll_directions[idx], self.action_continuous[idx])
+        return self.observations[idx], actions
+    
+    @property
+    def action_size(self) -> int:
+        """Taille du vecteur d'action complet, one-hot inclus."""
+        return NUM_ACTION_TYPES + NUM_SCROLL_DIRECTIONS + self.action_continuous.shape[-1]
     
-    def _observation_to_tensor(self, obs: Dict[str, np.ndarray]) -> torch.Tensor:
-        """Convertit une observation en tensor."""
+    @staticmethod
+    def _char_codes(values, length: int) -> np.ndarray:
+        """Codes de caractères tronqués/complétés (0 = vide) à une longueur fixe."""
+        codes = np.zeros(length, dtype=np.float32)
+        if values is not None:
+            values = np.clip(np.asarray(values)[:length], 0, CHAR_VOCAB_SIZE - 1)
+            codes[:len(values)] = values
+        return codes
+    
+    @staticmethod
+    def _observation_features(obs: Dict[str, np.ndarray], out: np.ndarray = None) -> np.ndarray:
+        """
+        Aplatit une observation en vecteur de features (écrit dans out si fourni).
+        
+        Les champs numériques viennent en premier; les TEXT_CHARS dernières
+        colonnes sont les codes de caractères (OCR puis fenêtre active).
+        """
         # Aplatir toutes les observations en un seul vecteur
         features = []
         
@@ -62,79 +194,126 @@ class DemonstrationDataset(Dataset):
         if 'screenshot' in obs:
             screenshot = obs['screenshot']
             if len(screenshot.shape) == 3:
-                # Moyenner les canaux et sous-échantillonner
-                gray = np.mean(screenshot, axis=2)
-                downsampled = gray[::8, ::8]  # Sous-échantillonner par 8
-                features.append(downsampled.flatten())
+                # Sous-échantillonner par 8 avant de moyenner les canaux:
+                # seuls les pixels conservés sont lus
+                downsampled = screenshot[::8, ::8].mean(axis=2)
+                features.append(downsampled.ravel())
         
         # UI elements
         if 'ui_elements' in obs:
             features.append(obs['ui_elements'].flatten())
         
-        # OCR text (prendre seulement les premiers caractères)
-        if 'ocr_text' in obs:
-            features.append(obs['ocr_text'][:100])  # Limiter à 100 caractères
-        
         # Mouse position
         if 'mouse_position' in obs:
             features.append(obs['mouse_position'])
         
-        # Active window (premiers caractères)
-        if 'active_window' in obs:
-            features.append(obs['active_window'][:50])
-        
         # Step count et last action success
         if 'step_count' in obs:
             features.append(obs['step_count'])
         if 'last_action_success' in obs:
             features.append(obs['last_action_success'])
         
-        # Concaténer toutes les features
-        combined = np.concatenate(features)
+        # Texte OCR et fenêtre active (premiers caractères)
+        features.append(DemonstrationDataset._char_codes(obs.get('ocr_text'), OCR_TEXT_CHARS))
+        features.append(DemonstrationDataset._char_codes(obs.get('active_window'), WINDOW_TEXT_CHARS))
         
-        return torch.FloatTensor(combined)
+        # Concaténer toutes les features
+        return np.concatenate(features, out=out)
     
-    def _action_to_tensor(self, action: Dict[str, np.ndarray]) -> torch.Tensor:
-        """Convertit une action en tensor."""
-        features = []
-        
-        # Action type (one-hot encoding)
-        action_type = np.zeros(9)  # 9 types d'actions
-        action_type[int(action['action_type'])] = 1.0
-        features.append(action_type)
-        
-        # Coordinates
-        features.append(action['coordinates'])
-        
-        # Text (premiers caractères)
-        features.append(action['text'][:50])
-        
-        # Modifiers
-        features.append(action['modifiers'].astype(np.float32))
-        
-        # Key
-        features.append(action['key'].astype(np.float32))
-        
-        # Scroll direction (one-hot)
-        scroll = np.zeros(3)
-        scroll[int(action['scroll_direction'])] = 1.0
-        features.append(scroll)
-        
-        # Wait time
-        features.append(action['wait_time'])
-        
-        combined = np.concatenate(features)
-        return torch.FloatTensor(combined)
+    @staticmethod
+    def _action_continuous(action: Dict[str, np.ndarray], out: np.ndarray = None) -> np.ndarray:
+        """Champs continus d'une action (écrits dans out si fourni)."""
+        return np.concatenate([
+            action['coordinates'],
+            action['text'][:50],  # Premiers caractères
+            action['modifiers'],
+            action['key'],
+            action['wait_time']
+        ], out=out)
+
+
+def assemble_action_vector(
+    type_part: "torch.Tensor",
+    scroll_part: "torch.Tensor",
+    continuous: "torch.Tensor"
+) -> "torch.Tensor":
+    """
+    Assemble le vecteur d'action complet à partir de ses trois composantes.
+    
+    Args:
+        type_part: Distribution sur les types d'action (batch, 9)
+        scroll_part: Distribution sur les directions de défilement (batch, 3)
+        continuous: Champs continus (batch, n)
+        
+    Returns:
+        Vecteur [type, coordonnées, texte, modificateurs, touche, défilement, attente]
+    """
+    return torch.cat([
+        type_part,
+        continuous[:, :CONTINUOUS_BEFORE_SCROLL],
+        scroll_part,
+        continuous[:, CONTINUOUS_BEFORE_SCROLL:]
+    ], dim=1)
+
+
+class MappedDemonstrationDataset(DemonstrationDataset):
+    """
+    Démonstrations relues du cache .npy en mémoire mappée.
+    
+    Les lignes sont lues à la demande: subset() ne conserve que des indices,
+    sans charger les tableaux en mémoire.
+    """
+    
+    def __init__(self, observations: np.ndarray, actions: np.ndarray, rows: np.ndarray = None):
+        self._observations = observations
+        self._actions = actions
+        self._rows = np.arange(len(actions)) if rows is None else rows
+    
+    @property
+    def observations(self) -> np.ndarray:
+        return self._observations
+    
+    @property
+    def action_continuous(self) -> np.ndarray:
+        return self._actions[:, 2:]
+    
+    def subset(self, indices) -> "MappedDemonstrationDataset":
+        """Retourne une vue restreinte aux indices donnés (relatifs à ce dataset)."""
+        return MappedDemonstrationDataset(
+            self._observations, self._actions, self._rows[np.asarray(indices, dtype=np.int64)]
+        )
+    
+    def __len__(self):
+        return len(self._rows)
+    
+    def __getitem__(self, idx):
+        row = self._rows[idx]
+        action = self._actions[row]
+        actions = (
+            torch.tensor(int(action[0])),
+            torch.tensor(int(action[1])),
+            torch.from_numpy(np.array(action[2:]))
+        )
+        return torch.from_numpy(np.array(self._observations[row])), actions
 
 
 class BCNetwork(nn.Module):
-    """Réseau de neurones pour Behavior Cloning."""
+    """
+    Réseau de neurones pour Behavior Cloning.
+    
+    Tronc partagé et trois têtes: type d'action et direction de défilement
+    (classification), champs continus (régression). Les codes de caractères
+    en fin d'observation passent par un plongement moyenné par champ.
+    """
     
     def __init__(self, input_size: int, output_size: int, hidden_size: int = 512, dropout: float = 0.1):
         super().__init__()
         
-        self.network = nn.Sequential(
-            nn.Linear(input_size, hidden_size),
+        self.char_embedding = nn.Embedding(CHAR_VOCAB_SIZE, CHAR_EMBEDDING_DIM, padding_idx=0)
+        trunk_input_size = input_size - TEXT_CHARS + 2 * CHAR_EMBEDDING_DIM
+        
+        self.trunk = nn.Sequential(
+            nn.Linear(trunk_input_size, hidden_size),
             nn.ReLU(),
             nn.Dropout(dropout),
             
@@ -144,13 +323,87 @@ class BCNetwork(nn.Module):
             
             nn.Linear(hidden_size, hidden_size // 2),
             nn.ReLU(),
-            nn.Dropout(dropout),
-            
-            nn.Linear(hidden_size // 2, output_size)
+            nn.Dropout(dropout)
+        )
+        
+        continuous_size = output_size - NUM_ACTION_TYPES - NUM_SCROLL_DIRECTIONS
+        self.head_action = nn.Linear(hidden_size // 2, NUM_ACTION_TYPES)
+        self.head_scroll = nn.Linear(hidden_size // 2, NUM_SCROLL_DIRECTIONS)
+        self.head_continuous = nn.Linear(hidden_size // 2, continuous_size)
+    
+    def forward_heads(self, x) -> Tuple["torch.Tensor", "torch.Tensor", "torch.Tensor"]:
+        """Retourne (logits type d'action, logits défilement, champs continus)."""
+        chars = x[:, -TEXT_CHARS:].long()
+        features = self.trunk(torch.cat([
+            x[:, :-TEXT_CHARS],
+            self._pool_chars(chars[:, :OCR_TEXT_CHARS]),
+            self._pool_chars(chars[:, OCR_TEXT_CHARS:])
+        ], dim=1))
+        return self.head_action(features), self.head_scroll(features), self.head_continuous(features)
+    
+    def _pool_chars(self, codes: "torch.Tensor") -> "torch.Tensor":
+        """Moyenne des plongements des caractères non vides d'un champ texte."""
+        embedded = self.char_embedding(codes)
+        mask = (codes != 0).unsqueeze(-1).to(embedded.dtype)
+        return (embedded * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+    
+    def forward(self, x, heads: bool = False):
+        # heads=True passe par forward() pour rester compatible avec DDP
+        if heads:
+            return self.forward_heads(x)
+        
+        action_logits, scroll_logits, continuous = self.forward_heads(x)
+        return assemble_action_vector(
+            F.softmax(action_logits, dim=1),
+            F.softmax(scroll_logits, dim=1),
+            continuous
         )
+
+
+class CudaPrefetcher:
+    """
+    Itère sur un DataLoader en copiant le batch suivant vers le GPU sur un
+    stream dédié, pendant que le batch courant est traité.
+    """
+    
+    def __init__(self, loader: "DataLoader", device: "torch.device"):
+        self.loader = loader
+        self.device = device
+        self.stream = torch.cuda.Stream(device=device)
+    
+    def __len__(self):
+        return len(self.loader)
+    
+    def __iter__(self):
+        iterator = iter(self.loader)
+        batch = self._preload(iterator)
+        
+        while batch is not None:
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_stream(self.stream)
+            
+            # Les tenseurs alloués sur le stream de copie sont utilisés sur le stream courant
+            observations, action_fields = batch
+            observations.record_stream(current_stream)
+            for field in action_fields:
+                field.record_stream(current_stream)
+            
+            next_batch = self._preload(iterator)
+            yield batch
+            batch = next_batch
     
-    def forward(self, x):
-        return self.network(x)
+    def _preload(self, iterator):
+        """Lance la copie asynchrone du batch suivant, ou retourne None en fin d'époque."""
+        try:
+            observations, action_fields = next(iterator)
+        except StopIteration:
+            return None
+        
+        with torch.cuda.stream(self.stream):
+            return (
+                observations.to(self.device, non_blocking=True),
+                tuple(field.to(self.device, non_blocking=True) for field in action_fields)
+            )
 
 
 class BehaviorCloningTrainer:
@@ -170,26 +423,69 @@ class BehaviorCloningTrainer:
         else:
             self.device = torch.device(self.bc_config.device)
         
+        # Entraînement distribué: le groupe de processus est initialisé par l'appelant
+        self.distributed = self.bc_config.distributed and dist.is_available() and dist.is_initialized()
+        if self.bc_config.distributed and not self.distributed:
+            self.logger.warning("distributed=True mais torch.distributed n'est pas initialisé, entraînement local")
+        
+        self.local_rank = int(os.environ.get("LOCAL_RANK", 0))
+        if self.distributed and self.device.type == 'cuda':
+            self.device = torch.device("cuda", self.local_rank)
+            torch.cuda.set_device(self.device)
+        
+        self.is_main_process = not self.distributed or dist.get_rank() == 0
+        self.train_sampler = None
+        
         self.logger.info(f"Utilisation du device: {self.device}")
         
         # Réseau et optimiseur
         self.network = None
         self.optimizer = None
-        self.criterion = nn.MSELoss()
+        self.scheduler = None
+        self.continuous_criterion = nn.SmoothL1Loss()
+        
+        # Précision mixte (FP16) sur GPU; sans effet sur CPU
+        self.use_amp = self.device.type == 'cuda'
+        if hasattr(torch.amp, 'GradScaler'):
+            self.scaler = torch.amp.GradScaler(self.device.type, enabled=self.use_amp)
+        else:
+            # torch < 2.3: seul le GradScaler CUDA existe
+            self.scaler = torch.cuda.amp.GradScaler(enabled=self.use_amp)
         
         # Métriques
         self.training_losses = []
         self.validation_losses = []
     
-    def load_demonstrations(self, demo_dir: Path) -> List[Dict[str, Any]]:
-        """Charge les démonstrations depuis un dossier."""
+    def load_demonstrations(self, demo_dir: Path) -> DemonstrationDataset:
+        """
+        Charge les démonstrations depuis un dossier.
+        
+        Chaque fichier est converti en tenseurs dès sa lecture puis libéré:
+        les captures d'écran brutes ne sont jamais toutes en mémoire.
+        
+        Args:
+            demo_dir: Dossier contenant les fichiers .pkl
+            
+        Returns:
+            Dataset de toutes les démonstrations valides
+        """
         
         demo_files = list(demo_dir.glob("*.pkl"))
         
         if not demo_files:
             raise TrainingError(f"Aucune démonstration trouvée dans {demo_dir}")
         
-        demonstrations = []
+        manifest = self._cache_manifest(demo_files)
+        cached = self._load_cached_demonstrations(demo_dir, manifest)
+        
+        # Tous les rangs ont consulté le cache avant que le rang 0 ne le réécrive
+        if self.distributed:
+            dist.barrier()
+        
+        if cached is not None:
+            return cached
+        
+        chunks = []
         
         for demo_file in demo_files:
             try:
@@ -197,64 +493,172 @@ class BehaviorCloningTrainer:
                     demo_data = pickle.load(f)
                 
                 # Vérifier le format
-                if 'episodes' in demo_data:
-                    for episode in demo_data['episodes']:
-                        for step in episode['steps']:
-                            if 'observation' in step and 'action' in step:
-                                demonstrations.append({
-                                    'observation': step['observation'],
-                                    'action': step['action'],
-                                    'reward': step.get('reward', 0.0)
-                                })
+                steps = [
+                    step
+                    for episode in demo_data.get('episodes', [])
+                    for step in episode['steps']
+                    if 'observation' in step and 'action' in step
+                ]
+                if steps:
+                    chunks.append(DemonstrationDataset.tensorize(steps))
                 
                 self.logger.info(f"Chargé {len(demo_data.get('episodes', []))} épisodes de {demo_file}")
                 
+                del demo_data, steps
+                
             except Exception as e:
                 self.logger.warning(f"Erreur lors du chargement de {demo_file}: {e}")
         
-        self.logger.info(f"Total: {len(demonstrations)} démonstrations chargées")
-        
-        if not demonstrations:
+        if not chunks:
             raise TrainingError("Aucune démonstration valide trouvée")
         
-        return demonstrations
+        dataset = DemonstrationDataset.from_tensors(
+            *(torch.cat(parts) for parts in zip(*chunks)),
+            pin=False
+        )
+        
+        self.logger.info(f"Total: {len(dataset)} démonstrations chargées")
+        
+        if self.is_main_process:
+            self._write_demonstration_cache(demo_dir, dataset, manifest)
+        if self.distributed:
+            dist.barrier()
+        
+        return dataset
+    
+    @staticmethod
+    def _cache_manifest(demo_files: List[Path]) -> Dict[str, Any]:
+        """Décrit le cache attendu: version des features et (nom, mtime, taille) des sources."""
+        sources = []
+        for demo_file in sorted(demo_files):
+            stat = demo_file.stat()
+            sources.append([demo_file.name, stat.st_mtime_ns, stat.st_size])
+        return {"version": DEMONSTRATION_CACHE_VERSION, "sources": sources}
     
-    def prepare_data(self, demonstrations: List[Dict[str, Any]]) -> Tuple[DataLoader, DataLoader]:
+    def _load_cached_demonstrations(self, demo_dir: Path, manifest: Dict[str, Any]):
+        """
+        Relit les démonstrations converties depuis le cache .npy, en mémoire mappée.
+        
+        Args:
+            demo_dir: Dossier des démonstrations
+            manifest: Manifeste attendu (version des features et sources .pkl)
+            
+        Returns:
+            Dataset mappé, ou None si le cache est absent ou ne correspond pas
+            exactement au manifeste (version, source ajoutée, modifiée ou supprimée)
+        """
+        manifest_path = demo_dir / CACHE_MANIFEST_FILE
+        
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                if json.load(f) != manifest:
+                    return None
+            
+            # Lecture seule: les lignes sont copiées à l'indexation
+            observations = np.load(demo_dir / OBSERVATIONS_CACHE_FILE, mmap_mode='r')
+            actions = np.load(demo_dir / ACTIONS_CACHE_FILE, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Cache de démonstrations illisible, reconstruction: {e}")
+            return None
+        
+        if len(observations) != len(actions):
+            return None
+        
+        self.logger.info(f"Total: {len(observations)} démonstrations chargées depuis le cache")
+        
+        return MappedDemonstrationDataset(observations, actions)
+    
+    def _write_demonstration_cache(self, demo_dir: Path, dataset: DemonstrationDataset,
+                                   manifest: Dict[str, Any]):
+        """
+        Écrit les tenseurs du dataset dans le cache .npy (type, défilement, continus dans act.npy).
+        
+        Le manifeste est supprimé avant et écrit en dernier: un cache partiel
+        n'est jamais considéré comme valide.
+        """
+        actions = np.concatenate([
+            dataset.action_types.numpy()[:, None].astype(np.float32),
+            dataset.scroll_directions.numpy()[:, None].astype(np.float32),
+            dataset.action_continuous.numpy()
+        ], axis=1)
+        
+        try:
+            (demo_dir / CACHE_MANIFEST_FILE).unlink(missing_ok=True)
+            
+            for filename, array in ((OBSERVATIONS_CACHE_FILE, dataset.observations.numpy()),
+                                    (ACTIONS_CACHE_FILE, actions)):
+                self._atomic_write(demo_dir, filename, lambda f, array=array: np.save(f, array))
+            
+            self._atomic_write(
+                demo_dir, CACHE_MANIFEST_FILE,
+                lambda f: f.write(json.dumps(manifest).encode('utf-8'))
+            )
+        except OSError as e:
+            self.logger.warning(f"Impossible d'écrire le cache de démonstrations: {e}")
+    
+    @staticmethod
+    def _atomic_write(directory: Path, filename: str, write) -> None:
+        """Écrit un fichier via un temporaire au nom unique puis un renommage atomique."""
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=f".{filename}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_name, directory / filename)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    
+    def prepare_data(self, dataset: DemonstrationDataset) -> Tuple[DataLoader, DataLoader]:
         """Prépare les données d'entraînement et de validation."""
         
-        # Mélanger les démonstrations
-        np.random.shuffle(demonstrations)
+        # Mélanger les indices, pas les données (graine commune en distribué
+        # pour que tous les rangs obtiennent le même découpage train/validation)
+        if self.distributed:
+            indices = np.random.RandomState(0).permutation(len(dataset))
+        else:
+            indices = np.random.permutation(len(dataset))
         
         # Diviser en train/validation
-        split_idx = int(len(demonstrations) * (1 - self.bc_config.validation_split))
-        train_demos = demonstrations[:split_idx]
-        val_demos = demonstrations[split_idx:]
+        split_idx = int(len(dataset) * (1 - self.bc_config.validation_split))
+        train_dataset = dataset.subset(indices[:split_idx])
+        val_dataset = dataset.subset(indices[split_idx:])
         
-        # Créer les datasets
-        train_dataset = DemonstrationDataset(train_demos)
-        val_dataset = DemonstrationDataset(val_demos)
+        # Créer les dataloaders (chaque rang ne voit que sa part du train)
+        self.train_sampler = DistributedSampler(train_dataset) if self.distributed else None
         
-        # Créer les dataloaders
         train_loader = DataLoader(
             train_dataset,
             batch_size=self.bc_config.batch_size,
-            shuffle=True,
-            num_workers=0  # Éviter les problèmes de multiprocessing
+            shuffle=self.train_sampler is None,
+            sampler=self.train_sampler,
+            num_workers=0,  # Éviter les problèmes de multiprocessing
+            pin_memory=torch.cuda.is_available()
         )
         
         val_loader = DataLoader(
             val_dataset,
             batch_size=self.bc_config.batch_size,
             shuffle=False,
-            num_workers=0
+            num_workers=0,
+            pin_memory=torch.cuda.is_available()
         )
         
-        self.logger.info(f"Données préparées: {len(train_demos)} train, {len(val_demos)} validation")
+        self.logger.info(f"Données préparées: {len(train_dataset)} train, {len(val_dataset)} validation")
         
         return train_loader, val_loader
     
-    def initialize_network(self, input_size: int, output_size: int):
-        """Initialise le réseau de neurones."""
+    def initialize_network(self, input_size: int, output_size: int, steps_per_epoch: int = None):
+        """
+        Initialise le réseau de neurones.
+        
+        Args:
+            input_size: Taille du vecteur d'observation
+            output_size: Taille du vecteur d'action
+            steps_per_epoch: Nombre de batches par époque; active le
+                planning OneCycleLR s'il est fourni
+        """
         
         self.network = BCNetwork(
             input_size=input_size,
@@ -263,35 +667,89 @@ class BehaviorCloningTrainer:
             dropout=self.bc_config.dropout
         ).to(self.device)
         
-        self.optimizer = optim.Adam(
-            self.network.parameters(),
-            lr=self.bc_config.learning_rate
-        )
+        if self.distributed:
+            device_ids = [self.local_rank] if self.device.type == 'cuda' else None
+            self.network = DistributedDataParallel(self.network, device_ids=device_ids)
+        
+        if self.device.type == 'cuda' and hasattr(torch, 'compile'):
+            self._compile_network(input_size)
+        
+        self.optimizer = self._create_optimizer()
+        
+        if steps_per_epoch:
+            self.scheduler = optim.lr_scheduler.OneCycleLR(
+                self.optimizer,
+                max_lr=self.bc_config.learning_rate,
+                steps_per_epoch=steps_per_epoch,
+                epochs=self.bc_config.num_epochs
+            )
         
         self.logger.info(f"Réseau initialisé: {input_size} -> {output_size}")
     
+    def _create_optimizer(self) -> "optim.Optimizer":
+        """Crée l'optimiseur Adam, en version fusionnée (un seul noyau) sur GPU."""
+        parameters = list(self.network.parameters())
+        
+        if self.device.type == 'cuda':
+            try:
+                return optim.Adam(parameters, lr=self.bc_config.learning_rate, fused=True)
+            except (TypeError, RuntimeError):
+                # Version de torch sans Adam fusionné
+                return optim.Adam(parameters, lr=self.bc_config.learning_rate, foreach=True)
+        
+        return optim.Adam(parameters, lr=self.bc_config.learning_rate)
+    
+    def _compile_network(self, input_size: int):
+        """
+        Compile le réseau avec torch.compile (fusion des noyaux, CUDA graphs).
+        
+        La compilation est paresseuse: un batch factice la déclenche ici, et
+        le réseau eager est conservé si elle échoue.
+        
+        Args:
+            input_size: Taille du vecteur d'observation
+        """
+        eager_network = self.network
+        
+        try:
+            self.network = torch.compile(eager_network, mode='reduce-overhead', fullgraph=True)
+            
+            dummy = torch.zeros(self.bc_config.batch_size, input_size, device=self.device)
+            with torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.use_amp):
+                self.network(dummy, heads=True)
+            
+            self.logger.info("Réseau compilé avec torch.compile")
+        except Exception as e:
+            self.logger.warning(f"torch.compile indisponible, exécution eager: {e}")
+            self.network = eager_network
+    
     def train(self, demo_dir: Path, model_save_path: Path = None) -> Dict[str, Any]:
         """Entraîne le modèle BC."""
         
         # Charger les démonstrations
-        demonstrations = self.load_demonstrations(demo_dir)
+        dataset = self.load_demonstrations(demo_dir)
         
         # Préparer les données
-        train_loader, val_loader = self.prepare_data(demonstrations)
+        train_loader, val_loader = self.prepare_data(dataset)
         
         # Déterminer les tailles d'entrée et de sortie
-        sample_obs, sample_action = train_loader.dataset[0]
-        input_size = sample_obs.shape[0]
-        output_size = sample_action.shape[0]
+        input_size = train_loader.dataset.observations.shape[1]
+        output_size = train_loader.dataset.action_size
         
         # Initialiser le réseau
-        self.initialize_network(input_size, output_size)
+        self.initialize_network(
+            input_size, output_size,
+            steps_per_epoch=math.ceil(len(train_loader) / self.bc_config.accum_steps)
+        )
         
         # Entraînement
         best_val_loss = float('inf')
         
         for epoch in range(self.bc_config.num_epochs):
             
+            if self.train_sampler is not None:
+                self.train_sampler.set_epoch(epoch)
+            
             # Phase d'entraînement
             train_loss = self._train_epoch(train_loader)
             
@@ -305,7 +763,7 @@ class BehaviorCloningTrainer:
             # Sauvegarder le meilleur modèle
             if val_loss < best_val_loss:
                 best_val_loss = val_loss
-                if model_save_path:
+                if model_save_path and self.is_main_process:
                     self._save_model(model_save_path)
             
             # Logging
@@ -321,57 +779,102 @@ class BehaviorCloningTrainer:
             'final_val_loss': self.validation_losses[-1],
             'best_val_loss': best_val_loss,
             'num_epochs': self.bc_config.num_epochs,
-            'num_demonstrations': len(demonstrations)
+            'num_demonstrations': len(dataset)
         }
         
         self.logger.info(f"Entraînement terminé. Meilleure loss validation: {best_val_loss:.4f}")
         
         return results
     
+    def _device_batches(self, loader: DataLoader):
+        """Itère sur les batches, préchargés sur un stream CUDA si disponible."""
+        if self.device.type == 'cuda':
+            return CudaPrefetcher(loader, self.device)
+        return loader
+    
+    def _compute_loss(self, observations, action_fields) -> "torch.Tensor":
+        """Perte combinée: entropie croisée sur les têtes discrètes, SmoothL1 sur le reste."""
+        # Copies asynchrones depuis la mémoire verrouillée (sans effet si le
+        # batch a déjà été préchargé sur le device)
+        observations = observations.to(self.device, non_blocking=True)
+        action_types, scroll_directions, continuous = (
+            field.to(self.device, non_blocking=True) for field in action_fields
+        )
+        
+        with torch.autocast(device_type=self.device.type, dtype=torch.float16, enabled=self.use_amp):
+            action_logits, scroll_logits, predicted_continuous = self.network(observations, heads=True)
+            
+            # Les pertes sont calculées en FP32 par autocast
+            return (
+                F.cross_entropy(action_logits, action_types) +
+                F.cross_entropy(scroll_logits, scroll_directions) +
+                self.continuous_criterion(predicted_continuous, continuous)
+            )
+    
     def _train_epoch(self, train_loader: DataLoader) -> float:
         """Entraîne une époque."""
         
         self.network.train()
-        total_loss = 0.0
+        # Accumulation sur le device: une seule synchronisation par époque
+        total_loss = torch.zeros((), device=self.device)
         num_batches = 0
         
-        for observations, actions in train_loader:
-            observations = observations.to(self.device)
-            actions = actions.to(self.device)
+        accum_steps = self.bc_config.accum_steps
+        last_batch = len(train_loader) - 1
+        ddp_network = getattr(self.network, '_orig_mod', self.network)
+        is_ddp = isinstance(ddp_network, DistributedDataParallel)
+        
+        self.optimizer.zero_grad(set_to_none=True)
+        
+        for batch_idx, (observations, action_fields) in enumerate(self._device_batches(train_loader)):
+            update_step = (batch_idx + 1) % accum_steps == 0 or batch_idx == last_batch
+            
+            # Hors pas d'optimiseur, pas d'allreduce DDP: les gradients
+            # s'accumulent localement (forward inclus dans no_sync)
+            sync_context = ddp_network.no_sync() if is_ddp and not update_step else nullcontext()
             
-            # Forward pass
-            predicted_actions = self.network(observations)
-            loss = self.criterion(predicted_actions, actions)
+            with sync_context:
+                # Forward pass
+                loss = self._compute_loss(observations, action_fields)
+                
+                # Backward pass
+                self.scaler.scale(loss / accum_steps).backward()
             
-            # Backward pass
-            self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            if update_step:
+                self.scaler.step(self.optimizer)
+                self.scaler.update()
+                self.optimizer.zero_grad(set_to_none=True)
+                
+                if self.scheduler is not None:
+                    self.scheduler.step()
             
-            total_loss += loss.item()
+            total_loss += loss.detach()
             num_batches += 1
         
-        return total_loss / num_batches
+        return (total_loss / num_batches).item()
     
     def _validate_epoch(self, val_loader: DataLoader) -> float:
         """Valide une époque."""
         
         self.network.eval()
-        total_loss = 0.0
+        total_loss = torch.zeros((), device=self.device)
         num_batches = 0
         
-        with torch.no_grad():
-            for observations, actions in val_loader:
-                observations = observations.to(self.device)
-                actions = actions.to(self.device)
+        with torch.inference_mode():
+            for observations, action_fields in self._device_batches(val_loader):
+                loss = self._compute_loss(observations, action_fields)
                 
-                predicted_actions = self.network(observations)
-                loss = self.criterion(predicted_actions, actions)
-                
-                total_loss += loss.item()
+                total_loss += loss
                 num_batches += 1
         
-        return total_loss / num_batches
+        return (total_loss / num_batches).item()
+    
+    def _unwrapped_network(self) -> "BCNetwork":
+        """Retourne le BCNetwork sous-jacent (sans les enveloppes torch.compile et DDP)."""
+        network = getattr(self.network, '_orig_mod', self.network)
+        if isinstance(network, DistributedDataParallel):
+            return network.module
+        return network
     
     def _save_model(self, save_path: Path):
         """Sauvegarde le modèle."""
@@ -379,7 +882,7 @@ class BehaviorCloningTrainer:
         save_path.parent.mkdir(parents=True, exist_ok=True)
         
         torch.save({
-            'model_state_dict': self.network.state_dict(),
+            'model_state_dict': self._unwrapped_network().state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
             'config': self.bc_config,
             'training_losses': self.training_losses,
@@ -398,7 +901,7 @@ class BehaviorCloningTrainer:
         
         # Recréer le réseau avec la bonne architecture
         # Note: Il faudrait sauvegarder les tailles aussi
-        self.network.load_state_dict(checkpoint['model_state_dict'])
+        self._unwrapped_network().load_state_dict(checkpoint['model_state_dict'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         
         self.training_losses = checkpoint.get('training_losses', [])
@@ -407,18 +910,30 @@ class BehaviorCloningTrainer:
         self.logger.info(f"Modèle chargé: {model_path}")
     
     def predict(self, observation: torch.Tensor) -> torch.Tensor:
-        """Prédit une action à partir d'une observation."""
+        """Prédit une action à partir d'une observation (ou d'un batch d'observations)."""
+        
+        if observation.dim() == 1:
+            observation = observation.unsqueeze(0)  # Ajouter batch dimension
+        
+        return self.predict_batch(observation)
+    
+    def predict_batch(self, observations: torch.Tensor) -> torch.Tensor:
+        """
+        Prédit les actions d'un batch d'observations en un seul forward.
+        
+        Args:
+            observations: Observations aplaties (batch, F)
+            
+        Returns:
+            Vecteurs d'action prédits (batch, taille d'action), sur CPU
+        """
         
         if self.network is None:
             raise TrainingError("Modèle non initialisé")
         
         self.network.eval()
         
-        with torch.no_grad():
-            observation = observation.to(self.device)
-            if len(observation.shape) == 1:
-                observation = observation.unsqueeze(0)  # Ajouter batch dimension
-            
-            predicted_action = self.network(observation)
+        with torch.inference_mode():
+            predicted_actions = self.network(observations.to(self.device, non_blocking=True))
             
-            return predicted_action.cpu()
\ No newline at end of file
+            return predicted_actions.cpu()
\ No newline at end of file
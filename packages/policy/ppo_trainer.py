@@ -1,6 +1,7 @@
 """Entraîneur PPO pour l'apprentissage par renforcement."""
 
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 import numpy as np
@@ -8,10 +9,11 @@ from pydantic import BaseModel
 
 try:
     from stable_baselines3 import PPO
-    from stable_baselines3.common.env_util import make_vec_env
     from stable_baselines3.common.callbacks import CheckpointCallback, EvalCallback
+    from stable_baselines3.common.evaluation import evaluate_policy
     from stable_baselines3.common.monitor import Monitor
-    from stable_baselines3.common.vec_env import DummyVecEnv
+    from stable_baselines3.common.buffers import DictRolloutBuffer
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecEnv
     HAS_SB3 = True
 except ImportError:
     HAS_SB3 = False
@@ -21,6 +23,36 @@ from packages.common.errors import TrainingError
 from packages.rl_env import DesktopAgentEnv
 
 
+if HAS_SB3:
+    class CompactDictRolloutBuffer(DictRolloutBuffer):
+        """
+        DictRolloutBuffer qui conserve le dtype de chaque sous-espace.
+        
+        Le buffer de SB3 stocke toutes les observations en float32; ici les
+        captures d'écran et textes restent en uint8 (4x moins de mémoire et
+        de transfert vers le GPU). La politique les convertit en float (et
+        normalise les images par 1/255) sur le device.
+        """
+        
+        def reset(self) -> None:
+            # Allocation des observations par le parent court-circuitée pour
+            # éviter un pic mémoire en float32
+            obs_shape = self.obs_shape
+            self.obs_shape = {}
+            try:
+                super().reset()
+            finally:
+                self.obs_shape = obs_shape
+            
+            self.observations = {
+                key: np.zeros(
+                    (self.buffer_size, self.n_envs, *shape),
+                    dtype=self.observation_space.spaces[key].dtype
+                )
+                for key, shape in obs_shape.items()
+            }
+
+
 class PPOConfig(BaseModel):
     """Configuration pour PPO."""
     learning_rate: float = 3e-4
@@ -37,6 +69,9 @@ class PPOConfig(BaseModel):
     eval_freq: int = 5000
     save_freq: int = 10000
     device: str = "auto"
+    # Environnements de collecte, chacun dans son propre processus. Opt-in
+    # réservé à la simulation: avec un agent réel, tous piloteraient le même bureau
+    n_envs: int = 1
 
 
 class PPOTrainer:
@@ -58,18 +93,39 @@ class PPOTrainer:
         # Métriques
         self.training_metrics = []
     
-    def create_environment(self, agent_service=None, n_envs: int = 1) -> DummyVecEnv:
-        """Crée l'environnement d'entraînement."""
+    def create_environment(self, agent_service=None, n_envs: int = 1) -> VecEnv:
+        """
+        Crée l'environnement d'entraînement.
+        
+        Avec plusieurs environnements, chacun tourne dans un sous-processus
+        (SubprocVecEnv) pour que les steps s'exécutent en parallèle hors du GIL.
+        Ce mode est réservé à la simulation (sans agent_service): des
+        environnements concurrents sur le même bureau mélangeraient leurs
+        actions souris/clavier.
+        
+        Args:
+            agent_service: Service agent transmis à chaque environnement
+            n_envs: Nombre d'environnements parallèles
+            
+        Returns:
+            Environnement vectorisé
+        """
         
         def make_env():
             env = DesktopAgentEnv(agent_service=agent_service)
             env = Monitor(env)  # Pour le logging des métriques
             return env
         
+        if agent_service is not None and n_envs > 1:
+            self.logger.warning(
+                "Agent réel: un seul environnement (%d demandés), le bureau est partagé", n_envs
+            )
+            n_envs = 1
+        
         if n_envs == 1:
             env = DummyVecEnv([make_env])
         else:
-            env = make_vec_env(make_env, n_envs=n_envs)
+            env = SubprocVecEnv([make_env for _ in range(n_envs)], start_method='spawn')
         
         return env
     
@@ -97,6 +153,7 @@ class PPOTrainer:
                 vf_coef=self.ppo_config.vf_coef,
                 max_grad_norm=self.ppo_config.max_grad_norm,
                 device=self.ppo_config.device,
+                rollout_buffer_class=CompactDictRolloutBuffer,
                 verbose=1
             )
     
@@ -141,7 +198,7 @@ class PPOTrainer:
             model_save_dir.mkdir(parents=True, exist_ok=True)
         
         # Créer les environnements
-        self.env = self.create_environment(agent_service, n_envs=1)
+        self.env = self.create_environment(agent_service, n_envs=self.ppo_config.n_envs)
         self.eval_env = self.create_environment(agent_service, n_envs=1)
         
         # Initialiser le modèle
@@ -192,42 +249,41 @@ class PPOTrainer:
                  model_path: Path,
                  agent_service=None,
                  n_eval_episodes: int = 10) -> Dict[str, Any]:
-        """Évalue un modèle entraîné."""
+        """Évalue un modèle entraîné, les épisodes étant répartis sur des environnements parallèles."""
         
         if not model_path.exists():
             raise TrainingError(f"Modèle non trouvé: {model_path}")
         
-        # Créer l'environnement d'évaluation
-        eval_env = self.create_environment(agent_service, n_envs=1)
+        # Créer l'environnement d'évaluation (parallèle en simulation seulement:
+        # un agent réel pilote un unique bureau)
+        if agent_service is not None:
+            n_envs = 1
+        else:
+            n_envs = max(1, min(n_eval_episodes, os.cpu_count() or 1))
+        eval_env = self.create_environment(agent_service, n_envs=n_envs)
         
         # Charger le modèle
         model = PPO.load(str(model_path))
         
         # Évaluation
-        episode_rewards = []
-        episode_lengths = []
         success_count = 0
         
-        for episode in range(n_eval_episodes):
-            obs = eval_env.reset()
-            episode_reward = 0
-            episode_length = 0
-            done = False
-            
-            while not done:
-                action, _ = model.predict(obs, deterministic=True)
-                obs, reward, done, info = eval_env.step(action)
-                
-                episode_reward += reward[0]
-                episode_length += 1
-                
-                # Vérifier le succès
-                if info[0].get('task_completed', False):
-                    success_count += 1
-            
-            episode_rewards.append(episode_reward)
-            episode_lengths.append(episode_length)
-            
+        def count_success(locals_: Dict[str, Any], globals_: Dict[str, Any]):
+            # Appelé à chaque step des épisodes comptabilisés
+            nonlocal success_count
+            if locals_['done'] and locals_['info'].get('task_completed', False):
+                success_count += 1
+        
+        episode_rewards, episode_lengths = evaluate_policy(
+            model,
+            eval_env,
+            n_eval_episodes=n_eval_episodes,
+            deterministic=True,
+            return_episode_rewards=True,
+            callback=count_success
+        )
+        
+        for episode, (episode_reward, episode_length) in enumerate(zip(episode_rewards, episode_lengths)):
             self.logger.info(f"Épisode {episode+1}: Reward={episode_reward:.2f}, Length={episode_length}")
         
         # Calculer les métriques
@@ -1,13 +1,29 @@
 """Espace d'action pour l'environnement RL."""
 
 import numpy as np
-from typing import Dict, Any, Tuple, List
+from types import MappingProxyType
+from typing import Dict, Any, Tuple, List, Optional
 from gymnasium import spaces
 from pydantic import BaseModel
 
 from packages.common.models import Action, ActionType
 
 
+MODIFIER_NAMES = ('ctrl', 'alt', 'shift', 'win', 'fn', 'meta', 'cmd', 'option')
+
+# Noms des modificateurs pour chaque octet de bits (bit de poids fort = ctrl)
+_MODIFIER_TABLE = tuple(
+    tuple(name for i, name in enumerate(MODIFIER_NAMES) if mask & (0x80 >> i))
+    for mask in range(256)
+)
+
+# Vecteur de bits (int8) pour chaque octet de modificateurs, copié à l'encodage
+_MODIFIER_BIT_ARRAYS = tuple(
+    np.unpackbits(np.array([mask], dtype=np.uint8)).astype(np.int8)
+    for mask in range(256)
+)
+
+
 class ActionConfig(BaseModel):
     """Configuration de l'espace d'action."""
     screen_width: int = 1920
@@ -19,9 +35,20 @@ class ActionConfig(BaseModel):
 class ActionSpace:
     """Gestionnaire de l'espace d'action pour RL."""
     
+    __slots__ = ('config', 'action_types', '_action_type_ids', '_action_type_enums', '_rng', '_space')
+    
+    # Paramètres (direction, clics) par indice discret up, none, down
+    # ("none" défile d'un clic vers le bas)
+    SCROLL_PARAMS = (('up', 1), ('down', 1), ('down', 1))
+    SCROLL_DIRECTION_IDS = MappingProxyType({'up': 0, 'none': 1, 'down': 2})
+    
+    # Types d'actions paramétrés par une position
+    POINTER_ACTIONS = frozenset({'move_mouse', 'click', 'double_click', 'right_click'})
+    
+    MODIFIER_IDS = MappingProxyType({name: i for i, name in enumerate(MODIFIER_NAMES)})
+    
     def __init__(self, config: ActionConfig = None):
         self.config = config or ActionConfig()
-        self.space = self._create_action_space()
         
         # Mapping des types d'actions
         self.action_types = [
@@ -35,6 +62,22 @@ class ActionSpace:
             'wait',
             'no_op'
         ]
+        self._action_type_ids = {name: i for i, name in enumerate(self.action_types)}
+        self._action_type_enums = tuple(self._to_action_type(name) for name in self.action_types)
+        
+        # Générateur dédié aux échantillonnages en lot / en place
+        self._rng = np.random.default_rng()
+        
+        # Espace Gymnasium construit au premier accès (inutile aux workers
+        # qui ne font que convertir/échantillonner des actions)
+        self._space: Optional[spaces.Dict] = None
+    
+    @property
+    def space(self) -> spaces.Dict:
+        """Espace d'action Gymnasium, créé à la demande."""
+        if self._space is None:
+            self._space = self._create_action_space()
+        return self._space
     
     def _create_action_space(self) -> spaces.Dict:
         """Crée l'espace d'action Gymnasium."""
@@ -84,68 +127,72 @@ class ActionSpace:
         action_type_id = int(rl_action['action_type'])
         action_type_name = self.action_types[action_type_id]
         
-        # Dénormaliser les coordonnées
-        coords = rl_action['coordinates']
-        x = int(coords[0] * self.config.screen_width)
-        y = int(coords[1] * self.config.screen_height)
-        
-        # Décoder le texte
-        text = self._decode_text(rl_action['text'])
-        
-        # Traiter les modificateurs
-        modifiers = self._process_modifiers(rl_action['modifiers'])
-        
-        # Touche principale
-        key = chr(int(rl_action['key'][0])) if rl_action['key'][0] > 0 else None
-        
-        # Direction de scroll
-        scroll_map = {0: -1, 1: 0, 2: 1}  # up, none, down
-        scroll_direction = scroll_map[int(rl_action['scroll_direction'])]
-        
-        # Temps d'attente
-        wait_time = float(rl_action['wait_time'][0]) * 5.0  # Max 5 secondes
-        
-        # Créer l'action selon le type
+        # Seuls les champs utilisés par le type d'action sont décodés
         parameters = {}
         
-        if action_type_name in ['move_mouse', 'click', 'double_click', 'right_click']:
-            parameters['x'] = x
-            parameters['y'] = y
+        if action_type_name in self.POINTER_ACTIONS:
+            parameters['x'], parameters['y'] = self._denormalize_coordinates(rl_action['coordinates'])
             
         elif action_type_name == 'type_text':
-            parameters['text'] = text
+            parameters['text'] = self._decode_text(rl_action['text'])
             
         elif action_type_name == 'key_press':
+            modifiers = self._process_modifiers(rl_action['modifiers'])
+            key = self._decode_key(rl_action['key'])
+            
             if key and modifiers:
                 # Combinaison de touches
-                combo = modifiers + [key] if key else modifiers
-                parameters['keys'] = combo
+                parameters['keys'] = modifiers + [key]
             elif key:
                 parameters['key'] = key
                 
         elif action_type_name == 'scroll':
-            parameters['x'] = x
-            parameters['y'] = y
-            parameters['direction'] = 'up' if scroll_direction < 0 else 'down'
-            parameters['clicks'] = abs(scroll_direction) if scroll_direction != 0 else 1
+            parameters['x'], parameters['y'] = self._denormalize_coordinates(rl_action['coordinates'])
+            parameters['direction'], parameters['clicks'] = self.SCROLL_PARAMS[int(rl_action['scroll_direction'])]
             
         elif action_type_name == 'wait':
-            parameters['duration'] = wait_time
+            parameters['duration'] = rl_action['wait_time'].item() * 5.0  # Max 5 secondes
         
-        return Action(
-            type=ActionType(action_type_name),
+        action_type = self._action_type_enums[action_type_id]
+        if action_type is None:
+            raise ValueError(f"Type d'action sans équivalent dans le domaine: {action_type_name}")
+        
+        # Champs assemblés ici et déjà valides: pas de validation Pydantic à chaque step
+        return Action.model_construct(
+            type=action_type,
             parameters=parameters,
-            timestamp=0  # Sera défini lors de l'exécution
+            description=action_type_name
         )
     
+    @staticmethod
+    def _to_action_type(name: str) -> Optional[ActionType]:
+        """Retourne l'ActionType du domaine pour un nom RL, ou None (ex. no_op)."""
+        try:
+            return ActionType(name)
+        except ValueError:
+            return None
+    
+    def _denormalize_coordinates(self, coords: np.ndarray) -> Tuple[int, int]:
+        """Convertit des coordonnées normalisées en pixels."""
+        # Un seul passage NumPy -> Python, puis arithmétique sur des floats natifs
+        x, y = coords.tolist()
+        return int(x * self.config.screen_width), int(y * self.config.screen_height)
+    
+    def _decode_key(self, key_code: np.ndarray) -> Optional[str]:
+        """Décode la touche principale (None si aucune)."""
+        if key_code[0] <= 0:
+            return None
+        
+        # Octet uint8 décodé directement (latin-1: octet n -> chr(n))
+        if key_code.dtype == np.uint8:
+            return key_code[:1].tobytes().decode('latin-1')
+        return chr(int(key_code[0]))
+    
     def convert_from_domain_action(self, action: Action) -> Dict[str, np.ndarray]:
         """Convertit une action du domaine en action RL."""
         
-        # Type d'action
-        try:
-            action_type_id = self.action_types.index(action.type.value)
-        except ValueError:
-            action_type_id = len(self.action_types) - 1  # no_op par défaut
+        # Type d'action (no_op par défaut)
+        action_type_id = self._action_type_ids.get(action.type.value, len(self.action_types) - 1)
         
         # Coordonnées normalisées
         x = action.parameters.get('x', 0)
@@ -164,7 +211,7 @@ class ActionSpace:
         
         # Scroll
         direction = action.parameters.get('direction', 'none')
-        scroll_direction = {'up': 0, 'none': 1, 'down': 2}.get(direction, 1)
+        scroll_direction = self.SCROLL_DIRECTION_IDS.get(direction, 1)
         
         # Temps d'attente
         wait_time = np.array([
@@ -182,47 +229,53 @@ class ActionSpace:
         }
     
     def _decode_text(self, encoded_text: np.ndarray) -> str:
-        """Décode le texte depuis l'array numpy."""
-        # Retirer les zéros de padding
-        non_zero = encoded_text[encoded_text > 0]
-        
-        try:
-            return bytes(non_zero).decode('ascii', errors='ignore')
-        except:
-            return ""
+        """Décode le texte depuis l'array numpy (chaîne terminée par le premier zéro)."""
+        # Un seul passage en C sur les octets, sans masque booléen ni copie
+        # indexée; decode(errors='ignore') ne lève pas d'exception
+        return encoded_text.tobytes().partition(b'\x00')[0].decode('ascii', errors='ignore')
     
     def _encode_text(self, text: str) -> np.ndarray:
         """Encode le texte en array numpy."""
         encoded = np.zeros(self.config.max_text_length, dtype=np.uint8)
         
         text_bytes = text.encode('ascii', errors='ignore')[:self.config.max_text_length]
-        encoded[:len(text_bytes)] = list(text_bytes)
+        encoded[:len(text_bytes)] = np.frombuffer(text_bytes, dtype=np.uint8)
         
         return encoded
     
     def _process_modifiers(self, modifier_bits: np.ndarray) -> List[str]:
         """Convertit les bits de modificateurs en liste de touches."""
-        modifier_names = ['ctrl', 'alt', 'shift', 'win', 'fn', 'meta', 'cmd', 'option']
-        
-        return [name for i, name in enumerate(modifier_names) if modifier_bits[i]]
+        # Les 8 bits sont empaquetés en un octet qui indexe la table précalculée
+        return list(_MODIFIER_TABLE[int(np.packbits(modifier_bits)[0])])
     
     def _encode_keys(self, keys: List[str]) -> Tuple[np.ndarray, np.ndarray]:
         """Encode les touches en modificateurs et touche principale."""
-        modifiers = np.zeros(8, dtype=np.int8)
-        key = np.zeros(1, dtype=np.uint8)
-        
-        modifier_map = {
-            'ctrl': 0, 'alt': 1, 'shift': 2, 'win': 3,
-            'fn': 4, 'meta': 5, 'cmd': 6, 'option': 7
-        }
+        # Bits accumulés dans un entier (bit de poids fort = ctrl), puis un
+        # seul tableau construit; la dernière touche simple l'emporte
+        modifier_mask = 0
+        key_code = 0
         
         for k in keys:
-            if k.lower() in modifier_map:
-                modifiers[modifier_map[k.lower()]] = 1
+            modifier_id = self.MODIFIER_IDS.get(k)
+            if modifier_id is None:
+                modifier_id = self.MODIFIER_IDS.get(k.lower())
+            
+            if modifier_id is not None:
+                modifier_mask |= 0x80 >> modifier_id
             elif len(k) == 1:
-                key[0] = ord(k.upper())
+                code = ord(k)
+                if 97 <= code <= 122:
+                    key_code = code - 32  # a-z -> A-Z sans allouer de chaîne
+                elif code < 128:
+                    key_code = code
+                elif code <= 255:
+                    # Majuscule conservée seulement si elle tient sur un octet
+                    # latin-1 ('ß' -> 'SS', 'ÿ' -> 'Ÿ' gardent leur code)
+                    upper = k.upper()
+                    key_code = ord(upper) if len(upper) == 1 and ord(upper) <= 255 else code
+                # Touches hors latin-1: non représentables sur l'octet de l'espace
         
-        return modifiers, key
+        return _MODIFIER_BIT_ARRAYS[modifier_mask].copy(), np.array([key_code], dtype=np.uint8)
     
     def sample_action(self) -> Dict[str, np.ndarray]:
         """Échantillonne une action aléatoire."""
@@ -236,6 +289,48 @@ class ActionSpace:
             'wait_time': np.random.random(1).astype(np.float32)
         }
     
+    def sample_action_batch(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Échantillonne n actions aléatoires en un seul appel par composante.
+        
+        Args:
+            n: Nombre d'actions
+            
+        Returns:
+            Dictionnaire de tableaux avec une dimension de lot en tête
+        """
+        rng = self._rng
+        return {
+            'action_type': rng.integers(0, len(self.action_types), n),
+            'coordinates': rng.random((n, 2), dtype=np.float32),
+            'text': rng.integers(0, 256, (n, self.config.max_text_length), dtype=np.uint8),
+            'modifiers': rng.integers(0, 2, (n, 8), dtype=np.int8),
+            'key': rng.integers(0, 256, (n, 1), dtype=np.uint8),
+            'scroll_direction': rng.integers(0, 3, n),
+            'wait_time': rng.random((n, 1), dtype=np.float32)
+        }
+    
+    def sample_action_into(self, out: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Échantillonne une action aléatoire dans des tampons préalloués.
+        
+        Args:
+            out: Dictionnaire obtenu d'un précédent sample_action(), réutilisé
+                d'un appel à l'autre (les tableaux sont remplis en place)
+            
+        Returns:
+            Le même dictionnaire, rempli
+        """
+        rng = self._rng
+        out['action_type'] = int(rng.integers(0, len(self.action_types)))
+        rng.random(dtype=np.float32, out=out['coordinates'])
+        out['text'][:] = rng.integers(0, 256, out['text'].shape, dtype=np.uint8)
+        out['modifiers'][:] = rng.integers(0, 2, 8, dtype=np.int8)
+        out['key'][0] = rng.integers(0, 256)
+        out['scroll_direction'] = int(rng.integers(0, 3))
+        rng.random(dtype=np.float32, out=out['wait_time'])
+        return out
+    
     def get_action_mask(self, observation: Dict[str, np.ndarray]) -> np.ndarray:
         """Retourne un masque des actions valides pour l'observation donnée."""
         # Par défaut, toutes les actions sont valides
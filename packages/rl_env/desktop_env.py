@@ -2,7 +2,11 @@
 
 import asyncio
 import logging
+import re
+import threading
 import time
+from collections import deque
+from types import MappingProxyType
 from typing import Dict, Any, Tuple, Optional
 from pathlib import Path
 
@@ -10,13 +14,22 @@ import gymnasium as gym
 import numpy as np
 from pydantic import BaseModel
 
-from packages.common.config import Config
 from packages.common.models import Command, CommandSource, ExecutionSession
 from packages.common.errors import DesktopAgentError
 from .observation_space import ObservationSpace, ObservationConfig
 from .action_space import ActionSpace, ActionConfig
 
 
+# Formatage du texte de commande par type d'action, résolu par une seule
+# recherche (gabarits str.format préparés à l'import)
+_COMMAND_FORMATTERS = MappingProxyType({
+    'move_mouse': lambda params, fmt="Déplacer la souris à ({}, {})".format: fmt(params.get('x', 0), params.get('y', 0)),
+    'click': lambda params, fmt="Cliquer à ({}, {})".format: fmt(params.get('x', 0), params.get('y', 0)),
+    'type_text': lambda params: "Taper le texte: " + str(params.get('text', '')),
+    'key_press': lambda params: "Appuyer sur les touches: " + '+'.join(params.get('keys', [])),
+})
+
+
 class EnvironmentConfig(BaseModel):
     """Configuration de l'environnement RL."""
     max_steps: int = 100
@@ -25,6 +38,7 @@ class EnvironmentConfig(BaseModel):
     reward_step: float = -0.01
     reward_progress: float = 1.0
     timeout_seconds: float = 300.0  # 5 minutes max par épisode
+    keep_episode_history: bool = False  # Conserver toutes les récompenses/longueurs d'épisodes
     
     # Critères de succès pour les tâches MVP
     success_keywords: Dict[str, list] = {
@@ -38,6 +52,21 @@ class DesktopAgentEnv(gym.Env):
     
     metadata = {'render_modes': ['human', 'rgb_array'], 'render_fps': 1}
     
+    # Dimensions des observations simulées (écran 1920x1080 réduit à 25%)
+    SIMULATED_SCREEN_SHAPE = (int(1080 * 0.25), int(1920 * 0.25), 3)
+    _SIMULATED_SCREEN_SIZE = int(np.prod(SIMULATED_SCREEN_SHAPE))
+    
+    # Tâches échantillonnées à chaque reset sans tâche imposée
+    _TASKS = (
+        "Ouvre Google Chrome",
+        "Crée un fichier texte et écris Bonjour",
+        "Recherche 'desktop automation' sur Google",
+        "Ouvre le bloc-notes",
+        "Sauvegarde le fichier actuel"
+    )
+    # Mots de 64 bits aléatoires couvrant écran + OCR (1000) + fenêtre (100)
+    _SIMULATED_RANDOM_WORDS = (_SIMULATED_SCREEN_SIZE + 1100 + 7) // 8
+    
     def __init__(self, 
                  agent_service=None,
                  env_config: EnvironmentConfig = None,
@@ -52,12 +81,15 @@ class DesktopAgentEnv(gym.Env):
         self.obs_space_manager = ObservationSpace(obs_config)
         self.action_space_manager = ActionSpace(action_config)
         
-        self.observation_space = self.obs_space_manager.space
-        self.action_space = self.action_space_manager.space
+        # Espaces Gymnasium réassignés par un appelant (ex. wrapper), sinon
+        # ceux des gestionnaires, construits au premier accès
+        self._observation_space: Optional[gym.spaces.Space] = None
+        self._action_space: Optional[gym.spaces.Space] = None
         
         # État de l'environnement
         self.current_session: Optional[ExecutionSession] = None
         self.step_count = 0
+        self._current_episode_reward = 0.0
         self.episode_start_time = 0
         self.last_observation = None
         self.current_task = None
@@ -65,12 +97,65 @@ class DesktopAgentEnv(gym.Env):
         # Logging
         self.logger = logging.getLogger(__name__)
         
-        # Métriques
+        # Observation vide partagée (tableaux en lecture seule), seul
+        # step_count est renouvelé à chaque appel
+        self._empty_obs_template = self._build_empty_observation_template()
+        
+        # Une alternance précompilée par type de tâche: le texte du résultat
+        # est parcouru une seule fois au lieu d'une fois par mot-clé
+        self._success_patterns = tuple(
+            (task_type, re.compile('|'.join(map(re.escape, keywords))) if keywords else None)
+            for task_type, keywords in self.env_config.success_keywords.items()
+        )
+        self._task_success_patterns: Dict[str, Optional[re.Pattern]] = {}
+        
+        # Boucle asyncio permanente dans un thread dédié: les coroutines de
+        # l'agent y sont soumises à chaque step, et ses tâches de fond
+        # (connexions, timers) continuent de tourner entre les steps
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="desktop-env-loop",
+            daemon=True
+        )
+        if self.agent_service:
+            self._loop_thread.start()
+        
+        # Métriques: fenêtre glissante des 100 derniers épisodes et sommes
+        # cumulées; l'historique complet n'est gardé que sur demande
         self.episode_rewards = []
         self.episode_lengths = []
+        self._reward_window = deque(maxlen=100)
+        self._length_window = deque(maxlen=100)
+        self._reward_sum = 0.0
+        self._length_sum = 0
+        self._best_reward = float('-inf')
+        self._worst_reward = float('inf')
         self.success_count = 0
         self.total_episodes = 0
     
+    @property
+    def observation_space(self) -> gym.spaces.Space:
+        """Espace d'observation Gymnasium (construit au premier accès)."""
+        if self._observation_space is None:
+            self._observation_space = self.obs_space_manager.space
+        return self._observation_space
+    
+    @observation_space.setter
+    def observation_space(self, space: gym.spaces.Space) -> None:
+        self._observation_space = space
+    
+    @property
+    def action_space(self) -> gym.spaces.Space:
+        """Espace d'action Gymnasium (construit au premier accès)."""
+        if self._action_space is None:
+            self._action_space = self.action_space_manager.space
+        return self._action_space
+    
+    @action_space.setter
+    def action_space(self, space: gym.spaces.Space) -> None:
+        self._action_space = space
+    
     def reset(self, seed: Optional[int] = None, options: Optional[dict] = None) -> Tuple[Dict, Dict]:
         """Remet l'environnement à zéro pour un nouvel épisode."""
         super().reset(seed=seed)
@@ -83,6 +168,7 @@ class DesktopAgentEnv(gym.Env):
         
         # Réinitialiser l'état
         self.step_count = 0
+        self._current_episode_reward = 0.0
         self.episode_start_time = time.time()
         self.current_session = None
         
@@ -107,8 +193,23 @@ class DesktopAgentEnv(gym.Env):
         # Convertir l'action RL en action du domaine
         domain_action = self.action_space_manager.convert_to_domain_action(action)
         
+        # Info construit en une fois et complété en place par _execute_action.
+        # Un nouveau dict par step (pas de tampon réutilisé): les wrappers
+        # (Monitor, VecEnv) y ajoutent des clés propres à l'épisode et
+        # conservent les infos des steps précédents
+        info = {
+            'action_success': False,
+            'error': None,
+            'step': self.step_count,
+            'action_type': self.action_space_manager.action_types[action['action_type']],
+            'reward': 0.0,
+            'task': self.current_task
+        }
+        
         # Exécuter l'action
-        reward, done, info = self._execute_action(domain_action)
+        reward, done = self._execute_action(domain_action, info)
+        info['reward'] = reward
+        self._current_episode_reward += reward
         
         # Obtenir la nouvelle observation
         observation = self._get_observation()
@@ -116,25 +217,25 @@ class DesktopAgentEnv(gym.Env):
         # Vérifier les conditions de fin
         truncated = self._check_truncation()
         
-        # Mettre à jour les métriques
-        info.update({
-            'step': self.step_count,
-            'action_type': self.action_space_manager.action_types[action['action_type']],
-            'reward': reward,
-            'task': self.current_task
-        })
-        
         if done or truncated:
             self._end_episode(reward, done, info)
         
         return observation, reward, done, truncated, info
     
-    def _execute_action(self, action) -> Tuple[float, bool, Dict]:
-        """Exécute l'action via l'agent service."""
+    def _execute_action(self, action, info: Dict) -> Tuple[float, bool]:
+        """
+        Exécute l'action via l'agent service.
+        
+        Args:
+            action: Action du domaine à exécuter
+            info: Dictionnaire d'info du step, complété en place
+            
+        Returns:
+            Tuple (récompense, épisode terminé)
+        """
         
         reward = self.env_config.reward_step  # Récompense de base négative
         done = False
-        info = {'action_success': False, 'error': None}
         
         try:
             if self.agent_service:
@@ -142,7 +243,7 @@ class DesktopAgentEnv(gym.Env):
                 # Note: Dans un vrai environnement, ceci serait asynchrone
                 # Pour la simulation, on peut utiliser une version synchrone
                 
-                result = asyncio.run(self._async_execute_action(action))
+                result = self._run(self._async_execute_action(action))
                 
                 if result and result.success:
                     reward += self.env_config.reward_progress
@@ -165,7 +266,7 @@ class DesktopAgentEnv(gym.Env):
                 info['action_success'] = True
                 
                 # Chance aléatoire de compléter la tâche
-                if np.random.random() < 0.1:  # 10% de chance
+                if self.np_random.random() < 0.1:  # 10% de chance
                     done = True
                     reward += self.env_config.reward_success
                     info['task_completed'] = True
@@ -175,7 +276,11 @@ class DesktopAgentEnv(gym.Env):
             reward += self.env_config.reward_failure
             info['error'] = str(e)
         
-        return reward, done, info
+        return reward, done
+    
+    def _run(self, coro):
+        """Exécute une coroutine sur la boucle de l'environnement et attend son résultat."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
     
     async def _async_execute_action(self, action):
         """Exécute l'action de manière asynchrone."""
@@ -194,19 +299,12 @@ class DesktopAgentEnv(gym.Env):
     def _action_to_command_text(self, action) -> str:
         """Convertit une action en texte de commande."""
         action_type = action.type.value
-        params = action.parameters
-        
-        if action_type == 'move_mouse':
-            return f"Déplacer la souris à ({params.get('x', 0)}, {params.get('y', 0)})"
-        elif action_type == 'click':
-            return f"Cliquer à ({params.get('x', 0)}, {params.get('y', 0)})"
-        elif action_type == 'type_text':
-            return f"Taper le texte: {params.get('text', '')}"
-        elif action_type == 'key_press':
-            keys = params.get('keys', [])
-            return f"Appuyer sur les touches: {'+'.join(keys)}"
-        else:
-            return f"Exécuter action: {action_type}"
+        
+        formatter = _COMMAND_FORMATTERS.get(action_type)
+        if formatter is None:
+            return "Exécuter action: " + action_type
+        
+        return formatter(action.parameters)
     
     def _get_observation(self) -> Dict[str, np.ndarray]:
         """Obtient l'observation actuelle."""
@@ -214,7 +312,7 @@ class DesktopAgentEnv(gym.Env):
         try:
             if self.agent_service:
                 # Obtenir l'observation via l'agent
-                domain_obs = asyncio.run(self.agent_service.get_current_observation())
+                domain_obs = self._run(self.agent_service.get_current_observation())
                 observation = self.obs_space_manager.convert_observation(domain_obs)
             else:
                 # Mode simulation
@@ -230,34 +328,46 @@ class DesktopAgentEnv(gym.Env):
     def _simulate_observation(self) -> Dict[str, np.ndarray]:
         """Simule une observation pour l'entraînement sans agent réel."""
         
-        # Dimensions réduites
-        screen_h = int(1080 * 0.25)
-        screen_w = int(1920 * 0.25)
+        # Deux tirages sur le générateur de l'environnement (graine de reset),
+        # découpés en vues: octets (écran, OCR, fenêtre) et floats (UI, souris).
+        # Les octets viennent directement des mots bruts du générateur, ~3x
+        # plus rapide que integers(0, 256) pour des octets uniformes.
+        screen_size = self._SIMULATED_SCREEN_SIZE
+        random_bytes = self.np_random.bit_generator.random_raw(self._SIMULATED_RANDOM_WORDS).view(np.uint8)
+        random_floats = self.np_random.random(50 * 6 + 2, dtype=np.float32)
         
         return {
-            'screenshot': np.random.randint(0, 256, (screen_h, screen_w, 3), dtype=np.uint8),
-            'ui_elements': np.random.random((50, 6)).astype(np.float32),
-            'ocr_text': np.random.randint(0, 256, (1000,), dtype=np.uint8),
-            'mouse_position': np.random.random(2).astype(np.float32),
-            'active_window': np.random.randint(0, 256, (100,), dtype=np.uint8),
+            'screenshot': random_bytes[:screen_size].reshape(self.SIMULATED_SCREEN_SHAPE),
+            'ui_elements': random_floats[:300].reshape(50, 6),
+            'ocr_text': random_bytes[screen_size:screen_size + 1000],
+            'mouse_position': random_floats[300:],
+            'active_window': random_bytes[screen_size + 1000:screen_size + 1100],
             'step_count': np.array([self.step_count], dtype=np.int32),
             'last_action_success': np.array([1], dtype=np.int32)
         }
     
-    def _get_empty_observation(self) -> Dict[str, np.ndarray]:
-        """Retourne une observation vide en cas d'erreur."""
-        screen_h = int(1080 * 0.25)
-        screen_w = int(1920 * 0.25)
-        
-        return {
-            'screenshot': np.zeros((screen_h, screen_w, 3), dtype=np.uint8),
+    def _build_empty_observation_template(self) -> Dict[str, np.ndarray]:
+        """Construit une fois les tableaux nuls de l'observation vide."""
+        template = {
+            'screenshot': np.zeros(self.SIMULATED_SCREEN_SHAPE, dtype=np.uint8),
             'ui_elements': np.zeros((50, 6), dtype=np.float32),
             'ocr_text': np.zeros((1000,), dtype=np.uint8),
             'mouse_position': np.zeros(2, dtype=np.float32),
             'active_window': np.zeros((100,), dtype=np.uint8),
-            'step_count': np.array([self.step_count], dtype=np.int32),
+            'step_count': np.zeros(1, dtype=np.int32),  # Remplacé à chaque appel
             'last_action_success': np.array([0], dtype=np.int32)
         }
+        
+        for array in template.values():
+            array.flags.writeable = False
+        
+        return template
+    
+    def _get_empty_observation(self) -> Dict[str, np.ndarray]:
+        """Retourne une observation vide en cas d'erreur."""
+        observation = dict(self._empty_obs_template)
+        observation['step_count'] = np.array([self.step_count], dtype=np.int32)
+        return observation
     
     def _simulate_action_reward(self, action) -> float:
         """Simule une récompense pour une action."""
@@ -278,14 +388,27 @@ class DesktopAgentEnv(gym.Env):
         if not self.current_task or not result:
             return False
         
+        # Motif de la tâche courante, résolu une fois par tâche
+        try:
+            pattern = self._task_success_patterns[self.current_task]
+        except KeyError:
+            pattern = self._task_success_patterns[self.current_task] = self._success_pattern_for(self.current_task)
+        
+        if pattern is None:
+            return False
+        
         # Vérifier selon les mots-clés de succès
-        result_text = str(result).lower()
+        return pattern.search(str(result).lower()) is not None
+    
+    def _success_pattern_for(self, task: str) -> Optional[re.Pattern]:
+        """Retourne le motif du premier type de tâche contenu dans la tâche, ou None."""
+        task = task.lower()
         
-        for task_type, keywords in self.env_config.success_keywords.items():
-            if task_type in self.current_task.lower():
-                return any(keyword in result_text for keyword in keywords)
+        for task_type, pattern in self._success_patterns:
+            if task_type in task:
+                return pattern
         
-        return False
+        return None
     
     def _check_truncation(self) -> bool:
         """Vérifie les conditions de troncature."""
@@ -302,25 +425,28 @@ class DesktopAgentEnv(gym.Env):
     
     def _sample_task(self) -> str:
         """Échantillonne une tâche aléatoire."""
-        tasks = [
-            "Ouvre Google Chrome",
-            "Crée un fichier texte et écris Bonjour",
-            "Recherche 'desktop automation' sur Google",
-            "Ouvre le bloc-notes",
-            "Sauvegarde le fichier actuel"
-        ]
-        
-        return np.random.choice(tasks)
+        # Indice tiré sur le générateur de l'environnement: pas de tableau
+        # objet construit à chaque appel comme avec choice()
+        return self._TASKS[self.np_random.integers(len(self._TASKS))]
     
     def _end_episode(self, final_reward: float, success: bool, info: Dict):
         """Termine l'épisode et met à jour les métriques."""
         
         self.total_episodes += 1
-        self.episode_lengths.append(self.step_count)
         
-        # Calculer la récompense totale de l'épisode
-        episode_reward = sum(getattr(self, '_episode_rewards', [final_reward]))
-        self.episode_rewards.append(episode_reward)
+        # Récompense totale de l'épisode, cumulée à chaque step
+        episode_reward = self._current_episode_reward
+        
+        self._reward_window.append(episode_reward)
+        self._length_window.append(self.step_count)
+        self._reward_sum += episode_reward
+        self._length_sum += self.step_count
+        self._best_reward = max(self._best_reward, episode_reward)
+        self._worst_reward = min(self._worst_reward, episode_reward)
+        
+        if self.env_config.keep_episode_history:
+            self.episode_rewards.append(episode_reward)
+            self.episode_lengths.append(self.step_count)
         
         # Logging
         self.logger.info(
@@ -332,9 +458,9 @@ class DesktopAgentEnv(gym.Env):
         )
         
         # Statistiques
-        if len(self.episode_rewards) >= 100:
-            avg_reward = np.mean(self.episode_rewards[-100:])
-            avg_length = np.mean(self.episode_lengths[-100:])
+        if self.total_episodes >= 100:
+            avg_reward = sum(self._reward_window) / len(self._reward_window)
+            avg_length = sum(self._length_window) / len(self._length_window)
             success_rate = self.success_count / min(100, self.total_episodes)
             
             self.logger.info(
@@ -356,32 +482,39 @@ class DesktopAgentEnv(gym.Env):
                 return self.last_observation['screenshot']
             else:
                 # Image vide
-                return np.zeros((270, 480, 3), dtype=np.uint8)
+                return np.zeros(self.SIMULATED_SCREEN_SHAPE, dtype=np.uint8)
     
     def close(self):
         """Ferme l'environnement."""
         if self.agent_service:
             # Nettoyer les ressources de l'agent
             try:
-                asyncio.run(self.agent_service.cleanup())
+                self._run(self.agent_service.cleanup())
             except:
                 pass
         
+        if self._loop_thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+        
+        if not self._loop.is_closed():
+            self._loop.close()
+        
         self.logger.info("Environnement fermé")
     
     def get_metrics(self) -> Dict[str, Any]:
         """Retourne les métriques de performance."""
         
-        if not self.episode_rewards:
+        if not self.total_episodes:
             return {}
         
         return {
             'total_episodes': self.total_episodes,
             'success_count': self.success_count,
             'success_rate': self.success_count / max(1, self.total_episodes),
-            'average_reward': np.mean(self.episode_rewards),
-            'average_length': np.mean(self.episode_lengths),
-            'last_10_rewards': self.episode_rewards[-10:] if len(self.episode_rewards) >= 10 else self.episode_rewards,
-            'best_reward': max(self.episode_rewards),
-            'worst_reward': min(self.episode_rewards)
+            'average_reward': self._reward_sum / self.total_episodes,
+            'average_length': self._length_sum / self.total_episodes,
+            'last_10_rewards': list(self._reward_window)[-10:],
+            'best_reward': self._best_reward,
+            'worst_reward': self._worst_reward
         }
\ No newline at end of file
@@ -1,12 +1,28 @@
 """Espace d'observation pour l'environnement RL."""
 
+import logging
 import numpy as np
-from typing import Dict, Any, Tuple
+from types import MappingProxyType
+from typing import Dict, Any, Tuple, Optional
 from gymnasium import spaces
 from pydantic import BaseModel
 
 from packages.common.models import Observation
 
+logger = logging.getLogger(__name__)
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
 
 class ObservationConfig(BaseModel):
     """Configuration de l'espace d'observation."""
@@ -21,9 +37,53 @@ class ObservationConfig(BaseModel):
 class ObservationSpace:
     """Gestionnaire de l'espace d'observation pour RL."""
     
+    # Identifiant numérique par rôle d'élément UI
+    ROLE_IDS = MappingProxyType({
+        'button': 1.0,
+        'text': 2.0,
+        'textbox': 3.0,
+        'link': 4.0,
+        'menu': 5.0,
+        'window': 6.0,
+        'dialog': 7.0,
+        'list': 8.0,
+        'image': 9.0,
+        'unknown': 0.0
+    })
+    
     def __init__(self, config: ObservationConfig = None):
         self.config = config or ObservationConfig()
-        self.space = self._create_observation_space()
+        
+        # Taille (largeur, hauteur) du screenshot réduit, fixée par la config
+        self._screen_size = (
+            int(self.config.screen_width * self.config.screenshot_scale),
+            int(self.config.screen_height * self.config.screenshot_scale)
+        )
+        
+        # Diviseurs (x, y, w, h, type_id, confiance) des éléments UI; le type
+        # est ramené dans [0, 1] comme le reste du vecteur
+        self._ui_norm = np.array([
+            self.config.screen_width, self.config.screen_height,
+            self.config.screen_width, self.config.screen_height,
+            max(self.ROLE_IDS.values()), 1.0
+        ])
+        
+        # Screenshots de repli partagés (lecture seule): image noire en cas
+        # d'échec, placeholder quand les screenshots sont désactivés
+        self._zero_screenshot = np.zeros((self._screen_size[1], self._screen_size[0], 3), dtype=np.uint8)
+        self._zero_screenshot.setflags(write=False)
+        self._zero_scalar = np.zeros((1,), dtype=np.uint8)
+        self._zero_scalar.setflags(write=False)
+        
+        # Espace Gymnasium construit au premier accès
+        self._space: Optional[spaces.Dict] = None
+    
+    @property
+    def space(self) -> spaces.Dict:
+        """Espace d'observation Gymnasium, créé à la demande."""
+        if self._space is None:
+            self._space = self._create_observation_space()
+        return self._space
     
     def _create_observation_space(self) -> spaces.Dict:
         """Crée l'espace d'observation Gymnasium."""
@@ -38,7 +98,7 @@ class ObservationSpace:
                 low=0, high=255, 
                 shape=(screen_h, screen_w, 3), 
                 dtype=np.uint8
-            ) if self.config.include_screenshot else spaces.Box(low=0, high=1, shape=(1,)),
+            ) if self.config.include_screenshot else spaces.Box(low=0, high=1, shape=(1,), dtype=np.uint8),
             
             # Éléments UI détectés (positions normalisées)
             'ui_elements': spaces.Box(
@@ -88,8 +148,14 @@ class ObservationSpace:
     def convert_observation(self, obs: Observation) -> Dict[str, np.ndarray]:
         """Convertit une observation du domaine en observation RL."""
         
-        # Screenshot
-        screenshot = self._process_screenshot(obs.screenshot_path) if obs.screenshot_path else np.zeros((1,))
+        # Screenshot: frame en mémoire si fournie, sinon fichier
+        screenshot_array = getattr(obs, 'screenshot_ndarray', None)
+        if screenshot_array is not None:
+            screenshot = self._resize_ndarray(screenshot_array)
+        elif obs.screenshot_path:
+            screenshot = self._process_screenshot(obs.screenshot_path)
+        else:
+            screenshot = self._zero_screenshot if self.config.include_screenshot else self._zero_scalar
         
         # UI Elements
         ui_elements = self._process_ui_elements(obs.ui_elements)
@@ -119,60 +185,116 @@ class ObservationSpace:
     def _process_screenshot(self, screenshot_path: str) -> np.ndarray:
         """Traite le screenshot pour l'observation."""
         try:
-            from PIL import Image
-            import numpy as np
+            if not self.config.include_screenshot:
+                return self._zero_scalar
+            
+            if CV2_AVAILABLE:
+                # Décodage + réduction par moyenne de zone (INTER_AREA),
+                # bien moins coûteuse que Lanczos pour un facteur ~0.25
+                bgr = cv2.imread(screenshot_path, cv2.IMREAD_COLOR)
+                if bgr is None:
+                    raise FileNotFoundError(screenshot_path)
+                small = cv2.resize(bgr, self._screen_size, interpolation=cv2.INTER_AREA)
+                return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+            
+            if not PIL_AVAILABLE:
+                return self._zero_screenshot
             
             # Charger et redimensionner l'image
             img = Image.open(screenshot_path).convert('RGB')
+            # reducing_gap: réduction entière préalable (reduce), le noyau
+            # Lanczos n'est alors appliqué que sur une image 2x la cible
+            img = img.resize(self._screen_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
             
-            if self.config.include_screenshot:
-                # Redimensionner
-                new_size = (
-                    int(self.config.screen_width * self.config.screenshot_scale),
-                    int(self.config.screen_height * self.config.screenshot_scale)
-                )
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+            return np.array(img, dtype=np.uint8)
                 
-                return np.array(img, dtype=np.uint8)
-            else:
-                return np.zeros((1,), dtype=np.uint8)
-                
-        except Exception:
+        except Exception as e:
+            logger.warning(f"Screenshot illisible ({screenshot_path}): {e}")
             # Retourner une image vide en cas d'erreur
             if self.config.include_screenshot:
-                screen_h = int(self.config.screen_height * self.config.screenshot_scale)
-                screen_w = int(self.config.screen_width * self.config.screenshot_scale)
-                return np.zeros((screen_h, screen_w, 3), dtype=np.uint8)
+                return self._zero_screenshot
             else:
-                return np.zeros((1,), dtype=np.uint8)
+                return self._zero_scalar
     
-    def _process_ui_elements(self, ui_elements: list) -> np.ndarray:
-        """Traite les éléments UI pour l'observation."""
-        result = np.zeros((self.config.max_ui_elements, 6), dtype=np.float32)
+    def _resize_ndarray(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Réduit une frame déjà en mémoire, sans passer par le disque.
         
-        for i, element in enumerate(ui_elements[:self.config.max_ui_elements]):
-            # Normaliser les coordonnées
-            x = element.bounds[0] / self.config.screen_width
-            y = element.bounds[1] / self.config.screen_height
-            w = element.bounds[2] / self.config.screen_width
-            h = element.bounds[3] / self.config.screen_height
+        Args:
+            frame: Image RGB (H, W, 3) ou BGRA (H, W, 4) brute de mss, uint8
             
-            # Type d'élément (simplifié)
-            type_id = self._get_element_type_id(element.role)
+        Returns:
+            Screenshot RGB réduit pour l'observation
+        """
+        if not self.config.include_screenshot:
+            return self._zero_scalar
+        
+        try:
+            if frame.ndim != 3 or frame.shape[2] not in (3, 4) or frame.size == 0:
+                raise ValueError(f"frame RGB (H, W, 3) ou BGRA (H, W, 4) attendue, reçu {frame.shape}")
+            frame = np.asarray(frame, dtype=np.uint8)
+            bgra = frame.shape[2] == 4
+            
+            if CV2_AVAILABLE:
+                # Réduction avant conversion: cvtColor ne traite que l'image réduite
+                small = cv2.resize(frame, self._screen_size, interpolation=cv2.INTER_AREA)
+                return cv2.cvtColor(small, cv2.COLOR_BGRA2RGB) if bgra else small
             
-            # Confiance (si disponible)
-            confidence = getattr(element, 'confidence', 1.0)
+            if not PIL_AVAILABLE:
+                return self._zero_screenshot
             
-            result[i] = [x, y, w, h, type_id, confidence]
+            if bgra:
+                frame = np.ascontiguousarray(frame[..., 2::-1])
+            img = Image.fromarray(frame).resize(self._screen_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+            return np.array(img, dtype=np.uint8)
+        
+        except Exception as e:
+            logger.warning(f"Frame de screenshot invalide: {e}")
+            # Même repli que _process_screenshot
+            return self._zero_screenshot
+    
+    def _process_ui_elements(self, ui_elements: list) -> np.ndarray:
+        """Traite les éléments UI pour l'observation."""
+        result = np.zeros((self.config.max_ui_elements, 6), dtype=np.float32)
+        
+        elements = ui_elements[:self.config.max_ui_elements]
+        n = len(elements)
+        if n == 0:
+            return result
+        
+        # (x, y, w, h, type_id, confiance) de chaque élément en un seul
+        # tableau, normalisé par une division diffusée
+        role_map = self.ROLE_IDS
+        raw = np.fromiter(
+            (
+                value
+                for element in elements
+                for value in (
+                    *element.bounds[:4],
+                    role_map.get(element.role) or role_map.get(element.role.lower(), 0.0),
+                    getattr(element, 'confidence', 1.0)
+                )
+            ),
+            dtype=np.float64,
+            count=n * 6
+        ).reshape(n, 6)
+        
+        # Éléments débordant de l'écran bornés aux limites de l'espace
+        np.clip(raw / self._ui_norm, 0.0, 1.0, out=result[:n], casting='same_kind')
         
         return result
     
     def _process_ocr_text(self, ocr_results: list) -> np.ndarray:
         """Traite le texte OCR pour l'observation."""
-        # Combiner tout le texte OCR
-        all_text = " ".join([result.text for result in ocr_results])
+        # Combiner tout le texte OCR directement en octets ASCII (un seul
+        # encodage par résultat, sans chaîne intermédiaire)
+        max_length = self.config.max_text_length
+        all_bytes = b' '.join([result.text.encode('ascii', errors='ignore') for result in ocr_results])[:max_length]
         
-        return self._encode_text(all_text, self.config.max_text_length)
+        encoded = np.zeros(max_length, dtype=np.uint8)
+        encoded[:len(all_bytes)] = np.frombuffer(all_bytes, dtype=np.uint8)
+        
+        return encoded
     
     def _encode_text(self, text: str, max_length: int) -> np.ndarray:
         """Encode le texte en array numpy."""
@@ -180,23 +302,14 @@ class ObservationSpace:
         encoded = np.zeros(max_length, dtype=np.uint8)
         
         text_bytes = text.encode('ascii', errors='ignore')[:max_length]
-        encoded[:len(text_bytes)] = list(text_bytes)
+        encoded[:len(text_bytes)] = np.frombuffer(text_bytes, dtype=np.uint8)
         
         return encoded
     
     def _get_element_type_id(self, role: str) -> float:
         """Convertit le rôle d'élément en ID numérique."""
-        role_map = {
-            'button': 1.0,
-            'text': 2.0,
-            'textbox': 3.0,
-            'link': 4.0,
-            'menu': 5.0,
-            'window': 6.0,
-            'dialog': 7.0,
-            'list': 8.0,
-            'image': 9.0,
-            'unknown': 0.0
-        }
-        
-        return role_map.get(role.lower(), 0.0)
\ No newline at end of file
+        # Rôle déjà en minuscules (cas courant): pas de copie via lower()
+        type_id = self.ROLE_IDS.get(role)
+        if type_id is not None:
+            return type_id
+        return self.ROLE_IDS.get(role.lower(), 0.0)
\ No newline at end of file
@@ -11,6 +11,23 @@ from .base_skill import BaseSkill, SkillParameters, SkillResult
 from ..common.errors import AppNotFoundError, SkillError
 
 
+def _find_app(running_apps: List[Dict[str, Any]], needle: str) -> Optional[Dict[str, Any]]:
+    """
+    Cherche une application dont le nom contient needle.
+    
+    Args:
+        running_apps: Applications retournées par get_running_apps()
+        needle: Nom recherché, déjà en minuscules
+        
+    Returns:
+        Première application correspondante, ou None
+    """
+    for app in running_apps:
+        if needle in app["name"].lower():
+            return app
+    return None
+
+
 class OpenAppSkill(BaseSkill):
     """Compétence pour ouvrir une application."""
     
@@ -37,16 +54,15 @@ class OpenAppSkill(BaseSkill):
         
         try:
             # Vérifier si l'app est déjà ouverte
-            running_apps = self.os_adapter.get_running_apps()
-            for app in running_apps:
-                if app_name.lower() in app["name"].lower():
-                    return SkillResult(
-                        skill_name=self.name,
-                        success=True,
-                        message=f"Application {app_name} déjà ouverte",
-                        duration=0.0,
-                        data={"app_info": app}
-                    )
+            app = _find_app(self.os_adapter.get_running_apps(), app_name.lower())
+            if app is not None:
+                return SkillResult(
+                    skill_name=self.name,
+                    success=True,
+                    message=f"Application {app_name} déjà ouverte",
+                    duration=0.0,
+                    data={"app_info": app}
+                )
             
             # Ouvrir l'application
             success = self.os_adapter.open_app(app_name)
@@ -118,13 +134,18 @@ class OpenAppSkill(BaseSkill):
         Returns:
             True si l'application est détectée
         """
-        start_time = asyncio.get_event_loop().time()
+        if self.settings.skills.event_driven_app_launch:
+            # Notification par l'OS (hooks WinEvent sous Windows, polling
+            # par défaut dans les autres adaptateurs)
+            return await self.os_adapter.await_app_launch(app_name, timeout)
+        
+        loop = asyncio.get_event_loop()
+        start_time = loop.time()
+        needle = app_name.lower()
         
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            running_apps = self.os_adapter.get_running_apps()
-            for app in running_apps:
-                if app_name.lower() in app["name"].lower():
-                    return True
+        while (loop.time() - start_time) < timeout:
+            if _find_app(self.os_adapter.get_running_apps(), needle) is not None:
+                return True
             
             await asyncio.sleep(0.5)
         
@@ -156,13 +177,7 @@ class FocusAppSkill(BaseSkill):
         
         try:
             # Vérifier que l'app est en cours d'exécution
-            running_apps = self.os_adapter.get_running_apps()
-            target_app = None
-            
-            for app in running_apps:
-                if app_name.lower() in app["name"].lower():
-                    target_app = app
-                    break
+            target_app = _find_app(self.os_adapter.get_running_apps(), app_name.lower())
             
             if not target_app:
                 raise AppNotFoundError(f"Application {app_name} non trouvée")
@@ -244,13 +259,7 @@ class CloseAppSkill(BaseSkill):
         
         try:
             # Vérifier que l'app est en cours d'exécution
-            running_apps = self.os_adapter.get_running_apps()
-            target_app = None
-            
-            for app in running_apps:
-                if app_name.lower() in app["name"].lower():
-                    target_app = app
-                    break
+            target_app = _find_app(self.os_adapter.get_running_apps(), app_name.lower())
             
             if not target_app:
                 return SkillResult(
@@ -276,10 +285,7 @@ class CloseAppSkill(BaseSkill):
             
             # Vérifier la fermeture
             await asyncio.sleep(1.0)
-            still_running = any(
-                app_name.lower() in app["name"].lower()
-                for app in self.os_adapter.get_running_apps()
-            )
+            still_running = _find_app(self.os_adapter.get_running_apps(), app_name.lower()) is not None
             
             if still_running and not force:
                 # Tentative de fermeture forcée
@@ -26,6 +26,9 @@ class SkillManager:
         self._skills: Dict[str, BaseSkill] = {}
         self._skill_classes: Dict[str, Type[BaseSkill]] = {}
         
+        # Incrémenté à chaque (dés)enregistrement: invalide les caches clients
+        self._registry_version = 0
+        
         # Enregistrer les compétences de base
         self._register_builtin_skills()
         
@@ -62,6 +65,7 @@ class SkillManager:
             # Enregistrer
             self._skills[skill_name] = skill_instance
             self._skill_classes[skill_name] = skill_class
+            self._registry_version += 1
             
             logger.info(f"Compétence enregistrée: {skill_name}")
             
@@ -78,9 +82,15 @@ class SkillManager:
         skill_name = skill.name
         self._skills[skill_name] = skill
         self._skill_classes[skill_name] = type(skill)
+        self._registry_version += 1
         
         logger.info(f"Instance de compétence enregistrée: {skill_name}")
     
+    @property
+    def registry_version(self) -> int:
+        """Version du registre, modifiée à chaque (dés)enregistrement de compétence."""
+        return self._registry_version
+    
     def get_skill(self, name: str) -> Optional[BaseSkill]:
         """
         Récupère une compétence par nom.
@@ -392,6 +402,7 @@ class SkillManager:
             del self._skills[name]
             if name in self._skill_classes:
                 del self._skill_classes[name]
+            self._registry_version += 1
             
             logger.info(f"Compétence désenregistrée: {name}")
             return True
@@ -0,0 +1,214 @@
+"""Tests unitaires des caches et constructeurs compilés du Planner."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from packages.planner.plan_generator import PlanGenerator, PlanTemplate
+from packages.planner.planner_manager import PlannerManager
+from packages.common.models import Intent, IntentType, ActionType
+
+
+class FakeSkillManager:
+    """Gestionnaire de compétences minimal pour les tests du planner."""
+    
+    def __init__(self, known_skills=None):
+        self.known_skills = known_skills
+        self.registry_version = 0
+    
+    def register_skill(self, name):
+        self.known_skills.add(name)
+        self.registry_version += 1
+    
+    def get_skill_info(self, name):
+        if self.known_skills is not None and name not in self.known_skills:
+            return None
+        return {"name": name}
+    
+    def get_skill(self, name):
+        class _Skill:
+            def validate_parameters(self, parameters):
+                return True
+        return _Skill()
+    
+    def get_manager_stats(self):
+        return {}
+
+
+# Slots couvrant les placeholders de tous les templates
+ALL_SLOTS = {
+    "app_name": "chrome",
+    "text": "OK",
+    "query": "python {app_name}",
+    "content": "hello world",
+    "path": "~/Documents/test.txt",
+    "filename": "test.txt"
+}
+
+
+def _make_intent(intent_type, **slots):
+    return Intent(type=intent_type, slots=slots, confidence=0.9, original_text="test")
+
+
+def _dump_actions(actions):
+    return [action.model_dump() for action in actions]
+
+
+@pytest.fixture
+def skill_manager():
+    """Gestionnaire de compétences connaissant toutes les compétences."""
+    return FakeSkillManager()
+
+
+class TestCompiledBuilders:
+    """Tests des constructeurs de plans compilés."""
+    
+    @pytest.mark.parametrize("known_skills", [None, set()])
+    def test_compiled_builder_matches_interpreter(self, known_skills):
+        """Le constructeur compilé produit les mêmes actions que l'interpréteur."""
+        generator = PlanGenerator(FakeSkillManager(known_skills))
+        
+        for intent_type, template in generator._templates.items():
+            builder = generator._compiled_builders[intent_type]
+            
+            compiled = builder(dict(ALL_SLOTS), generator._get_skill_info)
+            interpreted = generator._interpret_template(template, dict(ALL_SLOTS), None)
+            
+            assert _dump_actions(compiled) == _dump_actions(interpreted), intent_type
+    
+    def test_compiled_builder_does_not_share_parameters(self, skill_manager):
+        """Deux appels ne partagent pas les dictionnaires de paramètres."""
+        generator = PlanGenerator(skill_manager)
+        builder = generator._compiled_builders[IntentType.WRITE_TEXT_FILE]
+        
+        first = builder(dict(ALL_SLOTS), generator._get_skill_info)
+        first[0].parameters["injected"] = True
+        second = builder(dict(ALL_SLOTS), generator._get_skill_info)
+        
+        assert all("injected" not in action.parameters for action in second)
+    
+    def test_registered_template_uses_interpreter(self, skill_manager):
+        """Un template enregistré dynamiquement remplace le constructeur compilé."""
+        generator = PlanGenerator(skill_manager)
+        generator.generate_plan(_make_intent(IntentType.TYPE_TEXT, text="avant"))
+        
+        generator.register_template(PlanTemplate(
+            intent_type=IntentType.TYPE_TEXT,
+            actions=[{"type": "type_text", "parameters": {"text": "{text}"}, "description": "Taper {text}"}]
+        ))
+        plan = generator.generate_plan(_make_intent(IntentType.TYPE_TEXT, text="après"))
+        
+        assert IntentType.TYPE_TEXT not in generator._compiled_builders
+        assert [(a.type, a.parameters, a.description) for a in plan.actions] == [
+            (ActionType.TYPE_TEXT, {"text": "après"}, "Taper après")
+        ]
+
+
+class TestPlanCaches:
+    """Tests des caches de plans du générateur et du manager."""
+    
+    def test_generator_cache_hit_returns_new_plan(self, skill_manager):
+        """Un plan servi par le cache a son propre id et ses propres actions."""
+        generator = PlanGenerator(skill_manager)
+        intent = _make_intent(IntentType.OPEN_APP, app_name="chrome")
+        
+        first = generator.generate_plan(intent)
+        first.actions[0].parameters["injected"] = True
+        second = generator.generate_plan(intent)
+        
+        assert second.id != first.id
+        assert second.intent is intent
+        assert "injected" not in second.actions[0].parameters
+    
+    def test_generator_cache_follows_skill_registry(self):
+        """Un plan caché sans la compétence est invalidé à son enregistrement."""
+        skills = FakeSkillManager(known_skills=set())
+        generator = PlanGenerator(skills)
+        intent = _make_intent(IntentType.OPEN_APP, app_name="Notepad")
+        
+        before = generator.generate_plan(intent)
+        skills.register_skill("open_app")
+        after = generator.generate_plan(intent)
+        
+        assert before.actions[1].parameters["skill_parameters"] == {}
+        assert after.actions[1].parameters["skill_parameters"] == {"app_name": "Notepad"}
+    
+    def test_generator_cache_is_bounded(self, skill_manager, monkeypatch):
+        """Le cache de plans prototypes respecte sa taille maximale."""
+        generator = PlanGenerator(skill_manager)
+        monkeypatch.setattr(generator.settings.planner, "plan_cache_size", 3)
+        
+        for i in range(10):
+            generator.generate_plan(_make_intent(IntentType.TYPE_TEXT, text=f"texte {i}"))
+        
+        assert len(generator._plan_cache) == 3
+        assert list(generator._plan_cache) == [
+            (IntentType.TYPE_TEXT, (("text", f"texte {i}"),)) for i in (7, 8, 9)
+        ]
+    
+    def test_lazy_plan_materializes_on_access(self, skill_manager):
+        """Les actions d'un plan paresseux ne sont construites qu'au premier accès."""
+        generator = PlanGenerator(skill_manager)
+        intent = _make_intent(IntentType.WEB_SEARCH, query="python")
+        
+        lazy_plan = generator.generate_lazy_plan(intent)
+        assert not lazy_plan.is_materialized
+        
+        plan = lazy_plan.materialize()
+        eager_plan = generator.generate_plan(intent)
+        
+        assert lazy_plan.is_materialized
+        assert plan.id == lazy_plan.id
+        assert _dump_actions(plan.actions) == _dump_actions(eager_plan.actions)
+        assert plan.summary == eager_plan.summary
+        assert plan.estimated_duration == eager_plan.estimated_duration
+    
+    def test_manager_cache_hit_returns_new_id(self, skill_manager):
+        """Un résultat servi par le cache du manager porte un nouvel id de plan."""
+        with PlannerManager(skill_manager) as planner:
+            intent = _make_intent(IntentType.OPEN_APP, app_name="chrome")
+            
+            first = planner.create_plan(intent)
+            second = planner.create_plan(intent)
+            
+            assert first["execution_decision"]["approved"]
+            assert second["plan"]["id"] != first["plan"]["id"]
+            assert second["plan"]["actions"] == first["plan"]["actions"]
+            assert planner.get_plan_by_id(second["plan"]["id"]) is not None
+            assert planner.get_plan_by_id(first["plan"]["id"]) is not None
+    
+    def test_manager_lru_eviction_under_concurrency(self, skill_manager, monkeypatch):
+        """L'éviction LRU garde les index cohérents sous accès concurrents."""
+        with PlannerManager(skill_manager) as planner:
+            monkeypatch.setattr(planner.settings.planner, "plan_cache_size", 4)
+            intents = [_make_intent(IntentType.TYPE_TEXT, text=f"texte {i % 16}") for i in range(200)]
+            
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(planner.create_plan, intents))
+            
+            plan_ids = [result["plan"]["id"] for result in results]
+            assert len(set(plan_ids)) == len(plan_ids)
+            
+            assert len(planner._plan_cache) <= 4
+            for plan, _ in planner._result_cache.values():
+                assert plan.id in planner._plan_cache
+            for plans in planner._plans_by_intent_type.values():
+                assert all(plan.id in planner._plan_cache for plan in plans)
+            
+            assert planner.get_planner_stats()["plans_generated"] == 200
+    
+    def test_similar_plans_under_concurrency(self, skill_manager, monkeypatch):
+        """La recherche de plans similaires supporte les ajouts concurrents."""
+        with PlannerManager(skill_manager) as planner:
+            monkeypatch.setattr(planner.settings.planner, "plan_cache_size", 4)
+            intents = [_make_intent(IntentType.TYPE_TEXT, text=f"texte {i}") for i in range(100)]
+            probe = _make_intent(IntentType.TYPE_TEXT, text="texte 0")
+            
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                creations = [executor.submit(planner.create_plan, intent) for intent in intents]
+                lookups = [executor.submit(planner._find_similar_plans, probe) for _ in range(200)]
+                
+                for future in creations + lookups:
+                    future.result()
+            
+            assert len(planner._find_similar_plans(probe)) <= 5
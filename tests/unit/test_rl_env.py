@@ -0,0 +1,255 @@
+"""Tests unitaires pour les espaces d'action et d'observation RL."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gymnasium")
+
+from packages.rl_env.action_space import ActionSpace, ActionConfig
+from packages.rl_env.observation_space import ObservationSpace, ObservationConfig
+from packages.common.models import Action, ActionType
+
+
+# Paramètres exactement représentables après normalisation (écran 1920x1080)
+DOMAIN_ACTIONS = [
+    (ActionType.MOVE_MOUSE, {"x": 480, "y": 270}),
+    (ActionType.CLICK, {"x": 960, "y": 540}),
+    (ActionType.DOUBLE_CLICK, {"x": 0, "y": 1080}),
+    (ActionType.RIGHT_CLICK, {"x": 1440, "y": 810}),
+    (ActionType.TYPE_TEXT, {"text": "hello world"}),
+    (ActionType.KEY_PRESS, {"keys": ["ctrl", "shift", "S"]}),
+    (ActionType.SCROLL, {"x": 480, "y": 540, "direction": "up", "clicks": 1}),
+    (ActionType.SCROLL, {"x": 480, "y": 540, "direction": "down", "clicks": 1}),
+    (ActionType.WAIT, {"duration": 2.5}),
+]
+
+
+def _make_rl_action(action_type_id):
+    """Action RL déterministe: ctrl+S, texte ASCII, coordonnées exactes."""
+    text = np.zeros(200, dtype=np.uint8)
+    text[:5] = np.frombuffer(b"hello", dtype=np.uint8)
+    
+    return {
+        "action_type": action_type_id,
+        "coordinates": np.array([0.25, 0.5], dtype=np.float32),
+        "text": text,
+        "modifiers": np.array([1, 0, 0, 0, 0, 0, 0, 0], dtype=np.int8),
+        "key": np.array([ord("S")], dtype=np.uint8),
+        "scroll_direction": 0,
+        "wait_time": np.array([0.5], dtype=np.float32),
+    }
+
+
+def _make_observation(**overrides):
+    """Observation minimale au format attendu par ObservationSpace."""
+    fields = {
+        "screenshot_path": None,
+        "screenshot_ndarray": None,
+        "ui_elements": [
+            SimpleNamespace(role="button", bounds=[100, 200, 50, 30]),
+            SimpleNamespace(role="TextBox", bounds=[150, 250, 200, 25], confidence=0.5),
+            SimpleNamespace(role="custom", bounds=[0, 0, 1920, 1080]),
+        ],
+        "ocr_results": [SimpleNamespace(text="Sample text"), SimpleNamespace(text="héllo")],
+        "mouse_position": (300, 400),
+        "active_window": "Test Window",
+        "step_count": 3,
+        "last_action_success": True,
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+class TestActionSpace:
+    """Tests pour ActionSpace."""
+    
+    @pytest.mark.parametrize("action_type,parameters", DOMAIN_ACTIONS)
+    def test_domain_action_round_trip(self, action_type, parameters):
+        """Une action du domaine survit à l'aller-retour par l'espace RL."""
+        action_space = ActionSpace()
+        action = Action(type=action_type, parameters=parameters, description="test")
+        
+        rl_action = action_space.convert_from_domain_action(action)
+        assert action_space.space.contains(rl_action)
+        
+        converted = action_space.convert_to_domain_action(rl_action)
+        
+        assert converted.type == action_type
+        assert converted.parameters == parameters
+    
+    def test_single_key_press(self):
+        """Une touche seule est décodée sans modificateurs."""
+        action_space = ActionSpace()
+        action = Action(type=ActionType.KEY_PRESS, parameters={"keys": ["a"]}, description="test")
+        
+        converted = action_space.convert_to_domain_action(
+            action_space.convert_from_domain_action(action)
+        )
+        
+        assert converted.parameters == {"key": "A"}
+    
+    @pytest.mark.parametrize("key,expected", [
+        ("é", "É"),
+        ("µ", "µ"),
+        ("ÿ", "ÿ"),
+        ("ß", "ß"),
+        ("€", None),
+    ])
+    def test_non_ascii_key_fits_one_byte(self, key, expected):
+        """Une touche non ASCII est encodée sur un octet latin-1."""
+        action_space = ActionSpace()
+        action = Action(type=ActionType.KEY_PRESS, parameters={"keys": ["ctrl", key]}, description="test")
+        
+        rl_action = action_space.convert_from_domain_action(action)
+        converted = action_space.convert_to_domain_action(rl_action)
+        
+        if expected is None:
+            assert converted.parameters == {}
+        else:
+            assert converted.parameters == {"keys": ["ctrl", expected]}
+    
+    def test_rl_action_round_trip_for_each_type(self):
+        """Chaque type d'action RL est reconstruit depuis le domaine."""
+        action_space = ActionSpace()
+        
+        for action_type_id, name in enumerate(action_space.action_types):
+            rl_action = _make_rl_action(action_type_id)
+            
+            if name == "no_op":
+                # no_op n'a pas d'équivalent dans le domaine
+                with pytest.raises(ValueError):
+                    action_space.convert_to_domain_action(rl_action)
+                continue
+            
+            action = action_space.convert_to_domain_action(rl_action)
+            assert action.type.value == name
+            
+            back = action_space.convert_from_domain_action(action)
+            assert back["action_type"] == action_type_id
+            assert action_space.convert_to_domain_action(back).parameters == action.parameters
+    
+    def test_unknown_domain_action_maps_to_no_op(self):
+        """Un type du domaine sans équivalent RL devient no_op."""
+        action_space = ActionSpace()
+        action = Action(type=ActionType.SCREENSHOT, parameters={}, description="test")
+        
+        rl_action = action_space.convert_from_domain_action(action)
+        
+        assert action_space.action_types[rl_action["action_type"]] == "no_op"
+    
+    def test_text_is_truncated_to_space(self):
+        """Le texte encodé ne dépasse jamais la taille de l'espace."""
+        action_space = ActionSpace(ActionConfig(max_text_length=16))
+        action = Action(type=ActionType.TYPE_TEXT, parameters={"text": "x" * 100}, description="test")
+        
+        rl_action = action_space.convert_from_domain_action(action)
+        
+        assert action_space.space.contains(rl_action)
+        assert action_space.convert_to_domain_action(rl_action).parameters == {"text": "x" * 16}
+
+
+class TestObservationSpace:
+    """Tests pour ObservationSpace."""
+    
+    def test_observation_without_screenshot_in_space(self):
+        """Une observation sans screenshot reste dans l'espace."""
+        observation_space = ObservationSpace()
+        
+        rl_obs = observation_space.convert_observation(_make_observation())
+        
+        assert observation_space.space.contains(rl_obs)
+        assert not rl_obs["screenshot"].any()
+    
+    def test_observation_from_file_in_space(self, tmp_path):
+        """Un screenshot lu depuis un fichier est réduit à la taille de l'espace."""
+        from PIL import Image
+        
+        path = tmp_path / "screenshot.png"
+        Image.fromarray(np.full((1080, 1920, 3), 200, dtype=np.uint8)).save(path)
+        observation_space = ObservationSpace()
+        
+        rl_obs = observation_space.convert_observation(_make_observation(screenshot_path=str(path)))
+        
+        assert observation_space.space.contains(rl_obs)
+        assert rl_obs["screenshot"].max() == 200
+    
+    def test_observation_from_ndarray_in_space(self):
+        """Une frame en mémoire est réduite à la taille de l'espace."""
+        observation_space = ObservationSpace()
+        frame = np.random.default_rng(0).integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+        
+        rl_obs = observation_space.convert_observation(_make_observation(screenshot_ndarray=frame))
+        
+        assert observation_space.space.contains(rl_obs)
+    
+    def test_bgra_frame_is_converted_to_rgb(self):
+        """Une frame BGRA de mss est réduite et convertie en RGB."""
+        observation_space = ObservationSpace()
+        frame = np.empty((1080, 1920, 4), dtype=np.uint8)
+        frame[...] = (10, 20, 30, 255)  # B, G, R, A
+        
+        rl_obs = observation_space.convert_observation(_make_observation(screenshot_ndarray=frame))
+        
+        assert observation_space.space.contains(rl_obs)
+        assert (rl_obs["screenshot"] == (30, 20, 10)).all()
+    
+    @pytest.mark.parametrize("frame", [
+        np.zeros((0, 0, 3), dtype=np.uint8),
+        np.zeros((108, 192, 2), dtype=np.uint8),
+        np.zeros((108, 192), dtype=np.uint8),
+    ])
+    def test_invalid_frame_falls_back_to_zeros(self, frame):
+        """Une frame invalide donne l'image noire de repli."""
+        observation_space = ObservationSpace()
+        
+        rl_obs = observation_space.convert_observation(_make_observation(screenshot_ndarray=frame))
+        
+        assert observation_space.space.contains(rl_obs)
+        assert not rl_obs["screenshot"].any()
+    
+    def test_missing_file_falls_back_to_zeros(self, tmp_path):
+        """Un fichier introuvable donne l'image noire de repli."""
+        observation_space = ObservationSpace()
+        
+        rl_obs = observation_space.convert_observation(
+            _make_observation(screenshot_path=str(tmp_path / "absent.png"))
+        )
+        
+        assert observation_space.space.contains(rl_obs)
+    
+    def test_screenshot_disabled_in_space(self):
+        """Sans screenshot, le placeholder respecte l'espace réduit."""
+        observation_space = ObservationSpace(ObservationConfig(include_screenshot=False))
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        
+        for obs in (_make_observation(), _make_observation(screenshot_ndarray=frame)):
+            assert observation_space.space.contains(observation_space.convert_observation(obs))
+    
+    def test_ui_elements_are_normalized(self):
+        """Les éléments UI sont normalisés et complétés par des zéros."""
+        observation_space = ObservationSpace()
+        
+        ui_elements = observation_space.convert_observation(_make_observation())["ui_elements"]
+        
+        np.testing.assert_allclose(
+            ui_elements[:3],
+            [
+                [100 / 1920, 200 / 1080, 50 / 1920, 30 / 1080, 1 / 9, 1.0],
+                [150 / 1920, 250 / 1080, 200 / 1920, 25 / 1080, 3 / 9, 0.5],
+                [0.0, 0.0, 1.0, 1.0, 0.0, 1.0],
+            ],
+            rtol=1e-6
+        )
+        assert not ui_elements[3:].any()
+    
+    def test_offscreen_ui_element_is_clipped(self):
+        """Un élément débordant de l'écran reste dans les bornes de l'espace."""
+        observation_space = ObservationSpace()
+        obs = _make_observation(ui_elements=[SimpleNamespace(role="window", bounds=[-20, 100, 4000, 2000])])
+        
+        rl_obs = observation_space.convert_observation(obs)
+        
+        assert observation_space.space.contains(rl_obs)
+        np.testing.assert_allclose(rl_obs["ui_elements"][0], [0.0, 100 / 1080, 1.0, 1.0, 6 / 9, 1.0], rtol=1e-6)